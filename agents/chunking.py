@@ -0,0 +1,116 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Code Chunking & Report Merging
+ Splits large files along syntactic boundaries so the
+ chunks can be reviewed in parallel, then merges the
+ partial ReviewReports back into one.
+═══════════════════════════════════════════════════════
+"""
+
+import ast
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from schemas.state import ReviewIssue, ReviewReport
+
+
+@dataclass
+class Chunk:
+    start_line: int  # 1-based, inclusive
+    end_line: int    # 1-based, inclusive
+    text: str
+
+    @property
+    def size(self) -> int:
+        return self.end_line - self.start_line + 1
+
+
+def _python_segments(code: str, lines: List[str]) -> Optional[List[Tuple[int, int]]]:
+    """(start, end) line spans: one per top-level def/class, plus the glue between them."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    starts = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            first = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            starts.append(first)
+    if not starts or starts[0] != 1:
+        starts.insert(0, 1)
+
+    bounds = starts + [len(lines) + 1]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(len(starts)) if bounds[i] < bounds[i + 1]]
+
+
+def _line_windows(start: int, end: int, max_lines: int, overlap: int) -> List[Tuple[int, int]]:
+    """Overlapping fixed-size windows covering start..end."""
+    step = max(1, max_lines - overlap)
+    spans = []
+    pos = start
+    while True:
+        stop = min(end, pos + max_lines - 1)
+        spans.append((pos, stop))
+        if stop >= end:
+            return spans
+        pos += step
+
+
+def split_code(code: str, language: str = None, max_lines: int = 400,
+               overlap: int = 20) -> List[Chunk]:
+    """
+    Split code into chunks of at most ~max_lines.
+    Python is cut at top-level functions/classes (via `ast`), with adjacent
+    small segments packed together. Other languages — and oversized Python
+    segments — fall back to overlapping line windows.
+    """
+    lines = code.split("\n")
+    if len(lines) <= max_lines:
+        return [Chunk(1, len(lines), code)]
+
+    segments = None
+    if (language or "python").lower() in ("python", "py", "auto"):
+        segments = _python_segments(code, lines)
+    if segments is None:
+        segments = [(1, len(lines))]
+
+    spans: List[Tuple[int, int]] = []
+    for start, end in segments:
+        if end - start + 1 > max_lines:
+            spans.extend(_line_windows(start, end, max_lines, overlap))
+        elif spans and end - spans[-1][0] + 1 <= max_lines and spans[-1][1] == start - 1:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+
+    return [Chunk(s, e, "\n".join(lines[s - 1:e])) for s, e in spans]
+
+
+def issue_key(issue: ReviewIssue) -> Tuple[str, Optional[int], str]:
+    """
+    Identity used to de-duplicate issues reported by overlapping chunks. Anchored
+    issues are only duplicates on the same line; unanchored ones match on wording.
+    """
+    return issue.severity.strip().lower(), issue.line, " ".join(issue.description.lower().split())
+
+
+def merge_reports(parts: List[Tuple[ReviewReport, int]]) -> ReviewReport:
+    """Merge (report, weight) pairs: de-duplicate issues, weight scores by chunk size."""
+    if len(parts) == 1:
+        return parts[0][0]
+
+    seen = set()
+    issues = []
+    for report, _ in parts:
+        for issue in report.issues:
+            key = issue_key(issue)
+            if key not in seen:
+                seen.add(key)
+                issues.append(issue)
+
+    total = sum(weight for _, weight in parts) or 1
+    score = sum(report.quality_score * weight for report, weight in parts) / total
+    # The merged review is only as sure as its least confident part
+    confidences = [report.confidence for report, _ in parts if report.confidence is not None]
+    return ReviewReport(issues=issues, quality_score=round(score, 1),
+                        confidence=min(confidences) if confidences else None)
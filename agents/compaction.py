@@ -0,0 +1,152 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Prompt Compaction & Token Budget
+ Shrinks each chunk before it reaches the model: license
+ headers, minified lines, repeated blocks and blank runs
+ are abbreviated, and the request is cut to a token budget.
+ Kept lines keep their original numbers, so issue line
+ anchors still point into the submitted file.
+═══════════════════════════════════════════════════════
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from agents.chunking import Chunk
+
+CHARS_PER_TOKEN = 4
+_DEDUPE_BLOCK_LINES = 4
+_DEDUPE_MIN_CHARS = 40  # blocks of braces and `pass` aren't worth a marker
+_COMMENT = re.compile(r"^\s*(#|//|/\*|\*)")
+_LICENSE = re.compile(r"licen[cs]e|copyright|spdx-license|all rights reserved|permission is hereby granted",
+                      re.IGNORECASE)
+
+Entry = Tuple[Optional[int], str]  # (original line number, text); None marks an omission note
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, deterministic token estimate (~4 characters per token for code)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _note(text: str) -> Entry:
+    return None, f"… [{text}]"
+
+
+def _strip_license_header(entries: List[Entry]) -> List[Entry]:
+    """Collapse a leading comment block that is a license header (shebang/encoding lines stay)."""
+    start = 0
+    while start < len(entries) and entries[start][1].startswith(("#!", "# -*-", "# coding")):
+        start += 1
+    end = start
+    while end < len(entries) and (_COMMENT.match(entries[end][1]) or not entries[end][1].strip()):
+        end += 1
+    header = entries[start:end]
+    if len(header) < 3 or not any(_LICENSE.search(text) for _, text in header):
+        return entries
+    first, last = header[0][0], header[-1][0]
+    return entries[:start] + [_note(f"lines {first}-{last}: license header omitted")] + entries[end:]
+
+
+def _dedupe_blocks(entries: List[Entry]) -> List[Entry]:
+    """Replace runs of lines that repeat an earlier run verbatim with a back-reference."""
+    block = _DEDUPE_BLOCK_LINES
+    keys = [text.strip() for _, text in entries]
+    first_seen = {}
+    out: List[Entry] = []
+    i = 0
+    while i < len(entries):
+        window = tuple(keys[i:i + block])
+        if len(window) == block and sum(map(len, window)) >= _DEDUPE_MIN_CHARS:
+            j = first_seen.get(window)
+            if j is not None and j + block <= i:
+                length = block
+                while (i + length < len(entries) and j + length < i
+                       and keys[i + length] == keys[j + length]):
+                    length += 1
+                out.append(_note(f"lines {entries[i][0]}-{entries[i + length - 1][0]} repeat "
+                                 f"lines {entries[j][0]}-{entries[j + length - 1][0]}"))
+                i += length
+                continue
+            first_seen.setdefault(window, i)
+        out.append(entries[i])
+        i += 1
+    return out
+
+
+def _shorten(entries: List[Entry], max_line_chars: int) -> List[Entry]:
+    """Truncate minified/overlong lines and collapse runs of blank lines."""
+    out: List[Entry] = []
+    for n, text in entries:
+        if n is not None and not text.strip():
+            if out and out[-1][0] is not None and not out[-1][1].strip():
+                continue  # numbering already shows the gap
+        elif n is not None and len(text) > max_line_chars:
+            text = f"{text[:max_line_chars]} … [+{len(text) - max_line_chars} chars, likely minified]"
+        out.append((n, text))
+    return out
+
+
+def _render(entries: List[Entry]) -> str:
+    return "\n".join(f"{n}| {text}" if n is not None else f"  | {text}" for n, text in entries)
+
+
+def compact_chunk(chunk: Chunk, max_line_chars: int) -> List[Entry]:
+    entries: List[Entry] = list(enumerate(chunk.text.split("\n"), start=chunk.start_line))
+    if chunk.start_line == 1:
+        entries = _strip_license_header(entries)
+    return _shorten(_dedupe_blocks(entries), max_line_chars)
+
+
+@dataclass
+class CompactionResult:
+    chunks: List[Chunk]        # chunks that fit the budget (the last one possibly cut short)
+    bodies: List[str]          # line-numbered prompt body per kept chunk
+    original_tokens: int
+    compacted_tokens: int
+    truncated_after: Optional[int] = None  # last reviewed line when the budget ran out
+
+
+def compact_chunks(chunks: List[Chunk], token_budget: int, max_line_chars: int) -> CompactionResult:
+    """
+    Compact every chunk, then keep chunks in file order until `token_budget`
+    is spent. The chunk that crosses the budget is cut at a line boundary;
+    later chunks are dropped. Same input, same output — so it stays cacheable.
+    """
+    original = 0
+    kept_chunks: List[Chunk] = []
+    bodies: List[str] = []
+    spent = 0
+    truncated_after = None
+
+    for chunk in chunks:
+        original += estimate_tokens(_render(list(enumerate(chunk.text.split("\n"), chunk.start_line))))
+        if truncated_after is not None:
+            continue
+        entries = compact_chunk(chunk, max_line_chars)
+        body = _render(entries)
+        cost = estimate_tokens(body)
+        if spent + cost <= token_budget:
+            kept_chunks.append(chunk)
+            bodies.append(body)
+            spent += cost
+            continue
+
+        # Cut this chunk at the last line that still fits
+        fitted: List[Entry] = []
+        fitted_cost = 0
+        for entry in entries:
+            line_cost = estimate_tokens(_render([entry])) + 1
+            if spent + fitted_cost + line_cost > token_budget:
+                break
+            fitted.append(entry)
+            fitted_cost += line_cost
+        last_line = max((n for n, _ in fitted if n is not None), default=None)
+        if last_line is not None:
+            kept_chunks.append(Chunk(chunk.start_line, last_line,
+                                     "\n".join(chunk.text.split("\n")[:last_line - chunk.start_line + 1])))
+            bodies.append(_render(fitted))
+            spent += fitted_cost
+        truncated_after = last_line if last_line is not None else chunk.start_line - 1
+
+    return CompactionResult(kept_chunks, bodies, original, spent, truncated_after)
@@ -0,0 +1,30 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Graph Nodes
+ LangChain serializes every runnable it starts (for
+ tracing), whether or not a tracer is attached, and a
+ plain function node is described by reading and
+ re-parsing its source with inspect. Nodes wrapped here
+ describe themselves by name instead. Kept apart from
+ the graph module because it needs langchain_core,
+ which is imported only when the first graph is built.
+═══════════════════════════════════════════════════════
+"""
+
+from typing import Any, Callable, List
+from langchain_core.runnables import RunnableLambda
+
+
+class GraphNode(RunnableLambda):
+    """A RunnableLambda whose repr and dependencies don't come from its source code."""
+
+    def __init__(self, name: str, func: Callable):
+        # RunnableLambda takes async functions as `func` and runs them with ainvoke
+        super().__init__(func, name=name)
+
+    def __repr__(self) -> str:
+        return f"GraphNode({self.name})"
+
+    @property
+    def deps(self) -> List[Any]:
+        return []  # nodes only reach each other through the graph's state
@@ -0,0 +1,77 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Incremental Re-Review
+ Diffs a resubmitted file against the prior version so
+ only changed hunks (plus context) go to the model.
+ Issues in unchanged code are carried forward with their
+ line anchors re-mapped; issues in edited code are dropped.
+═══════════════════════════════════════════════════════
+"""
+
+import difflib
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+from agents.chunking import Chunk
+from schemas.state import ReviewReport
+
+
+@dataclass
+class IncrementalPlan:
+    hunks: List[Chunk]                 # regions of the NEW code to send to the model
+    carried: ReviewReport              # prior issues that still apply, re-anchored
+    unchanged_lines: int               # weight of the carried score when merging
+    changed_ratio: float               # changed / total new lines
+    line_map: Dict[int, int] = field(default_factory=dict)  # old line -> new line (1-based)
+
+
+def _merge_spans(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def plan_incremental(old_code: str, new_code: str, prior: ReviewReport,
+                     context: int = 5) -> IncrementalPlan:
+    """Work out which new lines need review and which prior issues carry over."""
+    old_lines = old_code.split("\n")
+    new_lines = new_code.split("\n")
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+
+    line_map: Dict[int, int] = {}
+    spans: List[Tuple[int, int]] = []
+    changed = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(i2 - i1):
+                line_map[i1 + offset + 1] = j1 + offset + 1
+            continue
+        changed += max(j2 - j1, 1)
+        # Deletions have no new lines of their own — review the seam they leave behind
+        first, last = (j1 + 1, j2) if j2 > j1 else (j1, j1 + 1)
+        spans.append((max(1, first - context), min(len(new_lines), last + context)))
+
+    merged = _merge_spans(spans)
+    hunks = [Chunk(s, e, "\n".join(new_lines[s - 1:e])) for s, e in merged if s <= e]
+
+    def in_hunk(line: int) -> bool:
+        return any(s <= line <= e for s, e in merged)
+
+    carried = []
+    for issue in prior.issues:
+        if issue.line is None:
+            carried.append(issue)  # file-level finding, no anchor to invalidate
+        elif issue.line in line_map and not in_hunk(line_map[issue.line]):
+            carried.append(issue.model_copy(update={"line": line_map[issue.line]}))
+        # else: the line was edited, deleted, or is re-reviewed as hunk context
+
+    return IncrementalPlan(
+        hunks=hunks,
+        carried=ReviewReport(issues=carried, quality_score=prior.quality_score),
+        unchanged_lines=len(line_map),
+        changed_ratio=changed / max(1, len(new_lines)),
+        line_map=line_map,
+    )
@@ -0,0 +1,61 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Model Usage Callback
+ Times raw Gemini calls and counts token usage. Kept
+ apart from the graph module because it needs
+ langchain_core, which is imported only when the first
+ model client is built.
+═══════════════════════════════════════════════════════
+"""
+
+import time
+from typing import Dict
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from core.metrics import STAGE_SECONDS, TOKENS
+
+
+class ModelUsageCallback(BaseCallbackHandler):
+    """
+    Attached to the chat model: times the raw model call (stage="model") and
+    counts token usage when the Gemini response reports it. The gap between
+    "structured_call" and "model" is the structured-output parsing overhead.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._starts: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage="model")
+        for generations in response.generations:
+            for generation in generations:
+                usage = _usage_of(generation)
+                for kind, field in (("input", "input_tokens"), ("output", "output_tokens")):
+                    if usage.get(field):
+                        TOKENS.inc(usage[field], type=kind)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self._starts.pop(run_id, None)
+
+
+def _usage_of(generation) -> dict:
+    """Token counts from whichever field this langchain/Gemini version fills in."""
+    message = getattr(generation, "message", None)
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage:
+        return usage
+    meta = (getattr(message, "response_metadata", None) or {}).get("usage_metadata") or {}
+    return {
+        "input_tokens": meta.get("prompt_token_count"),
+        "output_tokens": meta.get("candidates_token_count"),
+    }
+
+
+model_usage_callback = ModelUsageCallback()
@@ -1,43 +1,281 @@
 import os
+import asyncio
+import hmac
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Optional
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.graph import StateGraph, END
-from schemas.state import AgentState, ReviewReport
-import smtplib
+from schemas.state import AgentState, ReviewIssue, ReviewReport
+from agents.chunking import Chunk, split_code, merge_reports
+from agents.static_checks import analyze, format_hints
+from agents.compaction import compact_chunks, estimate_tokens
+from agents.routing import DEFAULT_TIER, TIERS, ModelTier, escalation_reason, route
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 load_dotenv()
 
+# LangChain, LangGraph and the Gemini client take seconds to import; they load on first
+# graph build (normally the startup prewarm), not when this module is imported.
+if TYPE_CHECKING:
+    from langchain_core.runnables import RunnableConfig
+
 
 from core.config import config
+from core.mailer import mail_queue, MailQueueFull
+from core.rate_limit import rate_limiters, call_with_retry
+from core.metrics import (STAGE_SECONDS, INFLIGHT, PROMPT_CHARS, PROMPT_TOKENS, RESPONSE_CHARS,
+                          MODEL_ROUTES, MODEL_TIER_SECONDS, MODEL_COST, timed_stage)
+
+# Bump whenever the reviewer prompt changes — it is part of the review cache key.
+PROMPT_VERSION = "7"
+_LINE_NOTE = "Each line is prefixed with its line number; set `line` on every issue that points at one."
+REVIEW_PROMPT = "Review this code for bugs and efficiency. " + _LINE_NOTE + "{hints}\n\n{code}"
+CHUNK_PROMPT = (
+    "Review this excerpt (lines {start}-{end} of a larger file) for bugs and efficiency. "
+    "Only report issues inside the excerpt. " + _LINE_NOTE + "{hints}\n\n{code}"
+)
+
 
-def get_llm(api_key: str = None):
+def get_llm(api_key: str = None, tier: ModelTier = None):
     """
-    Create an LLM instance. 
+    Create an LLM instance for a model tier (default: flash, i.e. MODEL_NAME).
     If a custom API key is provided, use it. Otherwise, use the server's default.
     This allows users to bring their own API key without touching the backend.
+    LLM_BACKEND=fake swaps in the offline benchmark model (no quota spent).
     """
+    tier = tier or DEFAULT_TIER
+    if config.LLM_BACKEND == "fake":
+        from benchmarks.fake_llm import FakeChatModel
+        return FakeChatModel.from_env(tier.name)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from agents.model_usage import model_usage_callback
+
     key = api_key or os.getenv("GOOGLE_API_KEY")
     return ChatGoogleGenerativeAI(
-        model=config.DEFAULT_MODEL,
+        model=tier.model,
         temperature=config.TEMPERATURE,
         google_api_key=key,
+        callbacks=[model_usage_callback],
     )
 
 
+def _event_sink(run_config: "RunnableConfig") -> Optional[Callable[[dict], None]]:
+    """The `on_event` callback threaded through RunnableConfig (set by /review/stream)."""
+    return ((run_config or {}).get("configurable") or {}).get("on_event")
+
+
+def _abandoned(state: AgentState, run_config: "RunnableConfig") -> bool:
+    """True once the run was cancelled (client gone) or its deadline has passed."""
+    cancelled = ((run_config or {}).get("configurable") or {}).get("cancelled")
+    deadline = state.get("deadline")
+    return bool(cancelled is not None and cancelled.is_set()) or (
+        deadline is not None and time.monotonic() > deadline)
+
+
+async def _astream_report(structured_llm, prompt: str, emit: Callable[[dict], None]) -> ReviewReport:
+    """
+    Stream the structured output and emit each issue as soon as the model has
+    moved on to the next one (so it is known to be complete).
+    Degrades to one emit per chunk if the model does not stream partial objects.
+    """
+    emitted = 0
+    last = None
+    async for partial in structured_llm.astream(prompt):
+        last = partial
+        issues = partial.issues if isinstance(partial, ReviewReport) else (partial or {}).get("issues") or []
+        while emitted < len(issues) - 1:
+            emit({"event": "issue", "issue": ReviewIssue.model_validate(issues[emitted]).model_dump()})
+            emitted += 1
+
+    if last is None:
+        raise ValueError("Model returned an empty response.")
+    report = last if isinstance(last, ReviewReport) else ReviewReport.model_validate(last)
+    for issue in report.issues[emitted:]:
+        emit({"event": "issue", "issue": issue.model_dump()})
+    return report
+
+
 def create_graph(api_key: str = None):
-    """Build a fresh LangGraph with the given API key (or default)."""
+    """Build a fresh LangGraph with the given API key (or default). Run it with `ainvoke`."""
+    from langchain_core.runnables import RunnableConfig
+    from langgraph.graph import StateGraph, END
+    from agents.graph_nodes import GraphNode
+
+    # One structured model per tier the router may pick
+    tiers = TIERS.values() if config.MODEL_ROUTING else [DEFAULT_TIER]
+    structured = {tier.name: get_llm(api_key, tier).with_structured_output(ReviewReport) for tier in tiers}
+    bucket = rate_limiters.bucket(graph_pool.key_for(api_key))
+
+    # Static analysis, chunking and compaction are cheap, pure Python steps: they run as plain
+    # calls inside one node, since every extra graph node costs a LangChain run of its own.
+    @timed_stage("static_analysis")
+    def analyze_code(state: AgentState) -> dict:
+        started = time.perf_counter()
+        analysis = analyze(state["code_snippet"], state.get("language"),
+                           config.STATIC_COMPLEXITY_THRESHOLD)
+        update = {"static_issues": analysis.issues,
+                  "static_notes": analysis.notes,
+                  "complexity": analysis.complexity,
+                  "static_ms": (time.perf_counter() - started) * 1000}
+        if analysis.conclusive:
+            print("⚡ Local checks were conclusive, skipping the model.")
+            update["report"] = analysis.report
+        return update
+
+    @timed_stage("chunker")
+    def chunk_code(state: AgentState) -> list:
+        if state.get("hunks"):
+            # Incremental re-review: only the changed hunks, re-split if one is oversized
+            chunks = []
+            for hunk in state["hunks"]:
+                for part in split_code(hunk.text, state.get("language"),
+                                       config.CHUNK_MAX_LINES, config.CHUNK_OVERLAP_LINES):
+                    offset = hunk.start_line - 1
+                    chunks.append(Chunk(part.start_line + offset, part.end_line + offset, part.text))
+            return chunks
+
+        return split_code(
+            state["code_snippet"],
+            language=state.get("language"),
+            max_lines=config.CHUNK_MAX_LINES,
+            overlap=config.CHUNK_OVERLAP_LINES,
+        )
+
+    @timed_stage("compactor")
+    def compact_code(chunks: list, static_issues: list) -> dict:
+        result = compact_chunks(chunks, config.TOKEN_BUDGET, config.COMPACT_MAX_LINE_CHARS)
+        PROMPT_TOKENS.inc(result.original_tokens, kind="original")
+        PROMPT_TOKENS.inc(result.compacted_tokens, kind="compacted")
+        update = {
+            "chunks": result.chunks,
+            "prompt_bodies": result.bodies,
+            "tokens": {"original": result.original_tokens, "compacted": result.compacted_tokens},
+        }
+        if result.truncated_after is not None:
+            print(f"✂️  Token budget reached, reviewing lines up to {result.truncated_after} only.")
+            # Anchored just past the reviewed range, so it is never fed back as a chunk hint
+            update["static_issues"] = static_issues + [ReviewIssue(
+                severity="Low",
+                description=f"Only lines up to {result.truncated_after} were reviewed: "
+                            f"the file exceeds the {config.TOKEN_BUDGET}-token review budget.",
+                suggestion="Split the file or submit the remaining part separately.",
+                line=result.truncated_after + 1,
+            )]
+        return update
+
+    def prepare_node(state: AgentState):
+        update = analyze_code(state)
+        if "report" in update:
+            return update  # conclusive: straight to the notifier
+        update.update(compact_code(chunk_code(state), update["static_issues"]))
+        return update
+
+    def route_after_prepare(state: AgentState) -> str:
+        return "notifier" if state.get("report") is not None else "reviewer"
+
+    chunk_concurrency = config.CHUNK_CONCURRENCY
+
+    # `config` here is the per-run RunnableConfig, not core.config
+    @timed_stage("reviewer")
+    async def code_reviewer_node(state: AgentState, config: RunnableConfig):
+        emit = _event_sink(config)
+        chunks = state["chunks"]
+        decision = route((state.get("tokens") or {}).get("compacted", 0), state.get("language"),
+                         state.get("complexity") or 1)
+        MODEL_ROUTES.inc(tier=decision.tier.name, kind="routed")
+        print(f"🔍 Analyzing code with {decision.tier.model} ({len(chunks)} chunk(s); {decision.reason})...")
+        if emit:
+            emit({"event": "progress", "stage": "reviewing", "chunks": len(chunks), "tier": decision.tier.name})
+        limit = asyncio.Semaphore(chunk_concurrency)
+        retries = 0
+        escalations = 0
+        usage = {}  # tier name -> {"calls", "ms", "cost_usd"}
+
+        def count_retry():
+            nonlocal retries
+            retries += 1
 
-    llm = get_llm(api_key)
-    structured_llm = llm.with_structured_output(ReviewReport)
+        async def call_model(tier: ModelTier, prompt: str, stream: bool) -> ReviewReport:
+            if stream:
+                return await _astream_report(structured[tier.name], prompt, emit)
+            return await structured[tier.name].ainvoke(prompt)
 
-    def code_reviewer_node(state: AgentState):
-        print("🔍 Analyzing code with Gemini...")
-        prompt = f"Review this code for bugs and efficiency:\n\n{state['code_snippet']}"
-        result = structured_llm.invoke(prompt)
-        return {"report": result}
+        async def call_tier(tier: ModelTier, prompt: str, stream: bool) -> ReviewReport:
+            PROMPT_CHARS.inc(len(prompt))
+            started = time.perf_counter()
+            with STAGE_SECONDS.time(stage="structured_call"), INFLIGHT.track(kind="model_calls"):
+                # 429s wait on the per-key bucket and retry with backoff until the deadline
+                report = await call_with_retry(lambda: call_model(tier, prompt, stream), bucket,
+                                               deadline=state.get("deadline"), on_retry=count_retry)
+            seconds = time.perf_counter() - started
+            response = report.model_dump_json()
+            RESPONSE_CHARS.inc(len(response))
+            cost = tier.cost(estimate_tokens(prompt), estimate_tokens(response))
+            MODEL_TIER_SECONDS.observe(seconds, tier=tier.name)
+            MODEL_COST.inc(cost, tier=tier.name)
+            stats = usage.setdefault(tier.name, {"calls": 0, "ms": 0.0, "cost_usd": 0.0})
+            stats["calls"] += 1
+            stats["ms"] += seconds * 1000
+            stats["cost_usd"] += cost
+            return report
 
-    def email_notification_node(state: AgentState):
+        static_issues = state.get("static_issues") or []
+
+        async def review_chunk(chunk, numbered: str):
+            nonlocal escalations
+            hints = format_hints(static_issues, chunk.start_line, chunk.end_line,
+                                 state.get("static_notes") or ())
+            if len(chunks) == 1 and not state.get("hunks"):
+                prompt = REVIEW_PROMPT.format(code=numbered, hints=hints)
+            else:
+                prompt = CHUNK_PROMPT.format(start=chunk.start_line, end=chunk.end_line,
+                                             code=numbered, hints=hints)
+            escalate_to = decision.escalate_to
+            async with limit:
+                # An answer an escalation may still replace is not streamed
+                report = await call_tier(decision.tier, prompt, stream=bool(emit) and escalate_to is None)
+                if escalate_to is not None:
+                    reason = escalation_reason(report)
+                    if reason:
+                        escalations += 1
+                        MODEL_ROUTES.inc(tier=escalate_to.name, kind="escalated")
+                        print(f"⤴️  Lines {chunk.start_line}-{chunk.end_line}: {reason}, "
+                              f"escalating to {escalate_to.model}")
+                        report = await call_tier(escalate_to, prompt, stream=bool(emit))
+                    elif emit:
+                        for issue in report.issues:
+                            emit({"event": "issue", "issue": issue.model_dump()})
+                if emit:
+                    emit({"event": "progress", "stage": "chunk_done",
+                          "lines": [chunk.start_line, chunk.end_line]})
+            return report, chunk.size
+
+        # Fan out: latency is bounded by the slowest chunk, not the sum of all of them
+        parts = list(await asyncio.gather(*(
+            review_chunk(c, body) for c, body in zip(chunks, state["prompt_bodies"])
+        )))
+        if state.get("carried") is not None:
+            # Incremental re-review: prior findings for unchanged code, weighted by its size
+            parts.append((state["carried"], state.get("unchanged_lines") or 0))
+        if static_issues:
+            # Linter findings join the report without weighing on the model's score
+            parts.insert(0, (ReviewReport(issues=static_issues, quality_score=0.0), 0))
+        routing = {
+            "tier": decision.tier.name,
+            "reason": decision.reason,
+            "escalations": escalations,
+            "tiers": {name: {"calls": u["calls"], "ms": round(u["ms"], 1), "cost_usd": round(u["cost_usd"], 6)}
+                      for name, u in usage.items()},
+            "cost_usd": round(sum(u["cost_usd"] for u in usage.values()), 6),
+        }
+        return {"report": merge_reports(parts), "retries": retries, "routing": routing}
+
+    # Only builds and enqueues the message — delivery happens on the mail queue's thread.
+    @timed_stage("notifier")
+    def email_notification_node(state: AgentState, config: RunnableConfig):
         sender_email = os.getenv("EMAIL_ADDRESS")
         receiver_email = sender_email
         password = os.getenv("EMAIL_APP_PASSWORD")
@@ -46,6 +284,10 @@ def create_graph(api_key: str = None):
         if not sender_email or not password:
             print("⏭️  Email not configured, skipping notification.")
             return state
+        # Runs on an executor thread, so cancellation can't interrupt it — check instead
+        if _abandoned(state, config):
+            print("⏭️  Review cancelled or past its deadline, skipping notification.")
+            return state
 
         message = MIMEMultipart("alternative")
         message["Subject"] = f"🚀 AI Code Review: Score {report.quality_score}/10"
@@ -71,31 +313,120 @@ def create_graph(api_key: str = None):
         message.attach(MIMEText(html, "html"))
 
         try:
-            with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-                server.login(sender_email, password)
-                server.sendmail(sender_email, receiver_email, message.as_string())
-            print("✅ Email sent successfully!")
-        except Exception as e:
-            print(f"❌ Failed to send email: {e}")
+            mail_queue.enqueue(message, sender_email, [receiver_email])
+        except MailQueueFull as e:
+            print(f"❌ Failed to queue email: {e}")
 
         return state
 
     workflow = StateGraph(AgentState)
-    workflow.add_node("reviewer", code_reviewer_node)
-    workflow.add_node("notifier", email_notification_node)
-    workflow.set_entry_point("reviewer")
+    workflow.add_node("prepare", GraphNode("prepare", prepare_node))
+    workflow.add_node("reviewer", GraphNode("reviewer", code_reviewer_node))
+    workflow.add_node("notifier", GraphNode("notifier", email_notification_node))
+    workflow.set_entry_point("prepare")
+    workflow.add_conditional_edges("prepare", route_after_prepare,
+                                   {"reviewer": "reviewer", "notifier": "notifier"})
     workflow.add_edge("reviewer", "notifier")
     workflow.add_edge("notifier", END)
     return workflow.compile()
 
 
-# Lazy default graph — only created on first request, not at import time.
+class GraphPool:
+    """
+    Bounded LRU of compiled graphs, one per API key. Idle graphs expire; the
+    default graph is pinned. Keys are HMACs of the API key with a random salt
+    (one per server, shared by its worker processes so they agree on key ids)
+    — the raw key is never stored.
+    """
+
+    DEFAULT_KEY = "default"
+
+    def __init__(self, max_size: int, idle_seconds: float):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self.evictions = 0
+        self.expirations = 0
+        self._salt = bytes.fromhex(config.KEY_ID_SALT) if config.KEY_ID_SALT else secrets.token_bytes(16)
+        self._graphs: "OrderedDict[str, list]" = OrderedDict()  # key -> [last_used, graph]
+        self._lock = threading.Lock()
+
+    def key_for(self, api_key: str = None) -> str:
+        if not api_key:
+            return self.DEFAULT_KEY
+        return hmac.new(self._salt, api_key.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def cached(self, api_key: str = None):
+        """The compiled graph for this key if it is already built, else None."""
+        key = self.key_for(api_key)
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle(now)
+            entry = self._graphs.get(key)
+            if entry is None:
+                return None
+            entry[0] = now
+            self._graphs.move_to_end(key)
+            return entry[1]
+
+    def get(self, api_key: str = None):
+        """Return the compiled graph for this key, building it on first use (blocking)."""
+        graph = self.cached(api_key)
+        if graph is not None:
+            return graph
+
+        # Build outside the lock; if two requests race, the first insert wins.
+        key = self.key_for(api_key)
+        now = time.monotonic()
+        with STAGE_SECONDS.time(stage="graph_build"):
+            graph = create_graph(api_key)
+        with self._lock:
+            entry = self._graphs.setdefault(key, [now, graph])
+            self._graphs.move_to_end(key)
+            self._evict_overflow()
+            return entry[1]
+
+    def _expire_idle(self, now: float):
+        for key, (last_used, _) in list(self._graphs.items()):
+            if key != self.DEFAULT_KEY and now - last_used > self.idle_seconds:
+                del self._graphs[key]
+                rate_limiters.drop(key)
+                self.expirations += 1
+
+    def _evict_overflow(self):
+        custom = [k for k in self._graphs if k != self.DEFAULT_KEY]
+        for key in custom[:max(0, len(custom) - self.max_size)]:
+            del self._graphs[key]
+            rate_limiters.drop(key)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._graphs),
+            "max_size": self.max_size,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Lazy pool — graphs are only created on first request, not at import time.
 # This allows the server to start even without a valid API key (e.g. in CI).
-_default_graph = None
+graph_pool = GraphPool(config.GRAPH_POOL_SIZE, config.GRAPH_POOL_IDLE_SECONDS)
+
+
+def get_graph(api_key: str = None):
+    """Get the pooled graph for a custom API key, or the default graph."""
+    return graph_pool.get(api_key)
+
+
+async def aget_graph(api_key: str = None):
+    """get_graph() for the event loop: a graph not built yet is built on a worker thread."""
+    graph = graph_pool.cached(api_key)
+    if graph is None:
+        # First use imports LangChain / the model client and compiles — seconds of blocking work
+        graph = await asyncio.to_thread(graph_pool.get, api_key)
+    return graph
+
 
 def get_default_graph():
-    """Get or create the default graph (lazy singleton)."""
-    global _default_graph
-    if _default_graph is None:
-        _default_graph = create_graph()
-    return _default_graph
+    """Get or create the default graph (pinned member of the pool)."""
+    return graph_pool.get(None)
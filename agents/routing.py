@@ -0,0 +1,102 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Model Tier Routing
+ Picks flash-lite, flash or pro for a review from its
+ prompt size, language and the local complexity
+ estimate. With escalation, a chunk whose answer has a
+ High issue or low confidence is re-reviewed one tier
+ up. Per-tier prices turn token estimates into cost.
+═══════════════════════════════════════════════════════
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from core.config import config
+from schemas.state import ReviewReport
+
+TIER_ORDER = ("lite", "flash", "pro")
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    name: str  # "lite" | "flash" | "pro"
+    model: str
+    input_usd_per_mtok: float = 0.0
+    output_usd_per_mtok: float = 0.0
+
+    def cost(self, input_tokens: int, output_tokens: int) -> float:
+        """Estimated USD for one call."""
+        return (input_tokens * self.input_usd_per_mtok + output_tokens * self.output_usd_per_mtok) / 1e6
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    tier: ModelTier
+    reason: str
+    escalate_to: Optional[ModelTier] = None  # None = the first answer is final
+
+
+def _parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    """"lite=0.10/0.40,flash=..." → {"lite": (0.10, 0.40), ...}; malformed entries are ignored."""
+    prices = {}
+    for item in spec.split(","):
+        name, _, pair = item.partition("=")
+        try:
+            input_price, output_price = (float(p) for p in pair.split("/"))
+        except ValueError:
+            continue
+        prices[name.strip()] = (input_price, output_price)
+    return prices
+
+
+def load_tiers() -> Dict[str, ModelTier]:
+    prices = _parse_prices(config.MODEL_PRICES)
+    models = {"lite": config.MODEL_TIER_LITE, "flash": config.MODEL_TIER_FLASH, "pro": config.MODEL_TIER_PRO}
+    return {name: ModelTier(name, models[name], *prices.get(name, (0.0, 0.0))) for name in TIER_ORDER}
+
+
+TIERS = load_tiers()
+DEFAULT_TIER = TIERS["flash"]
+
+
+def _next_tier(tier: ModelTier) -> Optional[ModelTier]:
+    i = TIER_ORDER.index(tier.name)
+    return TIERS[TIER_ORDER[i + 1]] if i + 1 < len(TIER_ORDER) else None
+
+
+def route(tokens: int, language: Optional[str], complexity: int) -> RouteDecision:
+    """Tier for a review of `tokens` (compacted) prompt tokens whose worst function scores `complexity`."""
+    if not config.MODEL_ROUTING:
+        return RouteDecision(DEFAULT_TIER, "routing off")
+
+    if tokens >= config.ROUTE_PRO_MIN_TOKENS:
+        tier, reason = "pro", f"{tokens} tokens"
+    elif complexity >= config.ROUTE_PRO_MIN_COMPLEXITY:
+        tier, reason = "pro", f"complexity {complexity}"
+    elif ((language or "").lower() in config.ROUTE_LITE_LANGUAGES
+          and tokens <= config.ROUTE_LITE_MAX_TOKENS and complexity <= config.ROUTE_LITE_MAX_COMPLEXITY):
+        tier, reason = "lite", f"{tokens} tokens, complexity {complexity}, {language}"
+    else:
+        tier, reason = "flash", f"{tokens} tokens, complexity {complexity}, {language or 'unlabelled'}"
+    chosen = TIERS[tier]
+    return RouteDecision(chosen, reason, _next_tier(chosen) if config.ROUTE_ESCALATE else None)
+
+
+def escalation_reason(report: ReviewReport) -> Optional[str]:
+    """Why this answer should be re-reviewed one tier up, or None if it can stand."""
+    if any(issue.severity.strip().lower() == "high" for issue in report.issues):
+        return "high-severity issue"
+    if report.confidence is not None and report.confidence < config.ROUTE_MIN_CONFIDENCE:
+        return f"confidence {report.confidence:.2f}"
+    return None
+
+
+def cache_model_id() -> str:
+    """The model slot of review cache keys: with routing on, the whole tier setup decides the answer."""
+    if not config.MODEL_ROUTING:
+        return DEFAULT_TIER.model
+    thresholds = (config.ROUTE_LITE_MAX_TOKENS, config.ROUTE_LITE_MAX_COMPLEXITY,
+                  ",".join(sorted(config.ROUTE_LITE_LANGUAGES)), config.ROUTE_PRO_MIN_TOKENS,
+                  config.ROUTE_PRO_MIN_COMPLEXITY,
+                  config.ROUTE_MIN_CONFIDENCE if config.ROUTE_ESCALATE else "no-escalation")
+    return "routed:" + "/".join(TIERS[name].model for name in TIER_ORDER) + ":" + ":".join(map(str, thresholds))
@@ -0,0 +1,222 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Local Static Pre-Analysis
+ Cheap checks that run before the model: empty input,
+ Python syntax, unused imports, bare excepts, mutable
+ default arguments and complexity hotspots. Conclusive
+ results skip the model; the rest become prompt hints.
+ A parse failure is only conclusive for code the caller
+ labelled Python; otherwise it is a note to the model.
+ The complexity estimate also feeds model routing.
+═══════════════════════════════════════════════════════
+"""
+
+import ast
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+from schemas.state import ReviewIssue, ReviewReport
+
+EMPTY_SCORE = 0.0
+SYNTAX_ERROR_SCORE = 1.0
+
+_BRANCHES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler,
+             ast.With, ast.AsyncWith, ast.Assert)
+_MUTABLE_LITERALS = (ast.List, ast.Dict, ast.Set, ast.ListComp, ast.DictComp, ast.SetComp)
+_MUTABLE_CALLS = {"list", "dict", "set", "defaultdict", "OrderedDict", "deque"}
+_DECISION_POINTS = re.compile(r"\b(?:if|elif|for|foreach|while|case|catch|except|when)\b|&&|\|\|")
+_COMPLEXITY_WINDOW_LINES = 50
+# Newest grammar this interpreter can parse; code written for a later Python may still fail
+_LATEST_GRAMMAR = sys.version_info[:2]
+# Syntax added after 3.11 (PEP 695 type aliases and generics); a failure on such a line is not a verdict
+_NEWER_SYNTAX = re.compile(r"^\s*(?:type\s+\w+\s*(?:\[.*\])?\s*=|(?:async\s+)?def\s+\w+\s*\[|class\s+\w+\s*\[)")
+
+
+@dataclass
+class StaticAnalysis:
+    issues: List[ReviewIssue] = field(default_factory=list)
+    report: Optional[ReviewReport] = None  # set when the model isn't needed at all
+    complexity: int = 1  # worst function's cyclomatic complexity (estimated outside Python)
+    notes: List[str] = field(default_factory=list)  # prompt-only context, never reported as issues
+
+    @property
+    def conclusive(self) -> bool:
+        return self.report is not None
+
+
+def _issue(severity: str, line: Optional[int], description: str, suggestion: str) -> ReviewIssue:
+    return ReviewIssue(severity=severity, description=description, suggestion=suggestion, line=line)
+
+
+def _is_python(language: Optional[str]) -> bool:
+    return (language or "").lower() in ("python", "py")
+
+
+def _unused_imports(tree: ast.Module) -> List[ReviewIssue]:
+    imported = {}  # bound name -> (line, shown name)
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                name = alias.asname or alias.name.split(".")[0]
+                imported[name] = (node.lineno, alias.name)
+        elif isinstance(node, ast.ImportFrom) and node.module != "__future__":
+            for alias in node.names:
+                if alias.name != "*":
+                    imported[alias.asname or alias.name] = (node.lineno, alias.name)
+    if not imported:
+        return []
+
+    used = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            used.add(node.id)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            used.add(node.value)  # __all__ entries and string annotations
+    return [
+        _issue("Low", line, f"Unused import '{shown}'.", f"Remove the import of '{shown}'.")
+        for name, (line, shown) in imported.items() if name not in used
+    ]
+
+
+def _bare_excepts(tree: ast.Module) -> List[ReviewIssue]:
+    return [
+        _issue("Medium", node.lineno, "Bare 'except:' also catches KeyboardInterrupt and SystemExit.",
+               "Catch the specific exceptions you expect, or at least 'except Exception:'.")
+        for node in ast.walk(tree) if isinstance(node, ast.ExceptHandler) and node.type is None
+    ]
+
+
+def _is_mutable(node: ast.AST) -> bool:
+    if isinstance(node, _MUTABLE_LITERALS):
+        return True
+    if isinstance(node, ast.Call):
+        func = node.func
+        name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+        return name in _MUTABLE_CALLS
+    return False
+
+
+def _mutable_defaults(tree: ast.Module) -> List[ReviewIssue]:
+    issues = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            continue
+        args = node.args
+        positional = args.posonlyargs + args.args
+        pairs = list(zip(positional[len(positional) - len(args.defaults):], args.defaults))
+        pairs += [(arg, d) for arg, d in zip(args.kwonlyargs, args.kw_defaults) if d is not None]
+        name = getattr(node, "name", "lambda")
+        for arg, default in pairs:
+            if _is_mutable(default):
+                issues.append(_issue(
+                    "Medium", default.lineno,
+                    f"Mutable default for '{arg.arg}' in '{name}' is shared between calls.",
+                    f"Default '{arg.arg}' to None and create the object inside the function."))
+    return issues
+
+
+def _complexity(func: ast.AST) -> int:
+    """McCabe-style cyclomatic complexity of one function body (nested functions excluded)."""
+    score = 1
+    stack = list(ast.iter_child_nodes(func))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(node, _BRANCHES):
+            score += 1
+        elif isinstance(node, ast.BoolOp):
+            score += len(node.values) - 1
+        elif isinstance(node, ast.comprehension):
+            score += 1 + len(node.ifs)
+        stack.extend(ast.iter_child_nodes(node))
+    return score
+
+
+def _function_complexities(tree: ast.Module) -> List[Tuple[ast.AST, int]]:
+    return [(node, _complexity(node)) for node in ast.walk(tree)
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+
+
+def _complexity_hotspots(scores: List[Tuple[ast.AST, int]], threshold: int) -> List[ReviewIssue]:
+    issues = []
+    for node, score in scores:
+        if score > threshold:
+            issues.append(_issue(
+                "High" if score > 2 * threshold else "Medium", node.lineno,
+                f"Function '{node.name}' has cyclomatic complexity {score} (limit {threshold}).",
+                "Split it into smaller functions or flatten nested branches."))
+    return issues
+
+
+def estimate_complexity(code: str) -> int:
+    """
+    Language-agnostic stand-in for the worst function's cyclomatic complexity:
+    1 + the decision points (branch keywords, && and ||) in the densest window of lines.
+    """
+    counts = [len(_DECISION_POINTS.findall(line)) for line in code.splitlines()]
+    window = sum(counts[:_COMPLEXITY_WINDOW_LINES])
+    densest = window
+    for i in range(_COMPLEXITY_WINDOW_LINES, len(counts)):
+        window += counts[i] - counts[i - _COMPLEXITY_WINDOW_LINES]
+        densest = max(densest, window)
+    return 1 + densest
+
+
+def _newer_syntax(code: str, lineno: Optional[int]) -> bool:
+    """Whether the line a parse failed on may just use syntax newer than this interpreter."""
+    if _LATEST_GRAMMAR >= (3, 12) or not lineno:
+        return False
+    lines = code.splitlines()
+    return lineno <= len(lines) and bool(_NEWER_SYNTAX.match(lines[lineno - 1]))
+
+
+def analyze(code: str, language: Optional[str] = None, complexity_threshold: int = 10) -> StaticAnalysis:
+    """
+    Run every local check. Only Python (or unlabelled code that parses as Python) is inspected.
+    A syntax error is conclusive only when `language` says Python explicitly and the failing
+    line isn't newer syntax; otherwise it reaches the model as a note.
+    """
+    if not code.strip():
+        issue = _issue("High", None, "The submission is empty.", "Paste the code you want reviewed.")
+        return StaticAnalysis([issue], ReviewReport(issues=[issue], quality_score=EMPTY_SCORE))
+    if language and not _is_python(language):
+        return StaticAnalysis(complexity=estimate_complexity(code))
+
+    try:
+        tree = ast.parse(code, feature_version=_LATEST_GRAMMAR)
+    except SyntaxError as e:
+        if not _is_python(language):
+            return StaticAnalysis(complexity=estimate_complexity(code))  # probably just not Python
+        if _newer_syntax(code, e.lineno):
+            note = (f"Line {e.lineno} does not parse as Python {'.'.join(map(str, _LATEST_GRAMMAR))} "
+                    f"({e.msg}); it may use newer syntax. Only report it if it is a real syntax error.")
+            return StaticAnalysis(complexity=estimate_complexity(code), notes=[note])
+        issue = _issue("High", e.lineno, f"Syntax error: {e.msg}.",
+                       "Fix the syntax error so the code can run; nothing else can be checked until then.")
+        return StaticAnalysis([issue], ReviewReport(issues=[issue], quality_score=SYNTAX_ERROR_SCORE))
+    except (ValueError, RecursionError):
+        return StaticAnalysis(complexity=estimate_complexity(code))
+
+    scores = _function_complexities(tree)
+    issues = (_unused_imports(tree) + _bare_excepts(tree) + _mutable_defaults(tree)
+              + _complexity_hotspots(scores, complexity_threshold))
+    issues.sort(key=lambda i: i.line or 0)
+    return StaticAnalysis(issues, complexity=max((score for _, score in scores), default=1))
+
+
+def format_hints(issues: List[ReviewIssue], start: int = 1, end: Optional[int] = None,
+                 notes: Sequence[str] = ()) -> str:
+    """Prompt block listing the local findings that fall inside lines start..end, then any notes."""
+    lines = [
+        f"- line {i.line}: {i.description}" if i.line else f"- {i.description}"
+        for i in issues if i.line is None or (start <= i.line and (end is None or i.line <= end))
+    ]
+    block = ""
+    if lines:
+        block += ("\n\nA local linter already reported these (they will be included in the report — "
+                  "do not repeat them, but account for them in the score):\n" + "\n".join(lines))
+    if notes:
+        block += "\n\nNotes from local checks:\n" + "\n".join(f"- {note}" for note in notes)
+    return block
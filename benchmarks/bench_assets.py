@@ -0,0 +1,193 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Frontend Delivery Benchmark
+ Loads /app and everything it links (CSS, JS imports,
+ favicon) like a browser would, against the previous
+ setup (FileResponse + StaticFiles, uncompressed) and
+ the asset pipeline. Reports requests and wire bytes
+ for a first and a repeat visit, page loads per second,
+ and how much the JSON endpoints shrink once the
+ client sends Accept-Encoding.
+
+ Repeat visits model a browser cache: immutable entries
+ are reused without a request, everything else is
+ revalidated with If-None-Match / If-Modified-Since.
+
+ Usage:  python benchmarks/bench_assets.py [--loads 200] [--json]
+═══════════════════════════════════════════════════════
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import posixpath
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ROOT = Path(__file__).resolve().parent.parent
+FRONTEND = ROOT / "frontend"
+ACCEPT = "gzip, deflate, br"
+
+_LINKS = re.compile(r'\b(?:href|src)="([^"#?:]+\.(?:css|js|png|ico|svg))"')
+_IMPORTS = re.compile(r"""\b(?:from\s*|import\s*\(?\s*)['"](\.{1,2}/[^'"]+)['"]""")
+
+
+def baseline_app():
+    """The setup before the asset pipeline, rebuilt from the same frontend directory."""
+    from fastapi import FastAPI
+    from fastapi.responses import FileResponse
+    from fastapi.staticfiles import StaticFiles
+
+    app = FastAPI()
+
+    @app.get("/app")
+    async def serve_frontend():
+        return FileResponse(FRONTEND / "index.html")
+
+    app.mount("/css", StaticFiles(directory=FRONTEND / "css"), name="css")
+    app.mount("/js", StaticFiles(directory=FRONTEND / "js"), name="js")
+    return app
+
+
+class BrowserCache:
+    """Just enough HTTP caching to tell an immutable asset from one that must be revalidated."""
+
+    def __init__(self):
+        self.entries = {}  # url -> (response headers, body text)
+
+    async def get(self, client, url: str, stats: dict):
+        cached = self.entries.get(url)
+        if cached is not None and "immutable" in cached[0].get("cache-control", ""):
+            return cached[1]  # no request at all
+        headers = {"Accept-Encoding": ACCEPT}
+        if cached is not None:
+            if "etag" in cached[0]:
+                headers["If-None-Match"] = cached[0]["etag"]
+            if "last-modified" in cached[0]:
+                headers["If-Modified-Since"] = cached[0]["last-modified"]
+        response = await client.get(url, headers=headers)
+        stats["requests"] += 1
+        stats["bytes"] += response.num_bytes_downloaded + _header_bytes(response)
+        stats["statuses"][response.status_code] = stats["statuses"].get(response.status_code, 0) + 1
+        if response.status_code == 304:
+            return cached[1]
+        text = response.text if response.status_code == 200 else ""
+        if response.status_code == 200:
+            self.entries[url] = (dict(response.headers), text)
+        return text
+
+
+def _header_bytes(response) -> int:
+    return sum(len(k) + len(v) + 4 for k, v in response.headers.raw) + 17  # + status line
+
+
+async def load_page(client, cache: BrowserCache) -> dict:
+    """/app, then its links, then JS imports transitively — each URL once."""
+    stats = {"requests": 0, "bytes": 0, "statuses": {}}
+    html = await cache.get(client, "/app", stats)
+    pending = ["/" + link for link in _LINKS.findall(html)]
+    seen = set()
+    while pending:
+        url = pending.pop()
+        if url in seen:
+            continue
+        seen.add(url)
+        body = await cache.get(client, url, stats)
+        if url.endswith(".js"):
+            pending += [posixpath.normpath(posixpath.join(posixpath.dirname(url), ref))
+                        for ref in _IMPORTS.findall(body)]
+    return stats
+
+
+async def measure(app, loads: int) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        cache = BrowserCache()
+        first = await load_page(client, cache)
+        repeat = await load_page(client, cache)
+
+        results = {}
+        for name, fresh_cache in (("first_visit_loads_per_s", True), ("repeat_visit_loads_per_s", False)):
+            started = time.perf_counter()
+            for _ in range(loads):
+                await load_page(client, BrowserCache() if fresh_cache else cache)
+            results[name] = round(loads / (time.perf_counter() - started), 1)
+    return {"first_visit": first, "repeat_visit": repeat, **results}
+
+
+async def json_bytes(app) -> dict:
+    """Wire bytes of JSON responses sent as identity vs with the browser's Accept-Encoding."""
+    import httpx
+
+    code = "".join(f"def handler_{i}(items):\n    return [x for x in items if x > {i}]\n\n" for i in range(400))
+    transport = httpx.ASGITransport(app=app)
+    sizes = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for label, accept in (("identity", "identity"), ("negotiated", ACCEPT)):
+            response = await client.post("/review", json={"code": code + "\n" * len(sizes), "language": "python"},
+                                         headers={"Accept-Encoding": accept})  # distinct code: no cache hit
+            response.raise_for_status()
+            sizes.setdefault("POST /review", {})[label] = response.num_bytes_downloaded
+        for path in ("/audit/stats", "/openapi.json"):
+            for label, accept in (("identity", "identity"), ("negotiated", ACCEPT)):
+                response = await client.get(path, headers={"Accept-Encoding": accept})
+                response.raise_for_status()
+                sizes.setdefault(f"GET {path}", {})[label] = response.num_bytes_downloaded
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loads", type=int, default=200, help="page loads timed per setup and visit type")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="redglyph-assets-") as tmp:
+        # The app writes audit files and needs a model; keep both local and offline
+        os.environ.setdefault("LLM_BACKEND", "fake")
+        os.environ.setdefault("FAKE_LLM_LATENCY_MS", "1")
+        os.environ["AUDIT_LOG"] = str(Path(tmp) / "audit.log")
+        os.environ["AUDIT_DB_PATH"] = str(Path(tmp) / "audit.db")
+        os.environ.setdefault("RATE_LIMIT_RPS", "1000")
+        os.environ.setdefault("RATE_LIMIT_BURST", "1000")
+        with contextlib.redirect_stdout(io.StringIO()):
+            import core.main as server
+            server.assets.build()
+
+            async def run():
+                return {
+                    "baseline": await measure(baseline_app(), args.loads),
+                    "pipeline": await measure(server.app, args.loads),
+                    "json_bytes": await json_bytes(server.app),
+                }
+            results = asyncio.run(run())
+            server.audit_writer.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'setup':<9} {'visit':<7} {'requests':>8} {'wire bytes':>11} {'statuses':<22} {'loads/s':>8}")
+    for setup in ("baseline", "pipeline"):
+        r = results[setup]
+        for visit in ("first", "repeat"):
+            v = r[f"{visit}_visit"]
+            statuses = ",".join(f"{code}x{n}" for code, n in sorted(v["statuses"].items()))
+            print(f"{setup:<9} {visit:<7} {v['requests']:>8} {v['bytes']:>11} {statuses:<22} "
+                  f"{r[f'{visit}_visit_loads_per_s']:>8}")
+    print(f"\n{'JSON response':<18} {'identity':>9} {'negotiated':>11}")
+    for name, sizes in results["json_bytes"].items():
+        print(f"{name:<18} {sizes['identity']:>9} {sizes['negotiated']:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Session Report Benchmark
+ Builds the full report email (HTML + gzipped CSV/JSON
+ attachments) for growing session sizes and prints
+ render time and peak memory per review. Both should
+ stay roughly flat per review, i.e. grow linearly.
+
+ Usage:  python benchmarks/bench_report.py [--sizes 100,1000,10000] [--json]
+═══════════════════════════════════════════════════════
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.email_report import ReviewPayload, IssuePayload, build_report_message  # noqa: E402
+
+SEVERITIES = ("High", "Medium", "Low")
+
+
+def make_session(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        ReviewPayload(
+            quality_score=round(rng.uniform(0, 10), 1),
+            issues=[
+                IssuePayload(
+                    severity=rng.choice(SEVERITIES),
+                    description=f"Issue {j} in review {i}: " + "x" * rng.randint(20, 120),
+                    suggestion="Refactor this block " + "y" * rng.randint(10, 80),
+                    line=rng.randint(1, 500),
+                )
+                for j in range(rng.randint(0, 6))
+            ],
+        )
+        for i in range(n)
+    ]
+
+
+def measure(n: int) -> dict:
+    reviews = make_session(n)
+    tracemalloc.start()
+    start = time.perf_counter()
+    message = build_report_message(reviews, "bench@example.com", "to@example.com")
+    wire = message.as_string()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "reviews": n,
+        "seconds": round(elapsed, 4),
+        "us_per_review": round(elapsed / n * 1e6, 1),
+        "peak_kib": round(peak / 1024, 1),
+        "peak_bytes_per_review": round(peak / n, 1),
+        "email_kib": round(len(wire) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,5000,20000")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [measure(int(n)) for n in args.sizes.split(",")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'reviews':>8} {'seconds':>9} {'µs/review':>10} {'peak KiB':>10} {'B/review':>9} {'email KiB':>10}")
+    for r in results:
+        print(f"{r['reviews']:>8} {r['seconds']:>9} {r['us_per_review']:>10} {r['peak_kib']:>10} "
+              f"{r['peak_bytes_per_review']:>9} {r['email_kib']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Cold Start Benchmark
+ 1. `python -X importtime -c "import core.main"`: total
+    import time and the slowest modules.
+ 2. Starts the server and times the first byte from
+    /health and the first 200 from /health/ready (the
+    background prewarm finished).
+
+ Usage:  python benchmarks/bench_startup.py [--runs 3] [--fake] [--json]
+         --fake uses LLM_BACKEND=fake, so readiness needs no API key.
+═══════════════════════════════════════════════════════
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def child_env(fake: bool) -> dict:
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "PYTHONWARNINGS": "ignore"}
+    if fake:
+        env["LLM_BACKEND"] = "fake"
+    return env
+
+
+def import_times(env: dict, top: int) -> dict:
+    """Total `import core.main` time and the modules with the largest self time (µs)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import core.main"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    total = next(c for name, _, c in modules if name == "core.main")
+    slowest = sorted(modules, key=lambda m: m[1], reverse=True)[:top]
+    return {"total_ms": round(total / 1000, 1),
+            "slowest_self_ms": {name: round(s / 1000, 1) for name, s, _ in slowest}}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0  # not listening yet
+
+
+def serve_times(env: dict, timeout: float) -> dict:
+    """Seconds from process start to the first /health byte, and to /health/ready = 200."""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory(prefix="redglyph-start-") as tmp:  # audit files land here
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, str(ROOT / "core" / "main.py")], cwd=tmp,
+                                  env={**env, "PORT": str(port), "HOST": "127.0.0.1"},
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        first_byte = ready = None
+        try:
+            while time.perf_counter() - started < timeout:
+                if first_byte is None:
+                    if _status(base + "/health"):
+                        first_byte = time.perf_counter() - started
+                elif _status(base + "/health/ready") == 200:
+                    ready = time.perf_counter() - started
+                    break
+                time.sleep(0.01)
+        finally:
+            server.terminate()
+            server.wait(10)
+    return {"first_byte_s": round(first_byte, 3) if first_byte else None,
+            "ready_s": round(ready, 3) if ready else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument("--fake", action="store_true", help="run with LLM_BACKEND=fake")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    env = child_env(args.fake)
+    imports = [import_times(env, args.top) for _ in range(args.runs)]
+    serves = [serve_times(env, args.timeout) for _ in range(args.runs)]
+
+    def median(values):
+        values = [v for v in values if v is not None]
+        return round(statistics.median(values), 3) if values else None
+
+    results = {
+        "runs": args.runs,
+        "import_core_main_ms": median([r["total_ms"] for r in imports]),
+        "health_first_byte_s": median([r["first_byte_s"] for r in serves]),
+        "ready_s": median([r["ready_s"] for r in serves]),
+        "slowest_imports_self_ms": imports[-1]["slowest_self_ms"],
+        "samples": {"imports_ms": [r["total_ms"] for r in imports], "serve": serves},
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"import core.main   {results['import_core_main_ms']!s:>9} ms   (median of {args.runs})")
+    print(f"/health first byte {results['health_first_byte_s']!s:>9} s")
+    print(f"/health/ready 200  {results['ready_s']!s:>9} s")
+    print("\nslowest imports (self time):")
+    for name, ms in results["slowest_imports_self_ms"].items():
+        print(f"  {ms:>8} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Fake Chat Model (offline benchmarks)
+ Stands in for Gemini behind `with_structured_output`:
+ returns a ReviewReport after a lognormal delay, and
+ fails with errors or 429s at configured rates. Every
+ draw is seeded by the prompt and attempt number, so a
+ run is reproducible regardless of scheduling order.
+ Each model tier gets its own fake: lite is faster and
+ less sure of itself, pro slower and more confident.
+
+ Enable with LLM_BACKEND=fake; tune with FAKE_LLM_*
+ (FAKE_LLM_LATENCY_MS_<TIER> overrides one tier's latency).
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import random
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict
+from schemas.state import ReviewIssue, ReviewReport
+
+_LINE_NUMBER = re.compile(r"^(\d+)\| ", re.MULTILINE)
+_SEVERITIES = ("High", "Medium", "Low")
+_MAX_TRACKED_PROMPTS = 100_000
+# Tier → (latency multiplier, lowest confidence the fake reports)
+_TIER_PROFILES = {"lite": (0.4, 0.4), "flash": (1.0, 0.6), "pro": (2.5, 0.8)}
+
+# Shared by every fake model in the process (one is built per pooled graph)
+counters: Counter = Counter()
+
+
+class FakeRateLimitError(Exception):
+    """Injected quota error — shaped so core.rate_limit treats it as a 429."""
+    code = 429
+
+
+class FakeModelError(Exception):
+    """Injected non-retryable model failure."""
+
+
+@dataclass
+class FakeModelProfile:
+    latency_ms: float = 800.0    # median latency of a successful call
+    latency_sigma: float = 0.5   # lognormal spread; 0 = constant latency
+    error_rate: float = 0.0      # fraction of calls that fail outright
+    rate_limit_rate: float = 0.0  # fraction of calls rejected with a 429
+    seed: int = 0
+    min_confidence: float = 0.6  # reported confidence is uniform in [min_confidence, 1]
+
+    @classmethod
+    def from_env(cls, tier: str = "flash") -> "FakeModelProfile":
+        speed, min_confidence = _TIER_PROFILES.get(tier, (1.0, 0.6))
+        base_ms = float(os.getenv("FAKE_LLM_LATENCY_MS", "800")) * speed
+        return cls(
+            latency_ms=float(os.getenv(f"FAKE_LLM_LATENCY_MS_{tier.upper()}", base_ms)),
+            latency_sigma=float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            rate_limit_rate=float(os.getenv("FAKE_LLM_429_RATE", "0")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+            min_confidence=min_confidence,
+        )
+
+
+class FakeChatModel:
+    """Just enough of a LangChain chat model for the reviewer graph."""
+
+    def __init__(self, profile: FakeModelProfile = None, tier: str = "flash"):
+        self.profile = profile or FakeModelProfile()
+        self.tier = tier
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, tier: str = "flash") -> "FakeChatModel":
+        return cls(FakeModelProfile.from_env(tier), tier)
+
+    def with_structured_output(self, schema, **kwargs) -> "_StructuredFake":
+        return _StructuredFake(self)
+
+    def _draw(self, prompt: str) -> random.Random:
+        """Seeded per (prompt, attempt): a retried prompt gets a fresh draw."""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            if len(self._attempts) >= _MAX_TRACKED_PROMPTS:
+                self._attempts.clear()
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        return random.Random(f"{self.profile.seed}:{self.tier}:{digest}:{attempt}")
+
+    def _latency(self, rng: random.Random) -> float:
+        p = self.profile
+        return p.latency_ms / 1000 * math.exp(rng.gauss(0, p.latency_sigma) if p.latency_sigma else 0)
+
+    def _outcome(self, prompt: str):
+        """(rng, delay, exception or None) for the next call with this prompt."""
+        rng = self._draw(prompt)
+        counters["calls"] += 1
+        counters[f"calls_{self.tier}"] += 1
+        roll = rng.random()
+        if roll < self.profile.rate_limit_rate:
+            counters["rate_limited"] += 1
+            # Quota errors come back fast
+            return rng, self._latency(rng) / 10, FakeRateLimitError("429 RESOURCE_EXHAUSTED (fake)")
+        if roll < self.profile.rate_limit_rate + self.profile.error_rate:
+            counters["errors"] += 1
+            return rng, self._latency(rng), FakeModelError("500 Internal error (fake)")
+        return rng, self._latency(rng), None
+
+    def _report(self, prompt: str, rng: random.Random) -> ReviewReport:
+        lines = [int(n) for n in _LINE_NUMBER.findall(prompt)] or [None]
+        issues = [
+            ReviewIssue(
+                severity=rng.choice(_SEVERITIES),
+                description=f"Fake finding #{i + 1}: possible off-by-one in this loop.",
+                suggestion="Check the loop bounds against the collection length.",
+                line=rng.choice(lines),
+            )
+            for i in range(rng.randint(0, 4))
+        ]
+        return ReviewReport(issues=issues, quality_score=round(rng.uniform(4.0, 9.5), 1),
+                            confidence=round(rng.uniform(self.profile.min_confidence, 1.0), 2))
+
+
+class _StructuredFake:
+    def __init__(self, model: FakeChatModel):
+        self.model = model
+
+    async def ainvoke(self, prompt: str, *args, **kwargs) -> ReviewReport:
+        rng, delay, error = self.model._outcome(str(prompt))
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return self.model._report(str(prompt), rng)
+
+    async def astream(self, prompt: str, *args, **kwargs) -> AsyncIterator:
+        """Partial dicts with a growing issue list, then the final report."""
+        rng, delay, error = self.model._outcome(str(prompt))
+        if error is not None:
+            await asyncio.sleep(delay)
+            raise error
+        report = self.model._report(str(prompt), rng)
+        issues = [issue.model_dump() for issue in report.issues]
+        steps = len(issues) + 1
+        for i in range(1, len(issues) + 1):
+            await asyncio.sleep(delay / steps)
+            yield {"issues": issues[:i]}
+        await asyncio.sleep(delay / steps)
+        yield report
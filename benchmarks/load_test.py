@@ -0,0 +1,425 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Offline Load Test
+ Drives /review, /send-report and /webhook in-process
+ against the fake model (benchmarks/fake_llm.py) and a
+ local SMTP sink, so no Gemini quota or mailbox is used.
+ Reports throughput, latency percentiles, event-loop lag
+ and memory per scenario, as JSON for commit-to-commit
+ comparison (--out results.json, --compare baseline.json).
+
+ Usage:  python benchmarks/load_test.py [--scenarios review,report,webhook]
+             [--requests 200] [--concurrency 16] [--latency-ms 300]
+             [--error-rate 0.01] [--429-rate 0.05] [--routing] [--out results.json]
+
+ Any app setting (RATE_LIMIT_RPS, MAX_CONCURRENT_REVIEWS, ...)
+ can still be overridden from the environment.
+
+ --url http://host:port drives an already running server
+ instead (review scenario only), e.g. one started with
+ LLM_BACKEND=fake WORKERS=4 to measure multi-process scaling
+ (loop lag and memory are then the load generator's own).
+═══════════════════════════════════════════════════════
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import io
+import json
+import os
+import platform
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.smtp_sink import SMTPSink  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+SCENARIOS = ("review", "report", "webhook")
+
+
+# ─── Inputs ───
+def make_code(i: int, lines: int) -> str:
+    """A unique, valid Python file of roughly `lines` lines (so every request misses the cache)."""
+    out = [f'"""Generated module {i}."""', "import os", ""]
+    fn = 0
+    while len(out) < lines:
+        out += [
+            f"def handler_{i}_{fn}(items, limit={fn % 7 + 1}):",
+            "    total = 0",
+            "    for index, item in enumerate(items):",
+            "        if index > limit:",
+            "            break",
+            f"        total += len(str(item)) * {fn + 1}",
+            "    return os.path.join(str(total), 'out')",
+            "",
+        ]
+        fn += 1
+    return "\n".join(out[:lines]) + "\n"
+
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"p50": None, "p90": None, "p95": None, "p99": None, "max": None, "mean": None}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 2)
+
+    return {"p50": rank(50), "p90": rank(90), "p95": rank(95), "p99": rank(99),
+            "max": round(ordered[-1], 2), "mean": round(sum(ordered) / len(ordered), 2)}
+
+
+def rss_kib() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_kib() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ─── Environment (must be set before the app is imported) ───
+def configure_env(args, workdir: Path, sink: SMTPSink, repo: Path, secret: str):
+    settings = {
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "FAKE_LLM_LATENCY_SIGMA": str(args.latency_sigma),
+        "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+        "FAKE_LLM_429_RATE": str(args.rate_limit_rate),
+        "FAKE_LLM_SEED": str(args.seed),
+        "MODEL_ROUTING": "true" if args.routing else "false",
+        "SMTP_HOST": sink.host,
+        "SMTP_PORT": str(sink.port),
+        "SMTP_USE_SSL": "false",
+        "EMAIL_ADDRESS": "bench@example.com",
+        "EMAIL_APP_PASSWORD": "unused",
+        "AUDIT_LOG": str(workdir / "audit.log"),
+        "AUDIT_DB_PATH": str(workdir / "audit.db"),
+        "WEBHOOK_REPO_PATH": str(repo),
+        "WEBHOOK_INDEX_DB_PATH": str(workdir / "webhook_index.db"),
+        "GITHUB_WEBHOOK_SECRET": secret,
+    }
+    os.environ.update(settings)
+    # The real quota is not the thing under test; the environment may still override these
+    os.environ.setdefault("RATE_LIMIT_RPS", "1000")
+    os.environ.setdefault("RATE_LIMIT_BURST", "1000")
+    os.environ.setdefault("RATE_LIMIT_MAX_RPS", "1000")
+
+
+def make_repo(path: Path, pushes: int, files: int, lines: int) -> List[str]:
+    """A local repo with one base commit plus `pushes` commits touching `files` files each."""
+    def git(*cmd):
+        subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *cmd],
+                       cwd=path, check=True, capture_output=True)
+
+    path.mkdir(parents=True)
+    git("init", "-q")
+    commits = []
+    for push in range(pushes + 1):
+        for f in range(files):
+            (path / f"module_{f}.py").write_text(make_code(push * 1000 + f, lines))
+        git("add", "-A")
+        git("commit", "-q", "-m", f"push {push}")
+        commits.append(subprocess.run(["git", "rev-parse", "HEAD"], cwd=path, capture_output=True,
+                                      text=True, check=True).stdout.strip())
+    return commits
+
+
+# ─── Load driver ───
+class LagSampler:
+    """How late the event loop wakes a sleeper — a direct measure of blocking work on the loop."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append((loop.time() - start - self.interval) * 1000)
+
+    def __enter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+async def drive(requests: int, concurrency: int,
+                one: Callable[[int], Awaitable[int]]) -> dict:
+    """Run `one(i)` for i in range(requests) with at most `concurrency` in flight."""
+    latencies, statuses = [], {}
+    next_index = iter(range(requests))
+
+    async def worker():
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                status = await one(i)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    rss_before = rss_kib()
+    with LagSampler() as lag:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ok = sum(n for s, n in statuses.items() if s.startswith("2"))
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": ok,
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+        "latency_ms": percentiles(latencies),
+        "loop_lag_ms": percentiles(lag.samples),
+        "memory_kib": {"rss_before": rss_before, "rss_after": rss_kib(), "peak_rss": peak_rss_kib()},
+    }
+
+
+# ─── Scenarios ───
+async def scenario_review(client, args, ctx) -> dict:
+    async def one(i: int) -> int:
+        r = await client.post("/review", json={"code": make_code(i, args.lines), "language": "python"})
+        return r.status_code
+
+    return await drive(args.requests, args.concurrency, one)
+
+
+async def scenario_report(client, args, ctx) -> dict:
+    from core.session_store import session_store
+    from benchmarks.fake_llm import FakeChatModel
+    import random
+
+    # Sessions are filled directly: this scenario measures rendering and delivery, not reviews
+    rng = random.Random(args.seed)
+    model = FakeChatModel()
+    session_ids = []
+    for s in range(max(1, args.concurrency)):
+        session_id = session_store.start().id
+        for r in range(args.report_reviews):
+            report = model._report(f"{s}:{r}\n1| x\n{rng.randint(2, 400)}| y", rng)
+            session_store.append(session_id, report)
+        session_ids.append(session_id)
+
+    sink, delivered_before = ctx["sink"], ctx["sink"].messages
+
+    async def one(i: int) -> int:
+        r = await client.post("/send-report", json={"email": "load@example.com",
+                                                    "session_id": session_ids[i % len(session_ids)]})
+        return r.status_code
+
+    result = await drive(args.requests, args.concurrency, one)
+    queued = result["statuses"].get("200", 0)
+    started = time.perf_counter()
+    await asyncio.to_thread(sink.wait_for, delivered_before + queued, 120)
+    result["delivery"] = {
+        "queued": queued,
+        "delivered": sink.messages - delivered_before,
+        "drain_seconds": round(time.perf_counter() - started, 3),
+        "reviews_per_report": args.report_reviews,
+    }
+    return result
+
+
+async def scenario_webhook(client, args, ctx) -> dict:
+    commits, secret = ctx["commits"], ctx["secret"]
+    accept_ms: List[float] = []
+    files = {"reviewed": 0, "skipped": 0, "ignored": 0, "failed": 0}
+
+    async def one(i: int) -> int:
+        body = json.dumps({
+            "ref": "refs/heads/main", "before": commits[i], "after": commits[i + 1],
+            "repository": {"full_name": "bench/redglyph"},
+        }).encode()
+        signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        start = time.perf_counter()
+        r = await client.post("/webhook", content=body, headers={
+            "X-GitHub-Event": "push", "X-Hub-Signature-256": signature,
+            "Content-Type": "application/json"})
+        accept_ms.append((time.perf_counter() - start) * 1000)
+        if r.status_code != 202:
+            return r.status_code
+        # Latency of a push is until its review job finishes
+        status_url = r.json()["status_url"]
+        while True:
+            await asyncio.sleep(0.02)
+            job = (await client.get(status_url)).json()
+            if job["status"] in ("done", "failed"):
+                for key in files:
+                    files[key] += job[key]
+                return 200 if job["status"] == "done" else 500
+
+    result = await drive(args.webhook_pushes, args.concurrency, one)
+    result["accept_latency_ms"] = percentiles(accept_ms)
+    result["files"] = {**files, "per_push": args.webhook_files}
+    return result
+
+
+RUNNERS = {"review": scenario_review, "report": scenario_report, "webhook": scenario_webhook}
+
+
+async def run_remote(args) -> dict:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=None,
+                                 limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        return {"review": await scenario_review(client, args, {})}
+
+
+async def run(args, ctx) -> dict:
+    import httpx
+    import core.main as server
+    from benchmarks.fake_llm import counters
+
+    transport = httpx.ASGITransport(app=server.app, client=("127.0.0.1", 40000))
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name in args.scenarios:
+            before = dict(counters)
+            results[name] = await RUNNERS[name](client, args, ctx)
+            results[name]["model"] = {k: counters[k] - before.get(k, 0) for k in counters}
+        await server.flush_background_queues()
+        if args.routing:
+            # Tier mix, escalations and estimated cost over the whole run, from the audit aggregates
+            ctx["model_routing"] = (await client.get("/audit/stats")).json()["model_routing"]
+    return results
+
+
+# ─── Output ───
+def compare(current: dict, baseline: dict):
+    print(f"\nvs. {baseline.get('commit', '?')[:12]}:")
+    for name, now in current["scenarios"].items():
+        then = baseline.get("scenarios", {}).get(name)
+        if not then:
+            continue
+        cells = []
+        for label, path in (("rps", ("throughput_rps",)), ("p50", ("latency_ms", "p50")),
+                            ("p99", ("latency_ms", "p99")), ("lag p99", ("loop_lag_ms", "p99"))):
+            a, b = then, now
+            for key in path:
+                a, b = (a or {}).get(key), (b or {}).get(key)
+            if a and b is not None:
+                cells.append(f"{label} {b} ({(b - a) / a * 100:+.1f}%)")
+        print(f"  {name:<8} " + " | ".join(cells))
+
+
+def print_table(results: dict):
+    print(f"{'scenario':<9} {'reqs':>5} {'ok':>5} {'rps':>8} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'lag p99':>8} {'lag max':>8} {'rss KiB':>9}")
+    for name, r in results.items():
+        print(f"{name:<9} {r['requests']:>5} {r['ok']:>5} {r['throughput_rps']:>8} "
+              f"{r['latency_ms']['p50']:>9} {r['latency_ms']['p99']:>9} "
+              f"{r['loop_lag_ms']['p99']:>8} {r['loop_lag_ms']['max']:>8} {r['memory_kib']['rss_after']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario (review, report)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--lines", type=int, default=120, help="lines per reviewed file")
+    parser.add_argument("--latency-ms", type=float, default=300, help="fake model median latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal spread of that latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of model calls that fail")
+    parser.add_argument("--429-rate", dest="rate_limit_rate", type=float, default=0.0,
+                        help="fraction of model calls rejected with a 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--routing", action="store_true",
+                        help="route reviews across the fake lite/flash/pro tiers (MODEL_ROUTING=true)")
+    parser.add_argument("--report-reviews", type=int, default=200, help="reviews per reported session")
+    parser.add_argument("--webhook-pushes", type=int, default=20)
+    parser.add_argument("--webhook-files", type=int, default=8, help="files changed per push")
+    parser.add_argument("--out", help="write the JSON results to this file")
+    parser.add_argument("--json", action="store_true", help="print the JSON results instead of a table")
+    parser.add_argument("--compare", help="a previous --out file to diff against")
+    parser.add_argument("--verbose", action="store_true", help="keep the server's own log output")
+    parser.add_argument("--url", help="load an already running server instead (review scenario only)")
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    if args.url:
+        args.scenarios = ["review"]
+        scenarios, sink_stats, routing = asyncio.run(run_remote(args)), None, None
+    else:
+        scenarios, sink_stats, routing = run_local(args)
+    report(args, scenarios, sink_stats, routing)
+
+
+def run_local(args):
+    with tempfile.TemporaryDirectory(prefix="redglyph-bench-") as tmp:
+        workdir = Path(tmp)
+        sink = SMTPSink().start()
+        secret = secrets.token_hex(16)
+        commits = (make_repo(workdir / "repo", args.webhook_pushes, args.webhook_files, args.lines)
+                   if "webhook" in args.scenarios else [])
+        configure_env(args, workdir, sink, workdir / "repo", secret)
+        ctx = {"sink": sink, "commits": commits, "secret": secret}
+
+        log = io.StringIO()
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(log):
+            scenarios = asyncio.run(run(args, ctx))
+        sink.stop()
+    return scenarios, sink.stats(), ctx.get("model_routing")
+
+
+def report(args, scenarios: dict, sink_stats: Optional[dict], model_routing: Optional[dict] = None):
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "json", "compare", "verbose")},
+        "smtp_sink": sink_stats,
+        "model_routing": model_routing,
+        "scenarios": scenarios,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2) + "\n")
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(scenarios)
+        if model_routing:
+            print(f"\nmodel routing: {json.dumps(model_routing)}")
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
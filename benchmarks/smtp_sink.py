@@ -0,0 +1,135 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Local SMTP Sink
+ Accepts and discards mail so report and notification
+ emails can be exercised without a real mail server.
+ Speaks plain SMTP (no TLS, no AUTH) on its own thread
+ and event loop; point the app at it with
+ SMTP_HOST=127.0.0.1 SMTP_PORT=<port> SMTP_USE_SSL=false.
+
+ Usage:  python benchmarks/smtp_sink.py [--port 2525]
+═══════════════════════════════════════════════════════
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class SMTPSink:
+    """Counts messages and bytes; keeps nothing else unless `keep` is set."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, keep: bool = False, verbose: bool = False):
+        self.host = host
+        self.port = port  # 0 = pick a free port; read it back after start()
+        self.keep = keep
+        self.verbose = verbose
+        self.messages = 0
+        self.bytes = 0
+        self.connections = 0
+        self.kept: list = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self) -> "SMTPSink":
+        self._thread = threading.Thread(target=self._run, name="smtp-sink", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+
+    def wait_for(self, count: int, timeout: float = 30.0) -> bool:
+        """Block until `count` messages have arrived (or the timeout passes)."""
+        deadline = time.monotonic() + timeout
+        while self.messages < count and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return self.messages >= count
+
+    def stats(self) -> dict:
+        return {"messages": self.messages, "bytes": self.bytes, "connections": self.connections}
+
+    # ─── Server ───
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._session, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.close()
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write(line.encode("ascii") + b"\r\n")
+            await writer.drain()
+
+        await reply("220 redglyph-sink ESMTP")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                verb = line[:4].upper()
+                if verb == b"EHLO":
+                    await reply("250-redglyph-sink\r\n250-8BITMIME\r\n250 SIZE 104857600")
+                elif verb == b"DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    size, chunks = 0, []
+                    while True:
+                        data = await reader.readline()
+                        if not data or data in (b".\r\n", b".\n"):
+                            break
+                        size += len(data)
+                        if self.keep:
+                            chunks.append(data)
+                    self.messages += 1
+                    self.bytes += size
+                    if self.keep:
+                        self.kept.append(b"".join(chunks))
+                    if self.verbose:
+                        print(f"📨 Message {self.messages}: {size} bytes")
+                    await reply("250 OK: queued")
+                elif verb == b"QUIT":
+                    await reply("221 Bye")
+                    break
+                elif verb in (b"HELO", b"MAIL", b"RCPT", b"RSET", b"NOOP"):
+                    await reply("250 OK")
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, verbose=True).start()
+    print(f"📭 SMTP sink listening on {sink.host}:{sink.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        sink.stop()
+        print(f"\n{sink.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Frontend Asset Pipeline
+ Built once at startup: every file under frontend/ is
+ read into memory, CSS / JS / images get content-hashed
+ names (page links and JS imports are rewritten to
+ match) and gzip / brotli variants are precomputed.
+ Hashed URLs are cached `immutable`; pages and plain
+ URLs revalidate with strong ETags and get 304s.
+═══════════════════════════════════════════════════════
+"""
+
+import hashlib
+import mimetypes
+import posixpath
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from starlette.convertors import Convertor
+from core.compression import available_encodings, choose_encoding, compress
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # cache, but check the ETag before every use
+
+_TEXT_SUFFIXES = {".html", ".css", ".js", ".svg", ".json", ".txt"}
+# Local references, as (prefix)(relative path)(suffix); anything with a scheme or fragment is left alone
+_REFERENCES = {
+    ".html": re.compile(r'(\b(?:href|src)=")([^"#?:]+)(")'),
+    ".js": re.compile(r"""(\bfrom\s*['"]|\bimport\s*\(?\s*['"])(\.{1,2}/[^'"]+)(['"])"""),
+    ".css": re.compile(r"""(url\(\s*['"]?)([^'")#?:]+)(['"]?\s*\))"""),
+}
+
+
+@dataclass
+class Asset:
+    path: str  # relative to frontend/, e.g. "js/app.js"
+    url: str   # "/js/app.3f9c0a1b2d4e5f60.js"; pages keep their plain URL
+    content_type: str
+    digest: str
+    variants: Dict[str, bytes] = field(default_factory=dict)  # "identity" / "gzip" / "br"
+
+    @property
+    def fingerprinted(self) -> bool:
+        return self.url != "/" + self.path
+
+    def etag(self, encoding: str) -> str:
+        # Strong ETags name exact bytes, so each encoding gets its own
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+
+def _hashed_name(path: str, digest: str) -> str:
+    stem, dot, suffix = path.rpartition(".")
+    return f"{stem}.{digest}.{suffix}" if dot else f"{path}.{digest}"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses the weak comparison, so a W/ prefix doesn't matter
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class FileNameConvertor(Convertor):
+    """A single path segment with an extension (`about.html`, `favicon2.<hash>.png`)."""
+
+    regex = r"[^/]+\.[A-Za-z0-9]+"
+
+    def convert(self, value: str) -> str:
+        return value
+
+    def to_string(self, value: str) -> str:
+        return value
+
+
+class AssetPipeline:
+    """In-memory, fingerprinted, precompressed copy of the frontend directory."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._by_url: Dict[str, Tuple[Asset, bool]] = {}  # url -> (asset, immutable)
+        self._lock = threading.Lock()
+        self.built = False
+        self.build_ms: Optional[float] = None
+        self.not_modified = 0
+        self.served = 0
+
+    def build(self):
+        """Read, fingerprint and compress everything; idempotent."""
+        with self._lock:
+            if self.built:
+                return
+            started = time.perf_counter()
+            files = {p.relative_to(self.root).as_posix(): p.read_bytes()
+                     for p in sorted(self.root.rglob("*")) if p.is_file()}
+            assets: Dict[str, Asset] = {}
+            for path in files:
+                self._finalize(path, files, assets, set())
+
+            by_url = {}
+            for asset in assets.values():
+                by_url["/" + asset.path] = (asset, False)
+                if asset.fingerprinted:
+                    by_url[asset.url] = (asset, True)
+            self._by_url = by_url
+            self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.built = True
+        stats = self.stats()
+        print(f"🗜️  Frontend assets ready: {stats['files']} files, {stats['bytes']} B "
+              f"→ {stats['gzip_bytes']} B gzip in {self.build_ms} ms")
+
+    def _finalize(self, path: str, files: Dict[str, bytes], assets: Dict[str, Asset], visiting: set) -> Asset:
+        """Build `path` after everything it references, so its hash covers their hashed names."""
+        if path in assets:
+            return assets[path]
+        visiting.add(path)
+        body = files[path]
+        suffix = posixpath.splitext(path)[1].lower()
+
+        def hashed_ref(ref: str) -> str:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(path), ref))
+            if target not in files or target.endswith(".html") or target in visiting:
+                return ref  # pages keep their URL; a cycle keeps the plain (revalidated) one
+            asset = self._finalize(target, files, assets, visiting)
+            return posixpath.join(posixpath.dirname(ref), posixpath.basename(asset.url))
+
+        references = _REFERENCES.get(suffix)
+        if references is not None:
+            text = references.sub(lambda m: m.group(1) + hashed_ref(m.group(2)) + m.group(3), body.decode("utf-8"))
+            body = text.encode("utf-8")
+
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        url = "/" + (path if suffix == ".html" else _hashed_name(path, digest))
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if suffix in _TEXT_SUFFIXES:
+            content_type += "; charset=utf-8"
+        asset = Asset(path, url, content_type, digest, {"identity": body})
+        if suffix in _TEXT_SUFFIXES:
+            for encoding in available_encodings():
+                compressed = compress(body, encoding, static=True)
+                if len(compressed) < len(body):
+                    asset.variants[encoding] = compressed
+        visiting.discard(path)
+        assets[path] = asset
+        return asset
+
+    def response(self, request: Request, url_path: str) -> Response:
+        """The asset at `url_path` in the best encoding the client accepts, or a 304."""
+        self.build()
+        entry = self._by_url.get(url_path)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Not found.")
+        asset, immutable = entry
+
+        offered = [e for e in available_encodings() if e in asset.variants]
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), offered) or "identity"
+        headers = {"ETag": asset.etag(encoding), "Cache-Control": IMMUTABLE if immutable else REVALIDATE}
+        if offered:
+            headers["Vary"] = "Accept-Encoding"
+        if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        self.served += 1
+        return Response(asset.variants[encoding], headers=headers, media_type=asset.content_type)
+
+    def stats(self) -> dict:
+        assets = {asset.path: asset for asset, _ in self._by_url.values()}.values()
+        return {
+            "files": len(assets),
+            "bytes": sum(len(a.variants["identity"]) for a in assets),
+            "gzip_bytes": sum(len(a.variants.get("gzip", a.variants["identity"])) for a in assets),
+            "served": self.served,
+            "not_modified": self.not_modified,
+            **({"br_bytes": sum(len(a.variants.get("br", a.variants["identity"])) for a in assets)}
+               if "br" in available_encodings() else {}),
+        }
@@ -2,30 +2,404 @@
 ═══════════════════════════════════════════════════════
  REDGLYPH — Audit Logging Middleware
  Logs every review request with timestamp & metadata.
+
+ Writes never happen on the request path: events go onto
+ a queue that a background thread flushes in batches to
+ a rotating JSONL file and an indexed SQLite store.
+ Both are safe to share between worker processes: each
+ batch is appended under an exclusive file lock.
+ Summary stats are maintained incrementally in memory;
+ with several workers they are rebuilt from the SQLite
+ store so every worker reports the same totals.
 ═══════════════════════════════════════════════════════
 """
 
+import atexit
+import bisect
+import contextlib
 import json
+import os
+import queue
+import sqlite3
+import threading
 import time
-import logging
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import List, Optional
 from core.config import config
+from core.metrics import STAGE_SECONDS
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, single process only
+    fcntl = None
+
+
+class AuditStats:
+    """
+    Running aggregates over code_review events — O(1) per event, no re-scans.
+    Latency percentiles come from a log-spaced histogram (~5% resolution).
+    """
+
+    _BOUNDS = [round(1.05 ** i, 3) for i in range(1, 300)]  # 1.05 ms … ~36 min; slower counts as ~36 min
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.since = datetime.now(timezone.utc).isoformat()
+        self.reviews = 0
+        self.errors = 0
+        self.by_api_mode = {}
+        self.by_event = {}
+        self.cache_hits = 0
+        self.retries = 0
+        self.shed = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.coalesced = 0
+        self.short_circuits = 0
+        self.static_reviews = 0
+        self.static_ms_total = 0.0
+        self.tokens_original = 0
+        self.tokens_compacted = 0
+        self.by_model_tier = {}
+        self.escalations = 0
+        self.model_cost_usd = 0.0
+        self._durations = [0] * (len(self._BOUNDS) + 1)
+        self._scores = [0] * 10  # [0,1), [1,2) … [9,10]
+
+    def observe(self, entry: dict):
+        with self._lock:
+            event = entry.get("event")
+            self.by_event[event] = self.by_event.get(event, 0) + 1
+            if event != "code_review":
+                return
+
+            self.reviews += 1
+            mode = entry.get("api_mode") or "unknown"
+            self.by_api_mode[mode] = self.by_api_mode.get(mode, 0) + 1
+            if entry.get("error"):
+                self.errors += 1
+            if entry.get("cache") == "hit":
+                self.cache_hits += 1
+            self.retries += entry.get("retries") or 0
+            if entry.get("shed"):
+                self.shed += 1
+            if entry.get("timed_out"):
+                self.timeouts += 1
+            if entry.get("cancelled"):
+                self.cancelled += 1
+            if entry.get("coalesce") == "follower":
+                self.coalesced += 1
+            if entry.get("short_circuit"):
+                self.short_circuits += 1
+            if entry.get("static_ms") is not None:
+                self.static_reviews += 1
+                self.static_ms_total += entry["static_ms"]
+            if entry.get("tokens_original") is not None:
+                self.tokens_original += entry["tokens_original"]
+                self.tokens_compacted += entry.get("tokens_compacted") or 0
+            if entry.get("model_tier"):
+                tier = self.by_model_tier.setdefault(entry["model_tier"], {"reviews": 0, "duration_ms_total": 0.0})
+                tier["reviews"] += 1
+                tier["duration_ms_total"] += entry.get("duration_ms") or 0.0
+                self.escalations += entry.get("escalations") or 0
+                self.model_cost_usd += entry.get("model_cost_usd") or 0.0
+            if entry.get("duration_ms") is not None:
+                self._durations[bisect.bisect_left(self._BOUNDS, entry["duration_ms"])] += 1
+            if entry.get("score") is not None:
+                self._scores[min(9, max(0, int(entry["score"])))] += 1
+
+    def _percentile(self, q: float) -> Optional[float]:
+        total = sum(self._durations)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(self._durations):
+            seen += count
+            if seen >= rank:
+                return self._BOUNDS[min(i, len(self._BOUNDS) - 1)]
+        return self._BOUNDS[-1]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "since": self.since,
+                "reviews": self.reviews,
+                "errors": self.errors,
+                "error_rate": round(self.errors / self.reviews, 4) if self.reviews else 0.0,
+                "cache_hit_rate": round(self.cache_hits / self.reviews, 4) if self.reviews else 0.0,
+                "shed_rate": round(self.shed / self.reviews, 4) if self.reviews else 0.0,
+                "timeout_rate": round(self.timeouts / self.reviews, 4) if self.reviews else 0.0,
+                "cancelled_rate": round(self.cancelled / self.reviews, 4) if self.reviews else 0.0,
+                "model_retries": self.retries,
+                "model_calls_saved_by_coalescing": self.coalesced,
+                "short_circuit_rate": round(self.short_circuits / self.reviews, 4) if self.reviews else 0.0,
+                "static_analysis_avg_ms": (round(self.static_ms_total / self.static_reviews, 3)
+                                           if self.static_reviews else None),
+                "prompt_tokens": {
+                    "original": self.tokens_original,
+                    "compacted": self.tokens_compacted,
+                    "saved_ratio": (round(1 - self.tokens_compacted / self.tokens_original, 4)
+                                    if self.tokens_original else 0.0),
+                },
+                "model_routing": {
+                    "by_tier": {
+                        name: {"reviews": t["reviews"], "avg_duration_ms": round(t["duration_ms_total"] / t["reviews"], 2)}
+                        for name, t in self.by_model_tier.items()
+                    },
+                    "escalations": self.escalations,
+                    "cost_usd_estimated": round(self.model_cost_usd, 6),
+                },
+                "by_api_mode": dict(self.by_api_mode),
+                "events": dict(self.by_event),
+                "duration_ms": {
+                    "p50": self._percentile(0.50),
+                    "p95": self._percentile(0.95),
+                    "p99": self._percentile(0.99),
+                },
+                "score_distribution": {
+                    f"{i}-{i + 1}": count for i, count in enumerate(self._scores)
+                },
+            }
+
+
+class SharedAuditStats:
+    """
+    AuditStats over every worker's events, read back from the SQLite mirror.
+    Each snapshot folds in only the rows added since the previous one; another
+    worker's events show up once its writer flushes them (AUDIT_FLUSH_SECONDS).
+    """
+
+    def __init__(self, db_path: str, since: str):
+        self.db_path = db_path
+        self._stats = AuditStats()
+        self._stats.since = since
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._catch_up()
+        return self._stats.snapshot()
+
+    def _catch_up(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, timeout=config.SQLITE_BUSY_TIMEOUT_SECONDS,
+                                       check_same_thread=False)
+        try:
+            rows = self._db.execute(
+                "SELECT id, entry FROM audit_events WHERE id > ? AND ts >= ? ORDER BY id",
+                (self._last_id, self._stats.since),
+            ).fetchall()
+        except sqlite3.OperationalError:  # no events written yet, or a writer held the lock too long
+            return
+        for row_id, entry in rows:
+            self._stats.observe(json.loads(entry))
+            self._last_id = row_id
+
+
+class AuditWriter:
+    """Background writer: batches queued events, appends JSONL, mirrors into SQLite."""
+
+    def __init__(self, log_path: str, db_path: str, batch_size: int, flush_seconds: float,
+                 max_bytes: int, rotate_seconds: float, backup_count: int, queue_size: int):
+        self.log_path = Path(log_path)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._lock_file = None
+        self._db: Optional[sqlite3.Connection] = None
+
+    def submit(self, entry: dict):
+        """Queue an event; never blocks the caller (events are dropped if the queue is full)."""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0):
+        """Block until everything queued so far has been written."""
+        if self._thread and self._thread.is_alive():
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait(timeout)
+
+    def stop(self, timeout: float = 5.0):
+        self.flush(timeout)
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "dropped": self.dropped}
 
-# Setup file-based audit logger
-audit_logger = logging.getLogger("audit")
-audit_logger.setLevel(logging.INFO)
+    # ─── Worker ───
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
 
-log_path = Path(config.AUDIT_LOG_FILE)
-handler = logging.FileHandler(log_path, encoding="utf-8")
-handler.setFormatter(logging.Formatter("%(message)s"))
-audit_logger.addHandler(handler)
+    def _run(self):
+        while True:
+            batch: List[dict] = []
+            waiters: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_seconds
+            try:
+                item = self._queue.get()
+                while True:
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                pass
 
+            if batch:
+                try:
+                    with STAGE_SECONDS.time(stage="audit_write"):
+                        self._write(batch)
+                except Exception as e:  # the writer thread must survive a bad disk day
+                    print(f"❌ Audit write failed: {e}")
+            for waiter in waiters:
+                waiter.set()
 
-def log_review(request_ip: str, language: str, code_length: int, api_mode: str, 
-               score: float = None, issues_count: int = None, 
-               duration_ms: float = None, error: str = None):
-    """Log a review event to the audit file."""
+    def _write(self, batch: List[dict]):
+        data = "".join(json.dumps(entry) + "\n" for entry in batch).encode("utf-8")
+        with self._locked():
+            self._rotate_if_needed(len(data))
+            self._reopen_if_moved()
+            if self._file is None:
+                self._file = open(self.log_path, "ab", buffering=0)
+            view = memoryview(data)
+            while view:  # unbuffered, so the batch is on disk before the lock is released
+                view = view[self._file.write(view):]
+
+        if self.db_path:
+            self._insert(batch)
+
+    @property
+    def _lock_path(self) -> Path:
+        # Hidden, so rotation's "<name>.*" backup glob never matches it
+        return self.log_path.with_name(f".{self.log_path.name}.lock")
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusive against other processes writing the same log (a no-op without fcntl)."""
+        if self._lock_file is None:
+            self._lock_file = open(self._lock_path, "a")
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _reopen_if_moved(self):
+        """Another process may have rotated the log since we opened it."""
+        if self._file is None:
+            return
+        try:
+            moved = os.stat(self.log_path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            moved = True
+        if moved:
+            self._file.close()
+            self._file = None
+
+    def _rotate_if_needed(self, incoming: int):
+        if not self.log_path.exists():
+            return
+        # The lock file's mtime marks the last rotation, so every process agrees on the log's age
+        too_big = self.max_bytes and self.log_path.stat().st_size + incoming > self.max_bytes
+        too_old = self.rotate_seconds and time.time() - self._lock_path.stat().st_mtime > self.rotate_seconds
+        if not (too_big or too_old):
+            return
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-%f")  # unique even for back-to-back rotations
+        os.replace(self.log_path, self.log_path.with_name(f"{self.log_path.name}.{stamp}"))
+        os.utime(self._lock_path)
+
+        backups = sorted(self.log_path.parent.glob(f"{self.log_path.name}.*"))
+        for old in backups[:max(0, len(backups) - self.backup_count)]:
+            old.unlink(missing_ok=True)
+
+    def _insert(self, batch: List[dict]):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS audit_events ("
+                "id INTEGER PRIMARY KEY, ts TEXT NOT NULL, event TEXT NOT NULL, ip TEXT, "
+                "api_mode TEXT, duration_ms REAL, score REAL, error TEXT, entry TEXT NOT NULL)"
+            )
+            for column in ("ts", "ip", "api_mode"):
+                self._db.execute(f"CREATE INDEX IF NOT EXISTS idx_audit_{column} ON audit_events ({column})")
+
+        self._db.executemany(
+            "INSERT INTO audit_events (ts, event, ip, api_mode, duration_ms, score, error, entry) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (e["timestamp"], e["event"], e.get("ip"), e.get("api_mode"), e.get("duration_ms"),
+                 e.get("score"), e.get("error"), json.dumps(e))
+                for e in batch
+            ],
+        )
+        self._db.commit()
+
+
+audit_stats = AuditStats()
+audit_writer = AuditWriter(
+    log_path=config.AUDIT_LOG_FILE,
+    db_path=config.AUDIT_DB_PATH,
+    batch_size=config.AUDIT_BATCH_SIZE,
+    flush_seconds=config.AUDIT_FLUSH_SECONDS,
+    max_bytes=config.AUDIT_MAX_BYTES,
+    rotate_seconds=config.AUDIT_ROTATE_SECONDS,
+    backup_count=config.AUDIT_BACKUP_COUNT,
+    queue_size=config.AUDIT_QUEUE_SIZE,
+)
+atexit.register(audit_writer.stop)
+# Workers each see only their own requests; with shared state, /audit/stats reads everyone's
+shared_audit_stats = (
+    SharedAuditStats(config.AUDIT_DB_PATH, since=config.SERVER_STARTED_AT or audit_stats.since)
+    if config.SHARED_STATE_DB_PATH and config.AUDIT_DB_PATH else None
+)
+
+
+def _emit(entry: dict):
+    audit_stats.observe(entry)
+    audit_writer.submit(entry)
+
+
+def log_review(request_ip: str, language: str, code_length: int, api_mode: str,
+               score: float = None, issues_count: int = None,
+               duration_ms: float = None, error: str = None, cache_stats: dict = None,
+               time_to_first_issue_ms: float = None, streamed: bool = False,
+               batch_id: str = None, path: str = None, trace: dict = None):
+    """
+    Log a review event to the audit file. `trace` is ReviewTrace.audit_fields():
+    what the pipeline did (cache, retries, routing, ...) for this review.
+    """
+    trace = trace or {}
+    static_ms = trace.get("static_ms")
     entry = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "event": "code_review",
@@ -36,9 +410,55 @@ def log_review(request_ip: str, language: str, code_length: int, api_mode: str,
         "score": score,
         "issues_count": issues_count,
         "duration_ms": round(duration_ms, 2) if duration_ms else None,
+        "time_to_first_issue_ms": round(time_to_first_issue_ms, 2) if time_to_first_issue_ms else None,
+        "streamed": streamed,
+        "batch_id": batch_id,
+        "path": path,
+        "retries": trace.get("retries", 0),
+        "shed": trace.get("shed", False),
+        "coalesce": trace.get("coalesce_role"),
+        "incremental": trace.get("incremental", False),
+        "reviewed_lines": trace.get("reviewed_lines"),
+        "short_circuit": trace.get("short_circuit", False),
+        "static_ms": round(static_ms, 3) if static_ms is not None else None,
+        "tokens_original": trace.get("tokens_original"),
+        "tokens_compacted": trace.get("tokens_compacted"),
+        "model_tier": trace.get("model_tier"),
+        "escalations": trace.get("escalations", 0),
+        "model_cost_usd": trace.get("model_cost_usd"),
+        "timed_out": trace.get("timed_out", False),
+        "cancelled": trace.get("cancelled", False),
         "error": error,
+        "cache": trace.get("cache_status"),
+        "cache_stats": cache_stats,
+    }
+    _emit(entry)
+
+
+def log_batch(request_ip: str, batch_id: str, api_mode: str, items: int,
+              succeeded: int, failed: int, duration_ms: float,
+              avg_score: float = None, cache_hits: int = 0, skipped: int = 0):
+    """
+    Log one aggregated event per batch (items are logged individually by log_review).
+    `cache_hits` were answered from an earlier review; `skipped` were never reviewed.
+    """
+    minutes = duration_ms / 60000 if duration_ms else 0
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "event": "batch_review",
+        "ip": request_ip,
+        "batch_id": batch_id,
+        "api_mode": api_mode,
+        "items": items,
+        "succeeded": succeeded,
+        "failed": failed,
+        "cache_hits": cache_hits,
+        "skipped": skipped,
+        "avg_score": round(avg_score, 2) if avg_score is not None else None,
+        "duration_ms": round(duration_ms, 2),
+        "files_per_minute": round(items / minutes, 1) if minutes else None,
     }
-    audit_logger.info(json.dumps(entry))
+    _emit(entry)
 
 
 def log_auth_event(request_ip: str, event_type: str, detail: str = ""):
@@ -49,4 +469,4 @@ def log_auth_event(request_ip: str, event_type: str, detail: str = ""):
         "ip": request_ip,
         "detail": detail,
     }
-    audit_logger.info(json.dumps(entry))
+    _emit(entry)
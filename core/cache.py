@@ -0,0 +1,192 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Review Cache
+ Content-addressed cache of ReviewReports.
+ Tier 1: in-memory LRU with TTL.  Tier 2: optional SQLite.
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from core.config import config
+from schemas.state import ReviewReport
+
+
+def normalize_code(code: str) -> str:
+    """Normalize line endings and trailing whitespace so cosmetic resubmits share a key."""
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def normalize_language(language: Optional[str]) -> str:
+    """Language label as it enters a key; unlabelled code is "auto"."""
+    return (language or "").strip().lower() or "auto"
+
+
+def make_cache_key(code: str, prompt_version: str, model: str = None,
+                   temperature: float = None, language: str = None) -> str:
+    """Hash the normalized code together with everything that changes the model's answer."""
+    model = model or config.DEFAULT_MODEL
+    temperature = config.TEMPERATURE if temperature is None else temperature
+    digest = hashlib.sha256()
+    # The language picks the static checks, the chunk boundaries and the model tier
+    for part in (model, repr(float(temperature)), prompt_version, normalize_language(language)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(normalize_code(code).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class MemoryTier:
+    """Thread-safe LRU map with a per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.pop(key, None)
+            return item[1] if item else None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteTier:
+    """
+    Key/value table in a SQLite file. Values are text; rows expire after the TTL.
+    It is only a cache: a read or write that can't get the lock in time is skipped.
+    """
+
+    def __init__(self, path: str, table: str, ttl_seconds: float):
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Several worker processes may share the file; wait out their write locks, briefly
+        self._conn = sqlite3.connect(path, timeout=config.SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] < time.time():
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+                return row[0]
+            except sqlite3.OperationalError as e:  # "database is locked"
+                self._conn.rollback()
+                print(f"⚠️  {self.table}: SQLite read skipped ({e})")
+                return None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            try:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, time.time() + self.ttl_seconds),
+                )
+                self._conn.commit()
+            except sqlite3.OperationalError as e:
+                self._conn.rollback()
+                print(f"⚠️  {self.table}: SQLite write skipped ({e})")
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            return cur.rowcount
+
+
+class ReviewCache:
+    """Two-tier ReviewReport cache. Disk hits are promoted into memory."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, db_path: str = ""):
+        self.memory = MemoryTier(max_entries, ttl_seconds)
+        self.disk = SQLiteTier(db_path, "review_cache", ttl_seconds) if db_path else None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[ReviewReport]:
+        report = self.memory.get(key)
+        if report is None and self.disk is not None:
+            raw = self.disk.get(key)
+            if raw is not None:
+                report = ReviewReport.model_validate_json(raw)
+                self.memory.set(key, report)
+        if report is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return report.model_copy(deep=True)
+
+    def set(self, key: str, report: ReviewReport) -> None:
+        self.memory.set(key, report.model_copy(deep=True))
+        if self.disk is not None:
+            self.disk.set(key, report.model_dump_json())
+
+    # From the event loop: with a SQLite tier, reads and writes run on a worker thread
+    async def aget(self, key: str) -> Optional[ReviewReport]:
+        return self.get(key) if self.disk is None else await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, report: ReviewReport) -> None:
+        if self.disk is None:
+            self.set(key, report)
+        else:
+            await asyncio.to_thread(self.set, key, report)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.memory),
+            "evictions": self.memory.evictions,
+        }
+
+
+review_cache = ReviewCache(
+    max_entries=config.CACHE_MAX_ENTRIES,
+    ttl_seconds=config.CACHE_TTL_SECONDS,
+    db_path=config.CACHE_DB_PATH or config.SHARED_STATE_DB_PATH,
+)
@@ -0,0 +1,112 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Response Compression
+ Accept-Encoding negotiation (gzip, and brotli when the
+ optional `brotli` package is installed) plus an ASGI
+ middleware that compresses large JSON and text bodies.
+ Streamed responses (NDJSON) pass through untouched: a
+ compressor would hold events back until it filled up.
+═══════════════════════════════════════════════════════
+"""
+
+import gzip
+from typing import Dict, Iterable, Optional
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html")
+DYNAMIC_GZIP_LEVEL = 6    # per-response work on the event loop — favour speed
+DYNAMIC_BROTLI_QUALITY = 5
+
+
+def available_encodings() -> tuple:
+    """Encodings this process can produce, best first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _accepted(header: str) -> Dict[str, float]:
+    """Accept-Encoding → {coding: q}."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, offered: Iterable[str]) -> Optional[str]:
+    """The best of `offered` (ordered by preference) the client accepts; None = send identity."""
+    accepted = _accepted(accept_encoding or "")
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    """Static assets are compressed once at startup, so they get the slowest, smallest settings."""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if static else DYNAMIC_BROTLI_QUALITY)
+    return gzip.compress(body, 9 if static else DYNAMIC_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compresses single-message responses of a compressible type above
+    `minimum_size`. Anything streamed, already encoded or too small is
+    forwarded as is.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), available_encodings())
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # held back until the first body message shows the size
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "").split(";")[0].strip()
+            if (not message.get("more_body") and "content-encoding" not in headers
+                    and len(body) >= self.minimum_size and content_type in COMPRESSIBLE_TYPES):
+                compressed = compress(body, encoding)
+                if len(compressed) < len(body):
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(compressed))
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": compressed}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
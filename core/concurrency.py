@@ -0,0 +1,93 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Review Concurrency Gate
+ Caps in-flight graph runs and sheds load with a 503
+ once the wait queue is full, instead of piling up.
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from core.config import config
+
+
+class ServiceSaturated(Exception):
+    """Raised when every review slot is busy and the wait queue is full."""
+
+
+class ReviewGate:
+    """Global semaphore with a bounded number of waiters."""
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @property
+    def saturated(self) -> bool:
+        """True if a new request would be rejected right now."""
+        return self._semaphore.locked() and self.waiting >= self.max_queued
+
+    @asynccontextmanager
+    async def slot(self, shed: bool = True):
+        """
+        Hold one review slot for the duration of the block.
+        With shed=False the caller always waits (batch items, whose own
+        per-key budget already bounds how many of them can queue here).
+        """
+        if shed and self.saturated:
+            self.rejected += 1
+            raise ServiceSaturated(
+                f"{self.active} reviews running and {self.waiting} queued — try again shortly."
+            )
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+        }
+
+
+class KeyBudgets:
+    """Per-API-key concurrency budget, shared by every batch that key submits."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphores = {}
+        self._users = {}
+
+    @asynccontextmanager
+    async def slot(self, key: str):
+        semaphore = self._semaphores.setdefault(key, asyncio.Semaphore(self.limit))
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._semaphores[key]
+
+
+review_gate = ReviewGate(config.MAX_CONCURRENT_REVIEWS, config.MAX_QUEUED_REVIEWS)
+batch_budgets = KeyBudgets(config.BATCH_CONCURRENCY_PER_KEY)
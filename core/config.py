@@ -18,20 +18,133 @@ class Config:
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", 8000))
 
+    # Multi-process serving — with WORKERS > 1 the review cache, review store, sessions and
+    # rate-limit buckets live in one SQLite file every worker opens
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
+    SHARED_STATE_DB_PATH: str = os.getenv("SHARED_STATE_DB_PATH", "shared_state.db" if WORKERS > 1 else "")
+    # How long a write waits on another worker's SQLite lock before that write is skipped or shed
+    SQLITE_BUSY_TIMEOUT_SECONDS: float = float(os.getenv("SQLITE_BUSY_TIMEOUT_SECONDS", "2"))
+    KEY_ID_SALT: str = os.getenv("KEY_ID_SALT", "")  # hex; the parent process sets one for its workers
+    SERVER_STARTED_AT: str = os.getenv("SERVER_STARTED_AT", "")  # ISO time; set by the parent, bounds /audit/stats
+
     # AI
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
     DEFAULT_MODEL: str = os.getenv("MODEL_NAME", "gemini-2.5-flash")
     TEMPERATURE: float = float(os.getenv("TEMPERATURE", "0.1"))
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "gemini")  # "fake" = offline benchmark model (FAKE_LLM_*)
+
+    # Model tiers — with MODEL_ROUTING, each review goes to lite / flash / pro by prompt size,
+    # language and local complexity; otherwise everything uses the flash tier (MODEL_NAME)
+    MODEL_ROUTING: bool = os.getenv("MODEL_ROUTING", "false").lower() == "true"
+    MODEL_TIER_LITE: str = os.getenv("MODEL_TIER_LITE", "gemini-2.5-flash-lite")
+    MODEL_TIER_FLASH: str = os.getenv("MODEL_TIER_FLASH", DEFAULT_MODEL)
+    MODEL_TIER_PRO: str = os.getenv("MODEL_TIER_PRO", "gemini-2.5-pro")
+    MODEL_PRICES: str = os.getenv("MODEL_PRICES", "lite=0.10/0.40,flash=0.30/2.50,pro=1.25/10")  # USD per 1M in/out tokens
+    ROUTE_LITE_MAX_TOKENS: int = int(os.getenv("ROUTE_LITE_MAX_TOKENS", "1500"))
+    ROUTE_LITE_MAX_COMPLEXITY: int = int(os.getenv("ROUTE_LITE_MAX_COMPLEXITY", "8"))
+    ROUTE_LITE_LANGUAGES: list = os.getenv("ROUTE_LITE_LANGUAGES", "python,javascript,typescript,java,go").split(",")
+    ROUTE_PRO_MIN_TOKENS: int = int(os.getenv("ROUTE_PRO_MIN_TOKENS", "40000"))
+    ROUTE_PRO_MIN_COMPLEXITY: int = int(os.getenv("ROUTE_PRO_MIN_COMPLEXITY", "30"))
+    # Re-review a chunk one tier up when the routed model reports a High issue or low confidence
+    ROUTE_ESCALATE: bool = os.getenv("ROUTE_ESCALATE", "true").lower() == "true"
+    ROUTE_MIN_CONFIDENCE: float = float(os.getenv("ROUTE_MIN_CONFIDENCE", "0.6"))
+
+    # Incremental re-review — recent (code, report) pairs kept for diffing
+    REVIEW_STORE_MAX_ENTRIES: int = int(os.getenv("REVIEW_STORE_MAX_ENTRIES", "1000"))
+    REVIEW_STORE_TTL_SECONDS: float = float(os.getenv("REVIEW_STORE_TTL_SECONDS", "86400"))
+    REVIEW_STORE_DB_PATH: str = os.getenv("REVIEW_STORE_DB_PATH", "")  # empty = memory only
+    INCREMENTAL_CONTEXT_LINES: int = int(os.getenv("INCREMENTAL_CONTEXT_LINES", "5"))
+    INCREMENTAL_MAX_CHANGED_RATIO: float = float(os.getenv("INCREMENTAL_MAX_CHANGED_RATIO", "0.5"))
+
+    # Local static checks ahead of the model (Python)
+    STATIC_COMPLEXITY_THRESHOLD: int = int(os.getenv("STATIC_COMPLEXITY_THRESHOLD", "10"))
+
+    # Prompt compaction — estimated tokens per review request, and the cut-off for minified lines
+    TOKEN_BUDGET: int = int(os.getenv("TOKEN_BUDGET", "100000"))
+    COMPACT_MAX_LINE_CHARS: int = int(os.getenv("COMPACT_MAX_LINE_CHARS", "400"))
+
+    # Server-side sessions — reviews kept per browser session for /send-report
+    SESSION_MAX_SESSIONS: int = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+    SESSION_TTL_SECONDS: float = float(os.getenv("SESSION_TTL_SECONDS", "86400"))  # idle time
+    SESSION_MAX_REVIEWS: int = int(os.getenv("SESSION_MAX_REVIEWS", "1000"))  # oldest dropped beyond this
+    SESSION_DB_PATH: str = os.getenv("SESSION_DB_PATH", "")  # empty = memory only
+
+    # Large files are split into chunks and reviewed in parallel
+    CHUNK_MAX_LINES: int = int(os.getenv("CHUNK_MAX_LINES", "400"))
+    CHUNK_OVERLAP_LINES: int = int(os.getenv("CHUNK_OVERLAP_LINES", "20"))
+    CHUNK_CONCURRENCY: int = int(os.getenv("CHUNK_CONCURRENCY", "8"))
+
+    # Compiled graphs kept warm for bring-your-own-key users
+    GRAPH_POOL_SIZE: int = int(os.getenv("GRAPH_POOL_SIZE", "32"))
+    GRAPH_POOL_IDLE_SECONDS: float = float(os.getenv("GRAPH_POOL_IDLE_SECONDS", "900"))
+
+    # Concurrency — reviews beyond MAX_CONCURRENT wait; beyond MAX_QUEUED they get a 503
+    MAX_CONCURRENT_REVIEWS: int = int(os.getenv("MAX_CONCURRENT_REVIEWS", "8"))
+    MAX_QUEUED_REVIEWS: int = int(os.getenv("MAX_QUEUED_REVIEWS", "32"))
+
+    # Request deadlines — clients may ask for their own with X-Request-Timeout (seconds)
+    REVIEW_DEADLINE_SECONDS: float = float(os.getenv("REVIEW_DEADLINE_SECONDS", "100"))
+    REQUEST_TIMEOUT_MAX_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_MAX_SECONDS", "300"))
+
+    # Gemini rate limiting — per-key token bucket that learns the quota from 429s
+    RATE_LIMIT_RPS: float = float(os.getenv("RATE_LIMIT_RPS", "2"))
+    RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", "8"))
+    RATE_LIMIT_MIN_RPS: float = float(os.getenv("RATE_LIMIT_MIN_RPS", "0.05"))
+    RATE_LIMIT_MAX_RPS: float = float(os.getenv("RATE_LIMIT_MAX_RPS", "20"))
+    RATE_LIMIT_INCREASE: float = float(os.getenv("RATE_LIMIT_INCREASE", "0.05"))
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+    RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "1"))
+    RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "20"))
+
+    # Batch reviews — files in flight per API key, and files per request
+    BATCH_CONCURRENCY_PER_KEY: int = int(os.getenv("BATCH_CONCURRENCY_PER_KEY", "4"))
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+    # GitHub webhook — pushes are reviewed from a local clone on a background queue
+    WEBHOOK_REPO_PATH: str = os.getenv("WEBHOOK_REPO_PATH", "")  # empty = webhook disabled
+    WEBHOOK_GIT_REMOTE: str = os.getenv("WEBHOOK_GIT_REMOTE", "origin")
+    WEBHOOK_SECRET: str = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+    WEBHOOK_INDEX_DB_PATH: str = os.getenv("WEBHOOK_INDEX_DB_PATH", "webhook_index.db")
+    WEBHOOK_INDEX_TTL_SECONDS: float = float(os.getenv("WEBHOOK_INDEX_TTL_SECONDS", str(30 * 86400)))
+    WEBHOOK_FILE_CONCURRENCY: int = int(os.getenv("WEBHOOK_FILE_CONCURRENCY", "16"))
+    WEBHOOK_MAX_FILE_BYTES: int = int(os.getenv("WEBHOOK_MAX_FILE_BYTES", str(1024 * 1024)))
+    WEBHOOK_JOB_WORKERS: int = int(os.getenv("WEBHOOK_JOB_WORKERS", "2"))
+    WEBHOOK_QUEUE_SIZE: int = int(os.getenv("WEBHOOK_QUEUE_SIZE", "50"))
+    WEBHOOK_MAX_JOBS: int = int(os.getenv("WEBHOOK_MAX_JOBS", "200"))  # finished jobs kept for /webhook/jobs
 
     # Email
     EMAIL_ADDRESS: str = os.getenv("EMAIL_ADDRESS", "")
     EMAIL_APP_PASSWORD: str = os.getenv("EMAIL_APP_PASSWORD", "")
+    SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
+    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "465"))
+    SMTP_USE_SSL: bool = os.getenv("SMTP_USE_SSL", "true").lower() == "true"
+    SMTP_IDLE_SECONDS: float = float(os.getenv("SMTP_IDLE_SECONDS", "60"))
+    MAIL_QUEUE_SIZE: int = int(os.getenv("MAIL_QUEUE_SIZE", "100"))
+    MAIL_MAX_RETRIES: int = int(os.getenv("MAIL_MAX_RETRIES", "3"))
+    MAIL_RETRY_BACKOFF_SECONDS: float = float(os.getenv("MAIL_RETRY_BACKOFF_SECONDS", "1"))
+    REPORT_INLINE_REVIEWS: int = int(os.getenv("REPORT_INLINE_REVIEWS", "20"))  # rest go in attachments
+
+    # Responses — JSON / text bodies at least this large are compressed (streams never are)
+    COMPRESS_MIN_BYTES: int = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
 
     # Security
     ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 
     # Audit
     AUDIT_LOG_FILE: str = os.getenv("AUDIT_LOG", "audit.log")
+    AUDIT_DB_PATH: str = os.getenv("AUDIT_DB_PATH", "audit.db")  # empty = JSONL only
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+    AUDIT_FLUSH_SECONDS: float = float(os.getenv("AUDIT_FLUSH_SECONDS", "1"))
+    AUDIT_QUEUE_SIZE: int = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+    AUDIT_MAX_BYTES: int = int(os.getenv("AUDIT_MAX_BYTES", str(50 * 1024 * 1024)))
+    AUDIT_ROTATE_SECONDS: float = float(os.getenv("AUDIT_ROTATE_SECONDS", "86400"))
+    AUDIT_BACKUP_COUNT: int = int(os.getenv("AUDIT_BACKUP_COUNT", "7"))
+
+    # Review cache
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "86400"))
+    CACHE_DB_PATH: str = os.getenv("CACHE_DB_PATH", "")  # empty = memory only
 
 
 config = Config()
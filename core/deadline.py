@@ -0,0 +1,77 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Request Deadlines & Client Disconnects
+ Each request gets a deadline (X-Request-Timeout header,
+ else the server default) that bounds its review, and
+ work started for a client is cancelled once that
+ client has gone away.
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+import threading
+import time
+from typing import Awaitable, Optional, TypeVar
+from fastapi import Request
+from core.config import config
+
+T = TypeVar("T")
+
+TIMEOUT_HEADER = "X-Request-Timeout"
+
+
+class DeadlineExceeded(Exception):
+    """The request ran past its deadline; its remaining work was cancelled."""
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the response was ready; its work was cancelled."""
+
+
+def request_deadline(request: Request) -> float:
+    """time.monotonic() deadline from the X-Request-Timeout header (seconds), clamped to the server maximum."""
+    seconds = config.REVIEW_DEADLINE_SECONDS
+    raw = request.headers.get(TIMEOUT_HEADER)
+    if raw:
+        try:
+            seconds = min(max(float(raw), 0.0), config.REQUEST_TIMEOUT_MAX_SECONDS)
+        except ValueError:
+            pass  # a malformed header gets the server default
+    return time.monotonic() + seconds
+
+
+def remaining(deadline: float) -> float:
+    return max(0.0, deadline - time.monotonic())
+
+
+async def _disconnected(request: Request):
+    # The body has been read by now, so the next message is the disconnect
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def until_disconnected(request: Request, work: Awaitable[T], deadline: Optional[float] = None,
+                             cancel: Optional[threading.Event] = None) -> T:
+    """
+    Await `work`, cancelling it if the client disconnects (ClientDisconnected) or
+    `deadline` passes (DeadlineExceeded). `cancel` is set as well, for work that
+    runs on a thread and can only stop cooperatively.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_disconnected(request))
+    try:
+        done, _ = await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED,
+                                     timeout=remaining(deadline) if deadline is not None else None)
+        if task in done:
+            return task.result()
+        if watcher in done:
+            raise ClientDisconnected("Client disconnected.")
+        raise DeadlineExceeded("Request deadline exceeded.")
+    finally:
+        watcher.cancel()
+        if not task.done():
+            if cancel is not None:
+                cancel.set()
+            task.cancel()
+            # Let the work unwind (and log) before the handler moves on
+            await asyncio.gather(task, return_exceptions=True)
@@ -3,21 +3,35 @@
  REDGLYPH — Email Report Service
  Sends a session summary (all reviews + average score)
  to any user-provided email address.
+
+ The HTML body is streamed from precompiled templates
+ and only shows the worst reviews inline; the full
+ session is attached as gzipped CSV and JSON.
 ═══════════════════════════════════════════════════════
 """
 
+import csv
+import gzip
+import heapq
+import io
 import os
-import smtplib
+import threading
+from email.mime.application import MIMEApplication
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List
+from html import escape
+from string import Template
+from typing import Iterable, Iterator, List, Optional, Sequence
 from pydantic import BaseModel, Field
+from core.config import config
+from core.mailer import mail_queue
 
 
 class IssuePayload(BaseModel):
     severity: str
     description: str
     suggestion: str
+    line: Optional[int] = None
 
 
 class ReviewPayload(BaseModel):
@@ -27,7 +41,9 @@ class ReviewPayload(BaseModel):
 
 class ReportRequest(BaseModel):
     email: str = Field(..., description="Recipient's email address")
-    reviews: List[ReviewPayload] = Field(..., description="All code reviews in the session")
+    session_id: Optional[str] = Field(None, description="Server-side session whose reviews to report")
+    reviews: Optional[List[ReviewPayload]] = Field(
+        None, description="All code reviews in the session (legacy clients without a session_id)")
 
 
 def _severity_color(severity: str) -> str:
@@ -51,57 +67,8 @@ def _score_label(score: float) -> str:
     return "Critical Issues 🚨"
 
 
-def build_html_report(reviews: List[ReviewPayload], recipient_email: str) -> str:
-    """Build a premium HTML email with all reviews and average score."""
-    avg_score = round(sum(r.quality_score for r in reviews) / len(reviews), 1)
-    avg_color = _score_color(avg_score)
-    avg_label = _score_label(avg_score)
-    total = len(reviews)
-
-    # Build each review block
-    review_blocks = ""
-    for idx, review in enumerate(reviews, start=1):
-        score_color = _score_color(review.quality_score)
-        issues_html = ""
-        for issue in review.issues:
-            c = _severity_color(issue.severity)
-            issues_html += f"""
-            <div style="margin:10px 0; padding:12px 16px; background:#1a1a1a;
-                        border-left:3px solid {c}; border-radius:6px;">
-                <span style="font-size:11px; font-weight:700; color:{c};
-                             text-transform:uppercase; letter-spacing:0.05em;">
-                    {issue.severity}
-                </span>
-                <p style="margin:6px 0 4px; color:#e0e0e0; font-size:14px;">
-                    {issue.description}
-                </p>
-                <p style="margin:0; color:#888; font-size:13px;">
-                    💡 {issue.suggestion}
-                </p>
-            </div>"""
-
-        if not issues_html:
-            issues_html = '<p style="color:#22c55e;">No issues found — clean code! ✅</p>'
-
-        review_blocks += f"""
-        <div style="margin:24px 0; padding:20px; background:#111; border:1px solid #222;
-                    border-radius:12px;">
-            <div style="display:flex; justify-content:space-between; align-items:center;
-                        margin-bottom:16px;">
-                <h3 style="margin:0; color:#f0f0f0; font-size:16px;">
-                    Review #{idx}
-                </h3>
-                <span style="font-size:22px; font-weight:800; color:{score_color};
-                             font-family:monospace;">
-                    {review.quality_score}/10
-                </span>
-            </div>
-            <h4 style="margin:0 0 8px; color:#888; font-size:12px;
-                       text-transform:uppercase; letter-spacing:0.06em;">Issues Found</h4>
-            {issues_html}
-        </div>"""
-
-    html = f"""
+# ─── Templates (compiled once at import) ───
+_HEAD = Template("""
 <!DOCTYPE html>
 <html>
 <head><meta charset="UTF-8"><meta name="viewport" content="width=device-width,initial-scale=1"></head>
@@ -133,20 +100,20 @@ def build_html_report(reviews: List[ReviewPayload], recipient_email: str) -> str
               Session Average Score
             </p>
             <div style="display:flex; align-items:baseline; gap:12px;">
-              <span style="font-size:52px; font-weight:900; color:{avg_color};
+              <span style="font-size:52px; font-weight:900; color:$avg_color;
                            font-family:monospace; line-height:1;">
-                {avg_score}
+                $avg_score
               </span>
               <div>
                 <span style="font-size:20px; color:#444;">/10</span><br>
-                <span style="font-size:15px; font-weight:600; color:{avg_color};">
-                  {avg_label}
+                <span style="font-size:15px; font-weight:600; color:$avg_color;">
+                  $avg_label
                 </span>
               </div>
             </div>
             <p style="margin:14px 0 0; font-size:14px; color:#555;">
-              Based on <strong style="color:#888;">{total} code review{"s" if total > 1 else ""}</strong>
-              in this session.
+              Based on <strong style="color:#888;">$total code review$plural</strong>
+              in this session — $high high, $medium medium and $low low severity issues.
             </p>
           </td>
         </tr>
@@ -155,12 +122,47 @@ def build_html_report(reviews: List[ReviewPayload], recipient_email: str) -> str
         <tr>
           <td style="padding:24px 32px;">
             <h2 style="margin:0 0 4px; font-size:16px; font-weight:700; color:#f0f0f0;">
-              Detailed Reviews
+              $reviews_title
             </h2>
             <p style="margin:0 0 20px; font-size:13px; color:#555;">
-              Each code snippet you submitted during this session:
-            </p>
-            {review_blocks}
+              $reviews_subtitle
+            </p>""")
+
+_REVIEW_OPEN = Template("""
+        <div style="margin:24px 0; padding:20px; background:#111; border:1px solid #222;
+                    border-radius:12px;">
+            <div style="display:flex; justify-content:space-between; align-items:center;
+                        margin-bottom:16px;">
+                <h3 style="margin:0; color:#f0f0f0; font-size:16px;">
+                    Review #$idx
+                </h3>
+                <span style="font-size:22px; font-weight:800; color:$score_color;
+                             font-family:monospace;">
+                    $score/10
+                </span>
+            </div>
+            <h4 style="margin:0 0 8px; color:#888; font-size:12px;
+                       text-transform:uppercase; letter-spacing:0.06em;">Issues Found</h4>""")
+
+_ISSUE = Template("""
+            <div style="margin:10px 0; padding:12px 16px; background:#1a1a1a;
+                        border-left:3px solid $color; border-radius:6px;">
+                <span style="font-size:11px; font-weight:700; color:$color;
+                             text-transform:uppercase; letter-spacing:0.05em;">
+                    $severity
+                </span>
+                <p style="margin:6px 0 4px; color:#e0e0e0; font-size:14px;">
+                    $description
+                </p>
+                <p style="margin:0; color:#888; font-size:13px;">
+                    💡 $suggestion
+                </p>
+            </div>""")
+
+_NO_ISSUES = '\n            <p style="color:#22c55e;">No issues found — clean code! ✅</p>'
+_REVIEW_CLOSE = "\n        </div>"
+
+_TAIL = """
           </td>
         </tr>
 
@@ -180,31 +182,142 @@ def build_html_report(reviews: List[ReviewPayload], recipient_email: str) -> str
   </table>
 </body>
 </html>"""
-    return html
 
 
-def send_session_report(request: ReportRequest) -> bool:
-    """Send the session summary email. Returns True on success, False on failure."""
-    sender_email = os.getenv("EMAIL_ADDRESS")
-    password = os.getenv("EMAIL_APP_PASSWORD")
+# Reviews below may be ReviewPayloads or stored ReviewReports — both have the same fields.
+def _session_totals(reviews: Sequence[ReviewPayload]) -> dict:
+    """Average score and issue counts by severity, in one pass."""
+    counts = {"high": 0, "medium": 0, "low": 0}
+    score_sum = 0.0
+    for review in reviews:
+        score_sum += review.quality_score
+        for issue in review.issues:
+            key = issue.severity.lower()
+            counts[key if key in counts else "low"] += 1
+    return {"avg_score": round(score_sum / len(reviews), 1), **counts}
+
+
+def render_html_report(reviews: Sequence[ReviewPayload], inline_limit: int = None,
+                       totals: dict = None) -> Iterator[str]:
+    """
+    Yield the HTML email piece by piece. Only the `inline_limit` lowest-scoring
+    reviews are rendered inline; the rest live in the attachments. Pass
+    `totals` when they are already known (session store) to skip a pass.
+    """
+    inline_limit = config.REPORT_INLINE_REVIEWS if inline_limit is None else inline_limit
+    totals = totals or _session_totals(reviews)
+    total = len(reviews)
+    avg_color = _score_color(totals["avg_score"])
+
+    # Worst first; ties keep session order. O(n log k), not a full sort.
+    worst = heapq.nsmallest(inline_limit, enumerate(reviews, start=1),
+                            key=lambda pair: (pair[1].quality_score, pair[0]))
+    if len(worst) < total:
+        title = f"Lowest-Scoring Reviews ({len(worst)} of {total})"
+        subtitle = "The full session is attached as CSV and JSON."
+    else:
+        title = "Detailed Reviews"
+        subtitle = "Each code snippet you submitted during this session:"
+
+    yield _HEAD.substitute(
+        avg_color=avg_color, avg_score=totals["avg_score"], avg_label=_score_label(totals["avg_score"]),
+        total=total, plural="s" if total > 1 else "", high=totals["high"], medium=totals["medium"],
+        low=totals["low"], reviews_title=title, reviews_subtitle=subtitle,
+    )
+    for idx, review in worst:
+        yield _REVIEW_OPEN.substitute(idx=idx, score=review.quality_score,
+                                      score_color=_score_color(review.quality_score))
+        if not review.issues:
+            yield _NO_ISSUES
+        for issue in review.issues:
+            yield _ISSUE.substitute(
+                color=_severity_color(issue.severity), severity=escape(issue.severity),
+                description=escape(issue.description), suggestion=escape(issue.suggestion),
+            )
+        yield _REVIEW_CLOSE
+    yield _TAIL
 
-    if not sender_email or not password:
-        raise RuntimeError("Email credentials not configured on the server.")
 
-    avg_score = round(sum(r.quality_score for r in request.reviews) / len(request.reviews), 1)
+def build_html_report(reviews: Sequence[ReviewPayload], totals: dict = None) -> str:
+    """Build a premium HTML email with the session average and the worst reviews."""
+    return "".join(render_html_report(reviews, totals=totals))
+
 
-    message = MIMEMultipart("alternative")
+# ─── Attachments ───
+def _csv_rows(reviews: Iterable[ReviewPayload]) -> Iterator[list]:
+    yield ["review", "quality_score", "severity", "line", "description", "suggestion"]
+    for idx, review in enumerate(reviews, start=1):
+        if not review.issues:
+            yield [idx, review.quality_score, "", "", "", ""]
+        for issue in review.issues:
+            yield [idx, review.quality_score, issue.severity, issue.line or "",
+                   issue.description, issue.suggestion]
+
+
+def build_csv_attachment(reviews: Sequence[ReviewPayload]) -> bytes:
+    """One row per issue (or per clean review), gzip-compressed as it is written."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as gz:
+        text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+        csv.writer(text).writerows(_csv_rows(reviews))
+        text.flush()
+        text.detach()
+    return buffer.getvalue()
+
+
+def build_json_attachment(reviews: Sequence[ReviewPayload]) -> bytes:
+    """The full session as a JSON array, gzip-compressed one review at a time."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as gz:
+        gz.write(b"[")
+        for i, review in enumerate(reviews):
+            if i:
+                gz.write(b",\n")
+            gz.write(review.model_dump_json().encode("utf-8"))
+        gz.write(b"]\n")
+    return buffer.getvalue()
+
+
+def build_report_message(reviews: Sequence[ReviewPayload], sender: str, recipient: str,
+                         totals: dict = None) -> MIMEMultipart:
+    """HTML body (worst reviews inline) plus the full session as gzipped CSV and JSON."""
+    totals = totals or _session_totals(reviews)
+    avg_score = totals["avg_score"]
+
+    message = MIMEMultipart("mixed")
     message["Subject"] = (
-        f"📊 RedGlyph Session Report — {len(request.reviews)} Reviews | Avg Score: {avg_score}/10"
+        f"📊 RedGlyph Session Report — {len(reviews)} Reviews | Avg Score: {avg_score}/10"
     )
-    message["From"] = sender_email
-    message["To"] = request.email
-
-    html_body = build_html_report(request.reviews, request.email)
-    message.attach(MIMEText(html_body, "html"))
+    message["From"] = sender
+    message["To"] = recipient
+
+    body = MIMEMultipart("alternative")
+    body.attach(MIMEText(build_html_report(reviews, totals=totals), "html", "utf-8"))
+    message.attach(body)
+
+    for name, payload in (("session_reviews.csv.gz", build_csv_attachment(reviews)),
+                          ("session_reviews.json.gz", build_json_attachment(reviews))):
+        part = MIMEApplication(payload, "gzip")
+        part.add_header("Content-Disposition", "attachment", filename=name)
+        message.attach(part)
+    return message
+
+
+def send_session_report(email: str, reviews: Sequence[ReviewPayload], totals: dict = None,
+                        cancel: threading.Event = None) -> bool:
+    """
+    Queue the session summary email for background delivery. Returns True once
+    queued; raises MailQueueFull if the delivery queue is at capacity.
+    Returns False without queueing if `cancel` was set while the report rendered.
+    """
+    sender_email = os.getenv("EMAIL_ADDRESS")
+    password = os.getenv("EMAIL_APP_PASSWORD")
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login(sender_email, password)
-        server.sendmail(sender_email, request.email, message.as_string())
+    if not sender_email or not password:
+        raise RuntimeError("Email credentials not configured on the server.")
 
+    message = build_report_message(reviews, sender_email, email, totals)
+    if cancel is not None and cancel.is_set():
+        return False  # the requester is gone; don't mail a report nobody is waiting on
+    mail_queue.enqueue(message, sender_email, [email])
     return True
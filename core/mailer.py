@@ -0,0 +1,140 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Background Mail Delivery
+ A bounded queue drained by one worker thread that keeps
+ a single authenticated SMTP connection open, reconnects
+ on failure and retries with exponential backoff.
+═══════════════════════════════════════════════════════
+"""
+
+import os
+import queue
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import List, Optional
+from core.config import config
+
+
+class MailQueueFull(Exception):
+    """Raised when the delivery queue is at capacity."""
+
+
+class MailQueue:
+    """Fire-and-forget email delivery off the request path."""
+
+    _STOP = object()
+
+    def __init__(self, host: str, port: int, use_ssl: bool, max_size: int,
+                 max_retries: int, backoff_seconds: float, idle_seconds: float):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.idle_seconds = idle_seconds
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_size)
+        self._conn: Optional[smtplib.SMTP] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, message: Message, sender: str, recipients: List[str]) -> None:
+        """Queue a message for delivery and return immediately."""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((message, sender, recipients))
+        except queue.Full:
+            raise MailQueueFull("Email queue is full — try again shortly.")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Deliver what is already queued, then stop the worker."""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "sent": self.sent,
+                "failed": self.failed, "retries": self.retries}
+
+    # ─── Worker ───
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="mail-queue", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                self._close()  # don't hold an idle connection open forever
+                continue
+            if item is self._STOP:
+                self._close()
+                return
+            self._deliver(*item)
+
+    def _deliver(self, message: Message, sender: str, recipients: List[str]):
+        body = message.as_string()
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._connection().sendmail(sender, recipients, body)
+                self.sent += 1
+                print(f"✅ Email sent to {', '.join(recipients)}")
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                self._close()
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    print(f"❌ Failed to send email after {attempt + 1} attempts: {e}")
+                    return
+                self.retries += 1
+                time.sleep(self.backoff_seconds * (2 ** attempt))
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._conn is not None:
+            return self._conn
+
+        if self.use_ssl:
+            conn = smtplib.SMTP_SSL(self.host, self.port, timeout=30)
+            conn.ehlo()
+        else:
+            conn = smtplib.SMTP(self.host, self.port, timeout=30)
+            conn.ehlo()
+            if conn.has_extn("starttls"):
+                conn.starttls()
+                conn.ehlo()
+
+        # Local SMTP stand-ins usually don't offer AUTH
+        sender = os.getenv("EMAIL_ADDRESS")
+        password = os.getenv("EMAIL_APP_PASSWORD")
+        if sender and password and conn.has_extn("auth"):
+            conn.login(sender, password)
+
+        self._conn = conn
+        return conn
+
+    def _close(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._conn = None
+
+
+mail_queue = MailQueue(
+    host=config.SMTP_HOST,
+    port=config.SMTP_PORT,
+    use_ssl=config.SMTP_USE_SSL,
+    max_size=config.MAIL_QUEUE_SIZE,
+    max_retries=config.MAIL_MAX_RETRIES,
+    backoff_seconds=config.MAIL_RETRY_BACKOFF_SECONDS,
+    idle_seconds=config.SMTP_IDLE_SECONDS,
+)
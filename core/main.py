@@ -3,26 +3,65 @@
  REDGLYPH — AI Code Reviewer (FastAPI Backend)
  
  Features:
-   • Serves the frontend as static files
+   • Serves the frontend from memory: content-hashed, precompressed, immutable
+   • Large JSON responses compressed per Accept-Encoding (gzip, brotli optional)
    • Proxies review requests through LangGraph
+   • MODEL_ROUTING picks a lite / flash / pro model tier per review, escalating on doubt
    • Supports custom user API keys via X-Custom-API-Key header
-   • Audit logging on every request
+     (compiled graphs pooled per key, keyed by a salted hash)
+   • Content-addressed review cache (memory + optional SQLite)
+   • Async graph runs behind a global concurrency cap (503 when saturated)
+   • /review/stream emits issues as NDJSON while the review runs
+   • /review/batch reviews many files under a per-key concurrency budget
+   • /webhook reviews GitHub pushes from a local clone in the background
+   • Sessions (POST /session) keep their reviews server-side; /send-report takes the ID
+   • Emails go out on a background queue over a persistent SMTP connection
+   • Audit logging on every request (batched off-thread, stats at /audit/stats)
+   • Per-stage latency, in-flight and token metrics at /metrics (Prometheus)
+   • WORKERS > 1 runs several processes sharing cache, sessions and rate limits
+   • Heavy AI imports load in a background prewarm (/health/live vs /health/ready)
+   • Per-request deadlines (X-Request-Timeout); client disconnects cancel the work
    • CORS enabled for local development
    • API key is NEVER exposed to the frontend
 ═══════════════════════════════════════════════════════════════
 """
 
+import json
+import os
+import secrets
+import sqlite3
+import threading
 import time
+import asyncio
 from pathlib import Path
+import uuid
+from typing import List, Optional
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.convertors import register_url_convertor
 from pydantic import BaseModel
-from agents.reviewer_graph import get_default_graph, create_graph
+from schemas.state import ReviewIssue, ReviewReport
+from agents.reviewer_graph import graph_pool
+from agents.chunking import issue_key
 from core.config import config
-from core.audit import log_review
+from core.audit import log_review, log_batch, log_auth_event, audit_stats, audit_writer, shared_audit_stats
+from core.cache import review_cache
+from core.concurrency import review_gate, batch_budgets, ServiceSaturated
+from core.review_service import run_review, ReviewTrace, language_for_path
+from core.rate_limit import RateLimited
+from core.deadline import (TIMEOUT_HEADER, ClientDisconnected, DeadlineExceeded, request_deadline,
+                           until_disconnected)
+from core.singleflight import review_flights
 from core.email_report import send_session_report, ReportRequest
+from core.mailer import mail_queue, MailQueueFull
+from core.session_store import session_store
+from core.metrics import registry, COMPONENT
+from core.webhook import push_reviews, PushJob, PushQueueFull, is_commit_sha, verify_signature
+from core.prewarm import prewarm
+from core.assets import AssetPipeline, FileNameConvertor
+from core.compression import CompressionMiddleware
+from datetime import datetime, timezone
 import uvicorn
 
 
@@ -42,122 +81,501 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ─── Metrics: each scrape reaches one worker, so its samples say which ───
+if config.WORKERS > 1:
+    registry.set_constant_labels(worker=os.getpid())
+
+# ─── Compression (large JSON / text bodies; NDJSON streams and assets pass through) ───
+app.add_middleware(CompressionMiddleware, minimum_size=config.COMPRESS_MIN_BYTES)
+
 
 # ─── Request Schema ───
 class CodeRequest(BaseModel):
     code: str
+    language: Optional[str] = None
+    prior_review_id: Optional[str] = None  # re-review only what changed since this review
+    session_id: Optional[str] = None  # session from POST /session the result is added to; none = no session
+
+
+class BatchItem(CodeRequest):
+    path: str
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+
+
+def _client_ip(raw_request: Request) -> str:
+    return raw_request.client.host if raw_request.client else "unknown"
+
+
+def _http_error(e: Exception) -> HTTPException:
+    """Map a pipeline failure to the HTTP error the frontend expects."""
+    if isinstance(e, ServiceSaturated):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    if isinstance(e, RateLimited):
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    if isinstance(e, DeadlineExceeded):
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, ClientDisconnected):
+        return HTTPException(status_code=499, detail=str(e))  # nobody is left to read it
+    print(f"❌ Error: {e}")
+    return HTTPException(status_code=500, detail=str(e))
+
+
+async def _join_session(session_id: Optional[str], report: ReviewReport) -> dict:
+    """Add the review to the client's session; the session fields for the response."""
+    if not session_id:
+        return {}
+    try:
+        session = await session_store.aappend(session_id, report)
+    except sqlite3.OperationalError as e:
+        # The review itself succeeded; a session write stuck behind another worker's lock doesn't fail it
+        print(f"⚠️  Session write skipped: {e}")
+        return {}
+    return {"session_id": session.id, "session": session.stats.summary()}
+
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event) + "\n"
 
 
 # ─── Review Endpoint ───
 @app.post("/review")
 async def review_code(request: CodeRequest, raw_request: Request):
     start_time = time.time()
-    client_ip = raw_request.client.host if raw_request.client else "unknown"
+    client_ip = _client_ip(raw_request)
     custom_key = raw_request.headers.get("X-Custom-API-Key")
     api_mode = "custom" if custom_key else "default"
+    trace = ReviewTrace()
 
     try:
         print(f"🚀 Review request from {client_ip} (mode: {api_mode})")
-
-        # Use custom API key if provided, otherwise use default graph
-        if custom_key:
-            custom_graph = create_graph(api_key=custom_key)
-            result = custom_graph.invoke({"code_snippet": request.code})
-        else:
-            result = get_default_graph().invoke({"code_snippet": request.code})
-
-        report = result["report"]
+        # A client that gives up (e.g. the frontend's abort) takes its model and email work with it
+        report = await until_disconnected(raw_request, run_review(
+            request.code, request.language, api_key=custom_key, trace=trace,
+            prior_review_id=request.prior_review_id, deadline=request_deadline(raw_request)))
         duration_ms = (time.time() - start_time) * 1000
 
         # Audit log (no API keys logged!)
         log_review(
             request_ip=client_ip,
-            language="auto",
+            language=request.language or "auto",
             code_length=len(request.code),
             api_mode=api_mode,
             score=report.quality_score,
             issues_count=len(report.issues),
             duration_ms=duration_ms,
+            cache_stats=review_cache.stats(),
+            trace=trace.audit_fields(),
         )
 
-        return report
+        return {**report.model_dump(), "review_id": trace.review_id,
+                **await _join_session(request.session_id, report)}
 
     except Exception as e:
         duration_ms = (time.time() - start_time) * 1000
         log_review(
             request_ip=client_ip,
-            language="auto",
+            language=request.language or "auto",
             code_length=len(request.code),
             api_mode=api_mode,
             duration_ms=duration_ms,
             error=str(e),
+            cache_stats=review_cache.stats(),
+            trace=trace.audit_fields(),
         )
+        raise _http_error(e)
+
+
+# ─── Streaming Review Endpoint (NDJSON) ───
+@app.post("/review/stream")
+async def review_code_stream(request: CodeRequest, raw_request: Request):
+    """
+    Same review as /review, streamed as newline-delimited JSON events:
+      {"event": "progress", ...}  pipeline stages and finished chunks
+      {"event": "issue", "issue": {...}}  each issue as soon as it is known
+      {"event": "done", "quality_score": ..., "review_id": ..., "report": {...},
+       "session_id": ..., "session": {"reviews": ..., "average_score": ...}}  (session fields with session_id)
+      {"event": "error", "status": ..., "detail": ...}
+    """
+    start_time = time.time()
+    client_ip = _client_ip(raw_request)
+    custom_key = raw_request.headers.get("X-Custom-API-Key")
+    api_mode = "custom" if custom_key else "default"
+
+    # Reject before the 200 + headers go out, so saturation is still a real 503
+    if review_gate.saturated:
+        raise _http_error(ServiceSaturated("Review queue is full — try again shortly."))
+
+    trace = ReviewTrace()
+    events: asyncio.Queue = asyncio.Queue()
+    deadline = request_deadline(raw_request)
+
+    def audit_fields() -> dict:
+        return dict(
+            request_ip=client_ip,
+            language=request.language or "auto",
+            code_length=len(request.code),
+            api_mode=api_mode,
+            duration_ms=(time.time() - start_time) * 1000,
+            cache_stats=review_cache.stats(),
+            streamed=True,
+            trace=trace.audit_fields(),
+        )
+
+    async def produce():
+        try:
+            report = await run_review(request.code, request.language, api_key=custom_key,
+                                      on_event=events.put_nowait, trace=trace,
+                                      prior_review_id=request.prior_review_id, deadline=deadline)
+            events.put_nowait(("report", report))
+        except Exception as e:
+            events.put_nowait(("error", e))
+
+    async def stream():
+        print(f"🚀 Streaming review request from {client_ip} (mode: {api_mode})")
+        task = asyncio.create_task(produce())
+        sent = set()
+        first_issue_ms = None
+
+        def issue_event(issue: ReviewIssue):
+            nonlocal first_issue_ms
+            key = issue_key(issue)
+            if key in sent:
+                return None
+            sent.add(key)
+            if first_issue_ms is None:
+                first_issue_ms = (time.time() - start_time) * 1000
+            return _ndjson({"event": "issue", "issue": issue.model_dump()})
+
+        try:
+            yield _ndjson({"event": "progress", "stage": "queued"})
+            while True:
+                item = await events.get()
+                if isinstance(item, dict):
+                    line = issue_event(ReviewIssue(**item["issue"])) if item["event"] == "issue" else _ndjson(item)
+                    if line:
+                        yield line
+                    continue
+
+                kind, value = item
+                audit = audit_fields()
+                if kind == "error":
+                    error = _http_error(value)
+                    log_review(**audit, error=str(value))
+                    yield _ndjson({"event": "error", "status": error.status_code, "detail": error.detail})
+                    break
+
+                # Cache hits (and non-streaming models) still deliver every issue before "done"
+                for issue in value.issues:
+                    line = issue_event(issue)
+                    if line:
+                        yield line
+                log_review(**audit, score=value.quality_score, issues_count=len(value.issues),
+                           time_to_first_issue_ms=first_issue_ms)
+                done = {
+                    "event": "done",
+                    "quality_score": value.quality_score,
+                    "issues_count": len(value.issues),
+                    "review_id": trace.review_id,
+                    "report": value.model_dump(),
+                }
+                done.update(await _join_session(request.session_id, value))
+                yield _ndjson(done)
+                break
+        finally:
+            if not task.done():
+                # The client disconnected mid-stream (Starlette cancels the response)
+                task.cancel()
+                trace.cancelled = True
+                log_review(**audit_fields(), error="Client disconnected.")
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 
-        if "429" in str(e):
-            raise HTTPException(
-                status_code=429,
-                detail="AI is taking a coffee break (Rate Limit). Try again in 60s!"
-            )
-        print(f"❌ Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+# ─── Batch Review Endpoint (NDJSON, completion order) ───
+@app.post("/review/batch")
+async def review_batch(batch: BatchRequest, raw_request: Request):
+    """
+    Review many {path, code} items. Items share the global review gate and a
+    per-API-key concurrency budget; one NDJSON line is streamed per item as it
+    finishes, followed by a summary line.
+    """
+    start_time = time.time()
+    client_ip = _client_ip(raw_request)
+    custom_key = raw_request.headers.get("X-Custom-API-Key")
+    api_mode = "custom" if custom_key else "default"
+    budget_key = graph_pool.key_for(custom_key)
+
+    if not batch.items:
+        raise HTTPException(status_code=400, detail="No items to review.")
+    if len(batch.items) > config.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batches are limited to {config.BATCH_MAX_ITEMS} items.")
+
+    batch_id = uuid.uuid4().hex[:12]
+    # With X-Request-Timeout the whole batch shares one deadline; otherwise each file gets the default
+    deadline = request_deadline(raw_request) if TIMEOUT_HEADER in raw_request.headers else None
+    print(f"📚 Batch {batch_id} from {client_ip}: {len(batch.items)} files (mode: {api_mode})")
+
+    async def review_item(item: BatchItem) -> dict:
+        item_start = time.time()
+        language = item.language or language_for_path(item.path)
+        trace = ReviewTrace()
+        audit = dict(request_ip=client_ip, language=language or "auto", code_length=len(item.code),
+                     api_mode=api_mode, batch_id=batch_id, path=item.path)
+        try:
+            async with batch_budgets.slot(budget_key):
+                report = await run_review(item.code, language, api_key=custom_key, trace=trace, shed=False,
+                                          prior_review_id=item.prior_review_id, deadline=deadline)
+        except Exception as e:
+            error = _http_error(e)
+            log_review(**audit, duration_ms=(time.time() - item_start) * 1000, error=str(e),
+                       trace=trace.audit_fields())
+            return {"event": "item", "path": item.path, "status": "error",
+                    "error_status": error.status_code, "detail": error.detail}
+
+        duration_ms = (time.time() - item_start) * 1000
+        log_review(**audit, score=report.quality_score, issues_count=len(report.issues),
+                   duration_ms=duration_ms, trace=trace.audit_fields())
+        return {"event": "item", "path": item.path, "status": "ok", "cache": trace.cache_status,
+                "duration_ms": round(duration_ms, 2), "review_id": trace.review_id,
+                "report": report.model_dump()}
+
+    async def stream():
+        tasks = [asyncio.create_task(review_item(item)) for item in batch.items]
+        scores, failed, cache_hits = [], 0, 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result["status"] == "ok":
+                    scores.append(result["report"]["quality_score"])
+                    cache_hits += result["cache"] == "hit"
+                else:
+                    failed += 1
+                yield _ndjson(result)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        duration_ms = (time.time() - start_time) * 1000
+        avg_score = sum(scores) / len(scores) if scores else None
+        log_batch(request_ip=client_ip, batch_id=batch_id, api_mode=api_mode, items=len(tasks),
+                  succeeded=len(scores), failed=failed, duration_ms=duration_ms,
+                  avg_score=avg_score, cache_hits=cache_hits)
+        yield _ndjson({
+            "event": "summary",
+            "batch_id": batch_id,
+            "items": len(tasks),
+            "succeeded": len(scores),
+            "failed": failed,
+            "average_score": round(avg_score, 1) if avg_score is not None else None,
+            "duration_ms": round(duration_ms, 2),
+        })
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# ─── Lifecycle ───
+@app.on_event("startup")
+async def start_prewarm():
+    """Serve right away; LangChain, the model client and the default graph load in the background."""
+    prewarm.start()
+    # Fingerprinting and compressing the frontend takes milliseconds — done before the first page
+    await asyncio.to_thread(assets.build)
+
+
+@app.on_event("shutdown")
+async def flush_background_queues():
+    """Give already-queued emails and audit events a chance to land before exit."""
+    await push_reviews.stop()
+    mail_queue.stop()
+    audit_writer.stop()
 
 
 # ─── Health Check ───
 @app.get("/health")
 @app.get("/")
 def health_check():
-    return {"status": "RedGlyph Reviewer API is Online 🟢", "version": "2.0.0"}
+    return {
+        "status": "RedGlyph Reviewer API is Online 🟢",
+        "version": "2.0.0",
+        "graph_pool": graph_pool.stats(),
+    }
+
+
+@app.get("/health/live")
+def liveness():
+    """The process is up and serving HTTP — says nothing about being able to review yet."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def readiness():
+    """503 until the startup prewarm has compiled the graph and built the model client."""
+    body = {"status": "ready" if prewarm.ready else prewarm.state, "prewarm": prewarm.stats()}
+    return JSONResponse(body, status_code=200 if prewarm.ready else 503)
+
+
+# ─── Audit Stats ───
+@app.get("/audit/stats")
+def get_audit_stats():
+    """
+    Latency percentiles, error rate and score distribution since server start.
+    With several workers these cover all of them (read from the audit SQLite
+    store); "writer" is always the answering worker's own queue.
+    """
+    if shared_audit_stats is not None:
+        audit_writer.flush()  # this worker's own recent events
+        return {**shared_audit_stats.snapshot(), "scope": "all_workers", "writer": audit_writer.stats()}
+    return {**audit_stats.snapshot(), "scope": "worker", "writer": audit_writer.stats()}
+
+
+# ─── Prometheus Metrics ───
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition: stage latency histograms, in-flight gauges, sizes, tokens."""
+    components = {
+        "graph_pool": graph_pool.stats(),
+        "review_cache": review_cache.stats(),
+        "review_gate": review_gate.stats(),
+        "review_flights": {"in_flight": review_flights.in_flight()},
+        "mail_queue": mail_queue.stats(),
+        "audit_writer": audit_writer.stats(),
+        "push_reviews": push_reviews.stats(),
+        "session_store": session_store.stats(),
+        "prewarm": {"ready": int(prewarm.ready)},
+        "frontend_assets": assets.stats(),
+    }
+    for component, stats in components.items():
+        for field, value in stats.items():
+            COMPONENT.set(value, component=component, field=field)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+# ─── Sessions ───
+@app.post("/session")
+def start_session():
+    """Start a review session; reviews sent with its session_id are kept for /send-report."""
+    session = session_store.start()
+    return {"session_id": session.id, "session": session.stats.summary()}
 
 
 # ─── Session Report ───
 @app.post("/send-report")
 async def send_report(report_request: ReportRequest, raw_request: Request):
-    client_ip = raw_request.client.host if raw_request.client else "unknown"
-
-    if not report_request.reviews:
-        raise HTTPException(status_code=400, detail="No reviews to report.")
     if not report_request.email or "@" not in report_request.email:
         raise HTTPException(status_code=400, detail="Please provide a valid email address.")
 
+    if report_request.session_id:
+        session = await session_store.aget(report_request.session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session expired — start a new one and run a review.")
+        with session.lock:
+            reviews, totals = list(session.reviews), session.stats.totals()
+    else:
+        reviews, totals = report_request.reviews, None
+    if not reviews:
+        raise HTTPException(status_code=400, detail="No reviews to report.")
+
+    cancel = threading.Event()
     try:
-        send_session_report(report_request)
-        avg = round(sum(r.quality_score for r in report_request.reviews) / len(report_request.reviews), 1)
-        print(f"📧 Session report sent to {report_request.email} | {len(report_request.reviews)} reviews | avg: {avg}")
+        # Rendering and compressing a long session is CPU work — keep it off the event loop.
+        # If the client leaves (or the deadline passes) first, the rendered report is not queued.
+        await until_disconnected(
+            raw_request, asyncio.to_thread(send_session_report, report_request.email, reviews, totals, cancel),
+            deadline=request_deadline(raw_request), cancel=cancel)
+        avg = totals["avg_score"] if totals else round(sum(r.quality_score for r in reviews) / len(reviews), 1)
+        print(f"📧 Session report queued for {report_request.email} | {len(reviews)} reviews | avg: {avg}")
         return {
-            "status": "sent",
+            "status": "queued",
             "recipient": report_request.email,
-            "total_reviews": len(report_request.reviews),
+            "total_reviews": len(reviews),
             "average_score": avg,
         }
-    except RuntimeError as e:
+    except (RuntimeError, MailQueueFull) as e:
         raise HTTPException(status_code=503, detail=str(e))
+    except (ClientDisconnected, DeadlineExceeded) as e:
+        print(f"⏭️  Session report for {report_request.email} abandoned: {e}")
+        raise _http_error(e)
     except Exception as e:
         print(f"❌ Email error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
 
 
-
 # ─── Webhook (GitHub integration) ───
-@app.post("/webhook")
+@app.post("/webhook", status_code=202)
 async def github_webhook(request: Request):
-    payload = await request.json()
-    commit_msg = payload.get("commits", [{}])[0].get("message", "No message")
-    repo_name = payload.get("repository", {}).get("full_name")
-    print(f"📦 New Push in {repo_name}: {commit_msg}")
-    return {"status": "Webhook Received 🟢"}
+    """
+    GitHub push webhook. Returns 202 with a job ID straight away; the pushed
+    files are reviewed in the background (poll /webhook/jobs/{job_id}).
+    """
+    client_ip = _client_ip(request)
+    body = await request.body()
+    if config.WEBHOOK_SECRET and not verify_signature(
+            config.WEBHOOK_SECRET, body, request.headers.get("X-Hub-Signature-256")):
+        log_auth_event(client_ip, "webhook_signature_rejected")
+        raise HTTPException(status_code=401, detail="Invalid webhook signature.")
+
+    event = request.headers.get("X-GitHub-Event", "push")
+    if event == "ping":
+        return {"status": "pong"}
+    if event != "push":
+        return {"status": "ignored", "event": event}
+    if not config.WEBHOOK_REPO_PATH:
+        # Acknowledged, so GitHub doesn't mark the hook as failing and retry it
+        return {"status": "ignored", "reason": "not configured (WEBHOOK_REPO_PATH)"}
 
+    payload = json.loads(body or b"{}")
+    after, before = payload.get("after"), payload.get("before")
+    if not is_commit_sha(after) or (before is not None and not is_commit_sha(before)):
+        raise HTTPException(status_code=400, detail="'before' and 'after' must be 40-character commit SHAs.")
+    if payload.get("deleted") or after == "0" * 40:
+        return {"status": "ignored", "reason": "no commits to review"}
+
+    job = PushJob(
+        repo=payload.get("repository", {}).get("full_name") or "unknown",
+        ref=payload.get("ref") or "",
+        before=before,
+        after=after,
+    )
+    try:
+        push_reviews.submit(job)
+    except PushQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    print(f"📦 New Push in {job.repo}: queued review job {job.id}")
+    return {"status": "queued", "job_id": job.id, "status_url": f"/webhook/jobs/{job.id}"}
 
-# ─── Serve Frontend (Static Files) ───
+
+@app.get("/webhook/jobs/{job_id}")
+def get_webhook_job(job_id: str):
+    """Progress and per-file results of a push review job."""
+    snapshot = push_reviews.snapshot(job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Unknown job ID.")
+    return snapshot
+
+
+# ─── Serve Frontend (in-memory, fingerprinted, precompressed) ───
 frontend_dir = Path(__file__).parent.parent / "frontend"
+assets = AssetPipeline(frontend_dir)
+register_url_convertor("filename", FileNameConvertor())
 if frontend_dir.exists():
     # Serve index.html at /app
-    @app.get("/app")
-    async def serve_frontend():
-        return FileResponse(frontend_dir / "index.html")
+    @app.get("/app", include_in_schema=False)
+    async def serve_frontend(request: Request):
+        return assets.response(request, "/index.html")
+
+    # CSS / JS by plain or content-hashed name (pages link the hashed one)
+    @app.get("/css/{name}", include_in_schema=False)
+    @app.get("/js/{name}", include_in_schema=False)
+    async def serve_asset(request: Request):
+        return assets.response(request, request.url.path)
 
-    # Serve static assets (CSS, JS)
-    app.mount("/css", StaticFiles(directory=frontend_dir / "css"), name="css")
-    app.mount("/js", StaticFiles(directory=frontend_dir / "js"), name="js")
+    # Top-level files (about.html, the favicon, ...) — only names with an extension, so no API route is shadowed
+    @app.get("/{name:filename}", include_in_schema=False)
+    async def serve_top_level_asset(request: Request):
+        return assets.response(request, request.url.path)
 
 
 # ─── Entrypoint ───
@@ -166,5 +584,14 @@ if __name__ == "__main__":
     print(f"  🚀 RedGlyph AI Code Reviewer v2.0")
     print(f"  📡 API:      http://localhost:{config.PORT}")
     print(f"  🎨 Frontend: http://localhost:{config.PORT}/app")
+    if config.WORKERS > 1:
+        print(f"  🧵 Workers:  {config.WORKERS} (shared state: {config.SHARED_STATE_DB_PATH})")
     print(f"{'═'*50}\n")
-    uvicorn.run(app, host=config.HOST, port=config.PORT)
\ No newline at end of file
+    if config.WORKERS > 1:
+        # Workers import the app themselves; they inherit this salt so API key ids match across them
+        os.environ.setdefault("KEY_ID_SALT", secrets.token_hex(16))
+        os.environ.setdefault("SERVER_STARTED_AT", datetime.now(timezone.utc).isoformat())
+        os.environ.setdefault("SHARED_STATE_DB_PATH", config.SHARED_STATE_DB_PATH)
+        uvicorn.run("core.main:app", host=config.HOST, port=config.PORT, workers=config.WORKERS)
+    else:
+        uvicorn.run(app, host=config.HOST, port=config.PORT)
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Metrics
+ Minimal Prometheus-compatible counters, gauges and
+ histograms (no client library). Each update is a dict
+ lookup plus a bisect under a lock, so it stays on in prod.
+═══════════════════════════════════════════════════════
+"""
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+
+def _escape(value) -> str:
+    # Exposition format: backslash, double quote and newline must be escaped in label values
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(names: Sequence[str], values: Tuple, const: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = [*const, *zip(names, values)]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def render(self, const: Sequence[Tuple[str, str]] = ()) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self, const=()):
+        lines = super().render()
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_label_str(self.label_names, key, const)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the block as in flight while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets: Sequence[float] = ()):
+        super().__init__(name, help_text, labels)
+        self.buckets = list(buckets)
+        # key -> [one count per bucket, overflow (> last bound), sum, count]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 3)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self, const=()):
+        lines = super().render()
+        with self._lock:
+            for key, series in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _label_str(self.label_names + ("le",), key + (bound,), const)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                # +Inf is every observation, overflow included, so it always equals _count
+                labels = _label_str(self.label_names + ("le",), key + ("+Inf",), const)
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                base = _label_str(self.label_names, key, const)
+                lines.append(f"{self.name}_sum{base} {series[-2]}")
+                lines.append(f"{self.name}_count{base} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._const: Tuple[Tuple[str, str], ...] = ()
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def set_constant_labels(self, **labels):
+        """Labels added to every sample, e.g. which worker process answered the scrape."""
+        self._const = tuple((name, str(value)) for name, value in labels.items())
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(self._const))
+        return "\n".join(lines) + "\n"
+
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+
+registry = Registry()
+STAGE_SECONDS = registry.register(Histogram(
+    "redglyph_stage_seconds", "Latency of each pipeline stage.", ["stage"], LATENCY_BUCKETS))
+INFLIGHT = registry.register(Gauge(
+    "redglyph_inflight", "Work currently in flight.", ["kind"]))
+REVIEWS = registry.register(Counter(
+    "redglyph_reviews_total", "Finished reviews by outcome.", ["outcome", "cache"]))
+PROMPT_CHARS = registry.register(Counter(
+    "redglyph_prompt_chars_total", "Characters sent to the model."))
+PROMPT_TOKENS = registry.register(Counter(
+    "redglyph_prompt_tokens_estimated_total", "Estimated prompt tokens before and after compaction.", ["kind"]))
+RESPONSE_CHARS = registry.register(Counter(
+    "redglyph_response_chars_total", "Characters of structured output received from the model."))
+TOKENS = registry.register(Counter(
+    "redglyph_tokens_total", "Tokens reported by the model response.", ["type"]))
+MODEL_ROUTES = registry.register(Counter(
+    "redglyph_model_routes_total", "Reviews routed to each model tier, and chunks escalated to it.", ["tier", "kind"]))
+MODEL_TIER_SECONDS = registry.register(Histogram(
+    "redglyph_model_tier_seconds", "Structured model calls per tier, retries included.", ["tier"], LATENCY_BUCKETS))
+MODEL_COST = registry.register(Counter(
+    "redglyph_model_cost_usd_estimated_total", "Model cost estimated from prompt/response sizes and tier prices.",
+    ["tier"]))
+COMPONENT = registry.register(Gauge(
+    "redglyph_component", "Point-in-time component state, refreshed on scrape.", ["component", "field"]))
+
+
+def timed_stage(stage: str):
+    """Decorator: observe the wrapped (sync or async) function into STAGE_SECONDS."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with STAGE_SECONDS.time(stage=stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with STAGE_SECONDS.time(stage=stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
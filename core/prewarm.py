@@ -0,0 +1,75 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Startup Prewarm & Readiness
+ The app serves HTTP (and liveness) before its heavy
+ dependencies load. A background task then imports
+ LangChain / LangGraph, builds the model client and
+ compiles the default graph; readiness waits for it.
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+import time
+from typing import Optional
+from agents.reviewer_graph import graph_pool
+from core.config import config
+from core.metrics import STAGE_SECONDS
+
+
+class Prewarm:
+    """pending → warming → ready | failed. Started once per process on app startup."""
+
+    def __init__(self):
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self.default_graph = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    async def wait(self):
+        """Until the prewarm has finished (however it ended); returns at once if it never started."""
+        if self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)  # a caller giving up must not cancel the prewarm
+
+    def start(self):
+        """Schedule the prewarm on the running loop; a no-op if it already started."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        self.state = "warming"
+        started = time.perf_counter()
+        try:
+            # Imports and graph compilation are blocking — keep them off the event loop
+            await asyncio.to_thread(self._warm)
+        except Exception as e:
+            self.state, self.error = "failed", str(e)
+            print(f"❌ Prewarm failed: {e}")
+        else:
+            self.state = "ready"
+        self.seconds = round(time.perf_counter() - started, 3)
+        if self.ready:
+            print(f"🔥 Prewarm done in {self.seconds}s (default graph: {self.default_graph})")
+
+    def _warm(self):
+        with STAGE_SECONDS.time(stage="prewarm"):
+            import langgraph.graph  # noqa: F401
+            if config.LLM_BACKEND != "fake":
+                import langchain_google_genai  # noqa: F401
+                import agents.model_usage  # noqa: F401
+            # Without a server key only bring-your-own-key reviews are possible; their
+            # graphs are built per key on first use, so warm imports are all we can do.
+            if config.GOOGLE_API_KEY or config.LLM_BACKEND == "fake":
+                graph_pool.get(None)  # builds the model client and compiles the graph
+                self.default_graph = True
+
+    def stats(self) -> dict:
+        return {"state": self.state, "seconds": self.seconds,
+                "default_graph": self.default_graph, "error": self.error}
+
+
+prewarm = Prewarm()
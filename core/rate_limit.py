@@ -0,0 +1,269 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Adaptive Rate Limiting
+ Per-API-key token buckets in front of the model call.
+ The refill rate learns the upstream quota from 429s
+ (AIMD); callers queue FIFO and retry with jittered
+ exponential backoff until their deadline. With several
+ worker processes the buckets live in SQLite, so all of
+ them draw from one learned quota per key.
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+from core.config import config
+from core.metrics import Counter, registry
+
+T = TypeVar("T")
+
+RETRIES = registry.register(Counter(
+    "redglyph_model_retries_total", "Model calls retried after a 429."))
+SHED = registry.register(Counter(
+    "redglyph_model_shed_total", "Model calls given up because the deadline could not be met."))
+
+
+class RateLimited(Exception):
+    """The model call could not be made (or retried) before the request deadline."""
+
+    def __init__(self, message: str, retries: int = 0):
+        super().__init__(message)
+        self.retries = retries
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """
+    True for quota errors: a 429 status code or Google's typed ResourceExhausted,
+    on the exception or anything it was raised from. Message text is never
+    consulted — a line number or token count can contain "429".
+    """
+    try:
+        from google.api_core.exceptions import ResourceExhausted  # ~0.1 s import: only once a call fails
+    except ImportError:  # LLM_BACKEND=fake without the Gemini client installed
+        ResourceExhausted = ()
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, ResourceExhausted):
+            return True
+        code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+        if callable(code):
+            code = code()  # gRPC errors: a StatusCode enum
+        if code == 429 or getattr(code, "name", None) == "RESOURCE_EXHAUSTED":
+            return True
+        exc = exc.__cause__
+    return False
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket with a learned refill rate: halved on every 429, nudged up
+    after every success. Waiters are served strictly in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: float, max_rate: float,
+                 increase: float):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()  # FIFO: asyncio.Lock wakes waiters in order
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, deadline: Optional[float] = None):
+        """Wait for a token, or raise RateLimited if it can't arrive before `deadline`."""
+        async with self._lock:
+            self._refill()
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise RateLimited("Model quota exhausted for this API key — request shed.")
+            if wait:
+                await asyncio.sleep(wait)
+                self._refill()
+            self.tokens -= 1
+
+    async def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    async def on_rate_limited(self):
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class _SharedBucketRows:
+    """Bucket state (tokens, rate, last refill) per key id in a SQLite table shared by processes."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=config.SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rate_buckets ("
+                           "key TEXT PRIMARY KEY, tokens REAL, rate REAL, updated REAL)")
+        self._conn.commit()
+
+    def _refilled(self, key_id: str, bucket: AdaptiveTokenBucket, now: float) -> Tuple[float, float]:
+        row = self._conn.execute("SELECT tokens, rate, updated FROM rate_buckets WHERE key = ?",
+                                 (key_id,)).fetchone()
+        if row is None:
+            return bucket.burst, bucket.rate
+        tokens, rate, updated = row
+        return min(bucket.burst, tokens + max(0.0, now - updated) * rate), rate
+
+    def _save(self, key_id: str, tokens: float, rate: float, now: float):
+        self._conn.execute("INSERT OR REPLACE INTO rate_buckets VALUES (?, ?, ?, ?)",
+                           (key_id, tokens, rate, now))
+
+    def reserve(self, key_id: str, bucket: AdaptiveTokenBucket, deadline: Optional[float]) -> Optional[float]:
+        """Take a token (possibly one not yet refilled) and return the wait; None if past `deadline`."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            now = time.time()  # wall clock: the rows are read by other processes
+            tokens, rate = self._refilled(key_id, bucket, now)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return None
+            self._save(key_id, tokens - 1, rate, now)
+        bucket.rate, bucket.tokens = rate, tokens - 1  # local mirror, for stats only
+        return wait
+
+    def adjust(self, key_id: str, bucket: AdaptiveTokenBucket, rate_limited: bool):
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            tokens, rate = self._refilled(key_id, bucket, now)
+            if rate_limited:
+                rate, tokens = max(bucket.min_rate, rate / 2), min(tokens, 0.0)
+            else:
+                rate = min(bucket.max_rate, rate + bucket.increase)
+            self._save(key_id, tokens, rate, now)
+        bucket.rate = rate
+
+
+class SharedTokenBucket(AdaptiveTokenBucket):
+    """
+    AdaptiveTokenBucket whose tokens and learned rate are shared between
+    worker processes. A caller that has to wait reserves its token first
+    (the count goes negative), so waiters are still served in arrival order.
+    SQLite work runs on a worker thread; if another process holds the lock
+    past the busy timeout, the call is shed and a rate adjustment skipped.
+    """
+
+    def __init__(self, rows: _SharedBucketRows, key_id: str, **kwargs):
+        super().__init__(**kwargs)
+        self.rows = rows
+        self.key_id = key_id
+
+    async def acquire(self, deadline: Optional[float] = None):
+        async with self._lock:  # keeps this process's callers in order
+            try:
+                wait = await asyncio.to_thread(self.rows.reserve, self.key_id, self, deadline)
+            except sqlite3.OperationalError as e:
+                raise RateLimited(f"Shared rate limiter busy ({e}) — request shed.") from e
+        if wait is None:
+            raise RateLimited("Model quota exhausted for this API key — request shed.")
+        if wait:
+            await asyncio.sleep(wait)
+
+    async def _adjust(self, rate_limited: bool):
+        try:
+            await asyncio.to_thread(self.rows.adjust, self.key_id, self, rate_limited)
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  Rate adjustment skipped: {e}")
+
+    async def on_success(self):
+        await self._adjust(rate_limited=False)
+
+    async def on_rate_limited(self):
+        await self._adjust(rate_limited=True)
+
+
+class RateLimiterRegistry:
+    """
+    One bucket per API key id (the graph pool's salted hash, never the raw key).
+    With `db_path`, buckets are SharedTokenBucket rows in that SQLite file.
+    """
+
+    def __init__(self, db_path: str = ""):
+        self._buckets: Dict[str, AdaptiveTokenBucket] = {}
+        self._shared = _SharedBucketRows(db_path) if db_path else None
+
+    def bucket(self, key_id: str) -> AdaptiveTokenBucket:
+        bucket = self._buckets.get(key_id)
+        if bucket is None:
+            settings = dict(
+                rate=config.RATE_LIMIT_RPS,
+                burst=config.RATE_LIMIT_BURST,
+                min_rate=config.RATE_LIMIT_MIN_RPS,
+                max_rate=config.RATE_LIMIT_MAX_RPS,
+                increase=config.RATE_LIMIT_INCREASE,
+            )
+            bucket = self._buckets[key_id] = (
+                SharedTokenBucket(self._shared, key_id, **settings) if self._shared
+                else AdaptiveTokenBucket(**settings)
+            )
+        return bucket
+
+    def drop(self, key_id: str):
+        self._buckets.pop(key_id, None)
+
+
+async def call_with_retry(fn: Callable[[], Awaitable[T]], bucket: AdaptiveTokenBucket,
+                          deadline: Optional[float] = None,
+                          max_retries: int = None, base_delay: float = None,
+                          max_delay: float = None,
+                          on_retry: Callable[[], None] = None) -> T:
+    """
+    Call `fn` through `bucket`, retrying 429s with full-jitter exponential
+    backoff. Other errors propagate untouched. Raises RateLimited when the
+    next attempt would land past `deadline` (a time.monotonic() value) or
+    the retries run out.
+    """
+    max_retries = config.RETRY_MAX_ATTEMPTS if max_retries is None else max_retries
+    base_delay = config.RETRY_BASE_DELAY_SECONDS if base_delay is None else base_delay
+    max_delay = config.RETRY_MAX_DELAY_SECONDS if max_delay is None else max_delay
+
+    attempt = 0
+    while True:
+        try:
+            await bucket.acquire(deadline)
+        except RateLimited as e:
+            SHED.inc()
+            e.retries = attempt
+            raise
+        try:
+            result = await fn()
+        except Exception as e:
+            if not is_rate_limit_error(e):
+                raise
+            await bucket.on_rate_limited()
+            if attempt >= max_retries:
+                SHED.inc()
+                raise RateLimited(f"Model quota exhausted after {attempt} retries — request shed.",
+                                  retries=attempt) from e
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            if deadline is not None and time.monotonic() + delay > deadline:
+                SHED.inc()
+                raise RateLimited("Model quota exhausted and the request deadline is near — request shed.",
+                                  retries=attempt) from e
+            attempt += 1
+            RETRIES.inc()
+            if on_retry:
+                on_retry()
+            await asyncio.sleep(delay)
+            continue
+        await bucket.on_success()
+        return result
+
+
+rate_limiters = RateLimiterRegistry(config.SHARED_STATE_DB_PATH)
@@ -0,0 +1,210 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Review Service
+ The review pipeline shared by every endpoint:
+ cache lookup → incremental diff → single-flight →
+ concurrency gate → pooled LangGraph.
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Callable, Optional, Tuple
+from agents.reviewer_graph import aget_graph, PROMPT_VERSION
+from agents.incremental import plan_incremental
+from agents.routing import cache_model_id
+from core.cache import review_cache, make_cache_key
+from core.concurrency import review_gate
+from core.review_store import review_store
+from core.config import config
+from core.deadline import DeadlineExceeded, remaining
+from core.metrics import STAGE_SECONDS, INFLIGHT, REVIEWS
+from core.prewarm import prewarm
+from core.rate_limit import RateLimited
+from core.singleflight import review_flights
+from schemas.state import ReviewReport
+
+
+EXTENSION_LANGUAGES = {".py": "python", ".js": "javascript", ".ts": "typescript",
+                       ".java": "java", ".go": "go", ".rs": "rust", ".cpp": "cpp", ".c": "c"}
+
+
+def language_for_path(path: str) -> Optional[str]:
+    """Review language implied by a file name, or None if it isn't one we review."""
+    return EXTENSION_LANGUAGES.get(PurePosixPath(path).suffix.lower())
+
+
+@dataclass
+class ReviewTrace:
+    """Per-request facts collected along the pipeline, destined for the audit log."""
+    cache_status: str = "off"
+    retries: int = 0
+    shed: bool = False
+    coalesce_role: str = None  # "leader" made the model call, "follower" shared it
+    review_id: str = None
+    incremental: bool = False
+    reviewed_lines: int = 0    # lines actually sent to the model
+    short_circuit: bool = False  # local checks were conclusive, no model call
+    static_ms: float = None      # local static-analysis latency
+    tokens_original: int = None  # estimated prompt tokens before / after compaction
+    tokens_compacted: int = None
+    model_tier: str = None       # tier the router picked ("lite" | "flash" | "pro")
+    escalations: int = 0         # chunks re-reviewed one tier up
+    model_cost_usd: float = None  # estimated from prompt/response sizes and tier prices
+    timed_out: bool = False      # ran past its deadline and was cancelled
+    cancelled: bool = False      # the client went away and the work was cancelled
+
+    def audit_fields(self) -> dict:
+        """What this trace records in the audit log: log_review()'s `trace` argument."""
+        return {
+            "cache_status": self.cache_status,
+            "retries": self.retries,
+            "shed": self.shed,
+            "coalesce_role": self.coalesce_role,
+            "incremental": self.incremental,
+            "reviewed_lines": self.reviewed_lines,
+            "short_circuit": self.short_circuit,
+            "static_ms": self.static_ms,
+            "tokens_original": self.tokens_original,
+            "tokens_compacted": self.tokens_compacted,
+            "model_tier": self.model_tier,
+            "escalations": self.escalations,
+            "model_cost_usd": self.model_cost_usd,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+        }
+
+
+async def run_review(code: str, language: str = None, api_key: str = None,
+                     on_event: Optional[Callable[[dict], None]] = None,
+                     trace: ReviewTrace = None, shed: bool = True,
+                     prior_review_id: str = None, deadline: float = None) -> ReviewReport:
+    """
+    Review one snippet. `on_event` receives progress/issue events as they
+    happen (used for streaming); `trace` is filled in for the audit log.
+    `shed=False` waits for a slot instead of failing fast when saturated.
+    With `prior_review_id`, only the lines changed since that review are sent
+    to the model. The result is stored under a new `trace.review_id`.
+    `deadline` (time.monotonic(); default REVIEW_DEADLINE_SECONDS from now)
+    bounds the whole review — past it, DeadlineExceeded is raised.
+    """
+    trace = trace if trace is not None else ReviewTrace()
+    deadline = deadline if deadline is not None else time.monotonic() + config.REVIEW_DEADLINE_SECONDS
+    with INFLIGHT.track(kind="reviews"):
+        try:
+            # Leaving a coalesced flight only cancels the model call if nobody else waits on it
+            async with asyncio.timeout(remaining(deadline)):
+                report = await _run_review(code, language, api_key, on_event, trace, shed,
+                                           prior_review_id, deadline)
+        except TimeoutError:
+            trace.timed_out = True
+            REVIEWS.inc(outcome="timeout", cache=trace.cache_status)
+            raise DeadlineExceeded("The review did not finish before the request deadline.") from None
+        except asyncio.CancelledError:
+            trace.cancelled = True
+            REVIEWS.inc(outcome="cancelled", cache=trace.cache_status)
+            raise
+        except RateLimited as e:
+            trace.shed, trace.retries = True, e.retries
+            REVIEWS.inc(outcome="shed", cache=trace.cache_status)
+            raise
+        except Exception:
+            REVIEWS.inc(outcome="error", cache=trace.cache_status)
+            raise
+    REVIEWS.inc(outcome="ok", cache=trace.cache_status)
+    trace.review_id = await review_store.aput(code, report)
+    return report
+
+
+async def _incremental_state(code: str, prior_review_id: str, trace: ReviewTrace) -> Optional[dict]:
+    """Extra graph state for a diff-only review, or None to review the whole file."""
+    prior = await review_store.aget(prior_review_id)
+    if prior is None:
+        return None
+    prior_code, prior_report = prior
+    plan = plan_incremental(prior_code, code, prior_report, config.INCREMENTAL_CONTEXT_LINES)
+    if plan.changed_ratio > config.INCREMENTAL_MAX_CHANGED_RATIO:
+        return None
+    trace.incremental = True
+    return {"hunks": plan.hunks, "carried": plan.carried, "unchanged_lines": plan.unchanged_lines}
+
+
+async def _run_review(code, language, api_key, on_event, trace: ReviewTrace, shed,
+                      prior_review_id, deadline: float) -> ReviewReport:
+    review_key = make_cache_key(code, PROMPT_VERSION, cache_model_id(), language=language)
+    cache_key = review_key if config.CACHE_ENABLED else None
+
+    if cache_key:
+        trace.cache_status = "miss"
+        with STAGE_SECONDS.time(stage="cache_lookup"):
+            report = await review_cache.aget(cache_key)
+        if report is not None:
+            trace.cache_status = "hit"
+            return report
+
+    extra_state = await _incremental_state(code, prior_review_id, trace) if prior_review_id else None
+    if extra_state is not None and not extra_state["hunks"]:
+        return extra_state["carried"]  # nothing changed since the prior review
+    trace.reviewed_lines = (
+        sum(h.size for h in extra_state["hunks"]) if extra_state else code.count("\n") + 1
+    )
+
+    # Identical reviews already in flight share one model call
+    trace.coalesce_role = "follower" if review_flights.has(review_key) else "leader"
+    (report, run), leader = await review_flights.do(
+        review_key, lambda: _invoke_graph(code, language, api_key, on_event, shed, cache_key, extra_state,
+                                        deadline)
+    )
+    trace.short_circuit = run["short_circuit"]
+    if leader:
+        trace.retries, trace.static_ms = run["retries"], run["static_ms"]
+        trace.tokens_original, trace.tokens_compacted = run["tokens"].get("original"), run["tokens"].get("compacted")
+        routing = run["routing"]
+        if routing:
+            trace.model_tier, trace.escalations = routing["tier"], routing["escalations"]
+            trace.model_cost_usd = routing["cost_usd"]
+    return report
+
+
+async def _invoke_graph(code, language, api_key, on_event, shed, cache_key,
+                        extra_state: Optional[dict], deadline: float) -> Tuple[ReviewReport, dict]:
+    # Pooled graph for the custom API key if provided, otherwise the default graph. A review
+    # that beats the startup prewarm waits for it rather than repeating its imports and build.
+    await prewarm.wait()
+    graph = await aget_graph(api_key)
+    # Nodes running on executor threads can't be interrupted; they check this instead
+    cancelled = threading.Event()
+    run_config = {"configurable": {"on_event": on_event, "cancelled": cancelled}}
+    state = {
+        "code_snippet": code,
+        "language": language,
+        "deadline": deadline,
+        **(extra_state or {}),
+    }
+    queued_at = time.perf_counter()
+    try:
+        async with review_gate.slot(shed=shed):
+            STAGE_SECONDS.observe(time.perf_counter() - queued_at, stage="queue_wait")
+            if on_event:
+                on_event({"event": "progress", "stage": "started"})
+            result = await graph.ainvoke(state, config=run_config)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+
+    # Only model reviews are cached: failures reach every waiter uncached, and a
+    # short-circuit verdict is cheap to recompute and must not outlive its inputs
+    report = result["report"]
+    short_circuit = result.get("chunks") is None
+    if cache_key and not short_circuit:
+        await review_cache.aset(cache_key, report)
+    return report, {
+        "retries": result.get("retries") or 0,
+        "short_circuit": short_circuit,
+        "static_ms": result.get("static_ms"),
+        "tokens": result.get("tokens") or {},
+        "routing": result.get("routing"),
+    }
@@ -0,0 +1,54 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Review Store
+ Recent (code, report) pairs keyed by review ID, so a
+ resubmission can be diffed against its prior version.
+ Memory LRU with TTL, plus an optional SQLite tier.
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+import json
+import uuid
+from typing import Optional, Tuple
+from core.cache import MemoryTier, SQLiteTier
+from core.config import config
+from schemas.state import ReviewReport
+
+
+class ReviewStore:
+    def __init__(self, max_entries: int, ttl_seconds: float, db_path: str = ""):
+        self.memory = MemoryTier(max_entries, ttl_seconds)
+        self.disk = SQLiteTier(db_path, "review_store", ttl_seconds) if db_path else None
+
+    def put(self, code: str, report: ReviewReport) -> str:
+        """Remember this review and return its new ID."""
+        review_id = uuid.uuid4().hex
+        self.memory.set(review_id, (code, report.model_copy(deep=True)))
+        if self.disk is not None:
+            self.disk.set(review_id, json.dumps({"code": code, "report": report.model_dump()}))
+        return review_id
+
+    def get(self, review_id: str) -> Optional[Tuple[str, ReviewReport]]:
+        item = self.memory.get(review_id)
+        if item is None and self.disk is not None:
+            raw = self.disk.get(review_id)
+            if raw is not None:
+                data = json.loads(raw)
+                item = (data["code"], ReviewReport.model_validate(data["report"]))
+                self.memory.set(review_id, item)
+        return item
+
+    # From the event loop: with a SQLite tier, reads and writes run on a worker thread
+    async def aput(self, code: str, report: ReviewReport) -> str:
+        return self.put(code, report) if self.disk is None else await asyncio.to_thread(self.put, code, report)
+
+    async def aget(self, review_id: str) -> Optional[Tuple[str, ReviewReport]]:
+        return self.get(review_id) if self.disk is None else await asyncio.to_thread(self.get, review_id)
+
+
+review_store = ReviewStore(
+    max_entries=config.REVIEW_STORE_MAX_ENTRIES,
+    ttl_seconds=config.REVIEW_STORE_TTL_SECONDS,
+    db_path=config.REVIEW_STORE_DB_PATH or config.SHARED_STATE_DB_PATH,
+)
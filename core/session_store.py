@@ -0,0 +1,252 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Session Store
+ Reviews made in one browser session, kept server-side
+ so /send-report only needs the session ID. Aggregates
+ are updated on every append, never recomputed.
+ Memory LRU with TTL, plus an optional SQLite tier that
+ worker processes can share.
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Optional
+from core.cache import MemoryTier
+from core.config import config
+from schemas.state import ReviewReport
+
+
+@dataclass
+class SessionStats:
+    """Running totals over the reviews currently held by a session."""
+    reviews: int = 0
+    score_sum: float = 0.0
+    high: int = 0
+    medium: int = 0
+    low: int = 0
+
+    def _apply(self, report: ReviewReport, sign: int):
+        self.reviews += sign
+        self.score_sum += sign * report.quality_score
+        for issue in report.issues:
+            key = issue.severity.strip().lower()
+            key = key if key in ("high", "medium") else "low"
+            setattr(self, key, getattr(self, key) + sign)
+
+    def add(self, report: ReviewReport):
+        self._apply(report, 1)
+
+    def remove(self, report: ReviewReport):
+        self._apply(report, -1)
+
+    @property
+    def average(self) -> float:
+        return round(self.score_sum / self.reviews, 1) if self.reviews else 0.0
+
+    def summary(self) -> dict:
+        return {"reviews": self.reviews, "average_score": self.average}
+
+    def totals(self) -> dict:
+        """Same shape as the email report's own totals."""
+        return {"avg_score": self.average, "high": self.high, "medium": self.medium, "low": self.low}
+
+
+@dataclass
+class Session:
+    id: str
+    reviews: Deque[ReviewReport] = field(default_factory=deque)
+    stats: SessionStats = field(default_factory=SessionStats)
+    next_seq: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class _SQLiteSessions:
+    """Append-only review rows plus one aggregate row per session."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=config.SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " id TEXT PRIMARY KEY, reviews INTEGER, score_sum REAL, high INTEGER,"
+            " medium INTEGER, low INTEGER, next_seq INTEGER, expires_at REAL);"
+            "CREATE TABLE IF NOT EXISTS session_reviews ("
+            " session_id TEXT, seq INTEGER, report TEXT, PRIMARY KEY (session_id, seq));"
+            "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);"
+        )
+        self._conn.commit()
+
+    def _write(self, session: Session, report: ReviewReport, seq: int, keep_from: int, ttl: float):
+        s = session.stats
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (session.id, s.reviews, s.score_sum, s.high, s.medium, s.low,
+             session.next_seq, time.time() + ttl),
+        )
+        self._conn.execute("INSERT OR REPLACE INTO session_reviews VALUES (?, ?, ?)",
+                           (session.id, seq, report.model_dump_json()))
+        self._conn.execute("DELETE FROM session_reviews WHERE session_id = ? AND seq < ?",
+                           (session.id, keep_from))
+
+    def create(self, session: Session, ttl: float):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO sessions VALUES (?, 0, 0, 0, 0, 0, 0, ?)",
+                               (session.id, time.time() + ttl))
+
+    def append(self, session: Session, report: ReviewReport, seq: int, keep_from: int, ttl: float):
+        with self._lock, self._conn:
+            self._write(session, report, seq, keep_from, ttl)
+
+    def append_shared(self, session_id: Optional[str], report: ReviewReport, max_reviews: int,
+                      ttl: float) -> Session:
+        """
+        Read-modify-write of one session under a SQLite write lock, for when
+        other processes append to the same sessions. The returned session
+        carries its ID and stats only, not the reviews.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT reviews, score_sum, high, medium, low, next_seq FROM sessions"
+                " WHERE id = ? AND expires_at >= ?", (session_id, time.time())
+            ).fetchone() if session_id else None
+            if row is None:
+                session = Session(id=uuid.uuid4().hex)
+            else:
+                session = Session(id=session_id, stats=SessionStats(*row[:5]), next_seq=row[5])
+
+            seq = session.next_seq
+            session.next_seq += 1
+            session.stats.add(report)
+            keep_from = session.next_seq - max_reviews
+            for (raw,) in self._conn.execute(
+                    "SELECT report FROM session_reviews WHERE session_id = ? AND seq < ?",
+                    (session.id, keep_from)).fetchall():
+                session.stats.remove(ReviewReport.model_validate_json(raw))
+            self._write(session, report, seq, keep_from, ttl)
+        return session
+
+    def load(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT reviews, score_sum, high, medium, low, next_seq, expires_at"
+                " FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None or row[6] < time.time():
+                return None
+            reports = self._conn.execute(
+                "SELECT report FROM session_reviews WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return Session(
+            id=session_id,
+            reviews=deque(ReviewReport.model_validate_json(r[0]) for r in reports),
+            stats=SessionStats(row[0], row[1], row[2], row[3], row[4]),
+            next_seq=row[5],
+        )
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            now = time.time()
+            self._conn.execute("DELETE FROM session_reviews WHERE session_id IN"
+                               " (SELECT id FROM sessions WHERE expires_at < ?)", (now,))
+            return self._conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,)).rowcount
+
+
+class SessionStore:
+    """
+    Sessions idle longer than the TTL expire; each keeps its latest `max_reviews`
+    reviews. With `shared`, several processes use the same SQLite file, so
+    every read and append goes to SQLite instead of the memory tier.
+    """
+
+    _PURGE_EVERY = 500  # appends between sweeps of expired SQLite rows
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_reviews: int, db_path: str = "",
+                 shared: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.max_reviews = max_reviews
+        self.memory = MemoryTier(max_sessions, ttl_seconds)
+        self.disk = _SQLiteSessions(db_path) if db_path else None
+        self.shared = shared and self.disk is not None
+        self._appends = 0
+
+    def get(self, session_id: Optional[str]) -> Optional[Session]:
+        if not session_id:
+            return None
+        if self.shared:
+            return self.disk.load(session_id)
+        session = self.memory.get(session_id)
+        if session is None and self.disk is not None:
+            session = self.disk.load(session_id)
+            if session is not None:
+                self.memory.set(session_id, session)
+        return session
+
+    def start(self) -> Session:
+        """A new, empty session with a server-issued ID (POST /session)."""
+        session = Session(id=uuid.uuid4().hex)
+        if self.disk is not None:
+            self.disk.create(session, self.ttl_seconds)
+        if not self.shared:
+            self.memory.set(session.id, session)
+        return session
+
+    def append(self, session_id: str, report: ReviewReport) -> Session:
+        """
+        Add a review to the session and return the session. Sessions are
+        created by start(); an ID that has since expired (or that a restart
+        without SQLite forgot) continues under a fresh server-issued ID.
+        """
+        if self.shared:
+            session = self.disk.append_shared(session_id, report, self.max_reviews, self.ttl_seconds)
+            self._purge_now_and_then()
+            return session
+
+        session = self.get(session_id) or Session(id=uuid.uuid4().hex)
+        with session.lock:
+            seq = session.next_seq
+            session.next_seq += 1
+            session.reviews.append(report)
+            session.stats.add(report)
+            while len(session.reviews) > self.max_reviews:
+                session.stats.remove(session.reviews.popleft())
+            if self.disk is not None:
+                self.disk.append(session, report, seq, session.next_seq - self.max_reviews,
+                                 self.ttl_seconds)
+        self.memory.set(session.id, session)  # refreshes the TTL
+        self._purge_now_and_then()
+        return session
+
+    # From the event loop: with a SQLite tier, reads and writes run on a worker thread.
+    # A write that can't get another worker's lock in time raises sqlite3.OperationalError.
+    async def aget(self, session_id: Optional[str]) -> Optional[Session]:
+        return self.get(session_id) if self.disk is None else await asyncio.to_thread(self.get, session_id)
+
+    async def aappend(self, session_id: str, report: ReviewReport) -> Session:
+        if self.disk is None:
+            return self.append(session_id, report)
+        return await asyncio.to_thread(self.append, session_id, report)
+
+    def _purge_now_and_then(self):
+        self._appends += 1
+        if self.disk is not None and self._appends % self._PURGE_EVERY == 0:
+            self.disk.purge_expired()
+
+    def stats(self) -> dict:
+        return {"sessions": len(self.memory), "evictions": self.memory.evictions, "appends": self._appends}
+
+
+session_store = SessionStore(
+    max_sessions=config.SESSION_MAX_SESSIONS,
+    ttl_seconds=config.SESSION_TTL_SECONDS,
+    max_reviews=config.SESSION_MAX_REVIEWS,
+    db_path=config.SESSION_DB_PATH or config.SHARED_STATE_DB_PATH,
+    shared=config.WORKERS > 1,
+)
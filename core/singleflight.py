@@ -0,0 +1,63 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — Single-Flight Request Coalescing
+ Concurrent identical reviews share one in-flight model
+ call. The first caller leads; the rest follow.
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    `do(key, fn)` runs fn() once per key at a time; concurrent callers await the
+    same task. A cancelled waiter never cancels the shared call while others still
+    wait on it; when the last waiter leaves, the call is cancelled. Failures reach
+    every waiter and the key is released, so the next caller starts afresh.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def has(self, key: str) -> bool:
+        """True if a call for `key` is running (so do() would join it as a follower)."""
+        return key in self._flights
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Returns (result, is_leader)."""
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda _: self._release(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), leader
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()
+
+    def _release(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception as retrieved even if every waiter already left
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+
+review_flights = SingleFlight()
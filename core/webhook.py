@@ -0,0 +1,361 @@
+"""
+═══════════════════════════════════════════════════════
+ REDGLYPH — GitHub Push Reviews
+ Resolves a push against a local clone with plain git,
+ reviews every changed blob in parallel on a background
+ job queue, and skips blobs already reviewed (persistent
+ blob SHA → report index). With several worker
+ processes, job status is mirrored to the shared SQLite
+ file so any worker can answer /webhook/jobs/{id}.
+═══════════════════════════════════════════════════════
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import re
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from agents.reviewer_graph import PROMPT_VERSION
+from agents.routing import cache_model_id
+from core.audit import log_review, log_batch
+from core.cache import MemoryTier, SQLiteTier
+from core.config import config
+from core.metrics import STAGE_SECONDS
+from core.review_service import run_review, ReviewTrace, language_for_path
+from schemas.state import ReviewReport
+
+_ZERO_SHA = "0" * 40
+_COMMIT_SHA = re.compile(r"[0-9a-f]{40}")  # full SHA-1; the all-zero SHA stands for "no commit"
+_SKIP_MODES = {"160000", "120000"}  # submodules and symlinks have no reviewable content
+
+
+class GitError(Exception):
+    """A git command against the local clone failed."""
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check GitHub's X-Hub-Signature-256 header against the raw request body."""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+def is_commit_sha(value) -> bool:
+    """True for a full 40-hex commit SHA (GitHub sends the all-zero SHA for a missing side)."""
+    return isinstance(value, str) and _COMMIT_SHA.fullmatch(value) is not None
+
+
+def _check_sha(sha: str) -> str:
+    # Never hand git anything that could parse as an option or a revision expression
+    if not is_commit_sha(sha):
+        raise GitError(f"Not a commit SHA: {sha!r:.60}")
+    return sha
+
+
+# ─── Local Clone ───
+class GitRepo:
+    """Read-only view of a clone on disk, driven through the `git` CLI."""
+
+    def __init__(self, path: str, remote: str = "origin"):
+        self.path = path
+        self.remote = remote
+
+    async def _git(self, *args: str, check: bool = True) -> Tuple[int, bytes]:
+        proc = await asyncio.create_subprocess_exec(
+            "git", "-C", self.path, *args,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        out, err = await proc.communicate()
+        if check and proc.returncode != 0:
+            raise GitError(f"git {args[0]} failed: {err.decode('utf-8', 'replace').strip()}")
+        return proc.returncode, out
+
+    async def has_commit(self, sha: str) -> bool:
+        code, _ = await self._git("cat-file", "-e", f"{_check_sha(sha)}^{{commit}}", check=False)
+        return code == 0
+
+    async def ensure_commit(self, sha: str):
+        """Fetch from the remote if the pushed commit isn't in the clone yet."""
+        if await self.has_commit(sha):
+            return
+        with STAGE_SECONDS.time(stage="git_fetch"):
+            await self._git("fetch", "--quiet", self.remote)
+        if not await self.has_commit(sha):
+            raise GitError(f"Commit {sha[:12]} not found after fetching {self.remote}.")
+
+    async def changed_blobs(self, before: Optional[str], after: str) -> List[Tuple[str, str]]:
+        """(path, blob_sha) for every file added or modified between two commits."""
+        _check_sha(after)
+        if before is not None:
+            _check_sha(before)
+        if before and before != _ZERO_SHA and await self.has_commit(before):
+            args = ("diff-tree", "-r", "-z", "--no-renames", "--diff-filter=AM", before, after)
+        else:
+            # New branch or unknown base: the pushed head commit against its parent
+            args = ("diff-tree", "-r", "-z", "--no-renames", "--diff-filter=AM", "--root", after)
+        _, out = await self._git(*args)
+
+        # -z raw output: ":<old mode> <new mode> <old sha> <new sha> <status>\0<path>\0" per file,
+        # preceded by the commit id when diff-tree is given a single commit
+        fields = iter(out.decode("utf-8", "replace").split("\0"))
+        blobs = []
+        for meta in fields:
+            if not meta.startswith(":"):
+                continue
+            path = next(fields, "")
+            _, new_mode, _, new_sha, _ = meta[1:].split(" ", 4)
+            if new_mode not in _SKIP_MODES:
+                blobs.append((path, new_sha))
+        return blobs
+
+    async def read_blob(self, sha: str) -> bytes:
+        _, out = await self._git("cat-file", "blob", sha)
+        return out
+
+
+# ─── Blob SHA → Report Index ───
+class BlobIndex:
+    """Reports keyed by git blob SHA, so a file content is only ever reviewed once."""
+
+    def __init__(self, ttl_seconds: float, db_path: str = "", max_entries: int = 4096):
+        self.memory = MemoryTier(max_entries, ttl_seconds)
+        self.disk = SQLiteTier(db_path, "blob_reviews", ttl_seconds) if db_path else None
+
+    @staticmethod
+    def _key(blob_sha: str) -> str:
+        # A different model or prompt makes old reports stale
+        return f"{cache_model_id()}:{PROMPT_VERSION}:{blob_sha}"
+
+    def get(self, blob_sha: str) -> Optional[ReviewReport]:
+        key = self._key(blob_sha)
+        report = self.memory.get(key)
+        if report is None and self.disk is not None:
+            raw = self.disk.get(key)
+            if raw is not None:
+                report = ReviewReport.model_validate_json(raw)
+                self.memory.set(key, report)
+        return report.model_copy(deep=True) if report is not None else None
+
+    def set(self, blob_sha: str, report: ReviewReport):
+        key = self._key(blob_sha)
+        self.memory.set(key, report.model_copy(deep=True))
+        if self.disk is not None:
+            self.disk.set(key, report.model_dump_json())
+
+
+# ─── Jobs ───
+@dataclass
+class PushJob:
+    repo: str
+    ref: str
+    before: Optional[str]
+    after: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = "queued"  # queued → running → done | failed
+    files: int = 0
+    reviewed: int = 0
+    skipped: int = 0   # already reviewed: the blob was in the index
+    ignored: int = 0   # binary or over WEBHOOK_MAX_FILE_BYTES, never reviewed
+    failed: int = 0
+    results: List[dict] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def snapshot(self) -> dict:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "repository": self.repo,
+            "ref": self.ref,
+            "after": self.after,
+            "status": self.status,
+            "files": self.files,
+            "reviewed": self.reviewed,
+            "skipped": self.skipped,
+            "ignored": self.ignored,
+            "failed": self.failed,
+            "pending": max(0, self.files - self.reviewed - self.skipped - self.ignored - self.failed),
+            "duration_ms": round((end - self.started_at) * 1000, 2) if self.started_at else None,
+            "error": self.error,
+            "results": self.results,
+        }
+
+
+class PushQueueFull(Exception):
+    """Raised when too many pushes are already waiting to be reviewed."""
+
+
+class PushReviewQueue:
+    """Bounded queue of push jobs drained by a few asyncio workers."""
+
+    def __init__(self, repo: GitRepo, index: BlobIndex, workers: int, max_queued: int,
+                 max_jobs: int, file_concurrency: int, max_file_bytes: int,
+                 shared_jobs: Optional[SQLiteTier] = None):
+        self.repo = repo
+        self.index = index
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_jobs = max_jobs
+        self.file_concurrency = file_concurrency
+        self.max_file_bytes = max_file_bytes
+        self.shared_jobs = shared_jobs  # job snapshots other worker processes can read
+        # One writer thread keeps snapshot writes off the event loop and in order
+        self._publisher = ThreadPoolExecutor(1, thread_name_prefix="webhook-jobs") if shared_jobs else None
+        self.jobs: "OrderedDict[str, PushJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def submit(self, job: PushJob) -> PushJob:
+        """Queue a push for review and return immediately (must run on the event loop)."""
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise PushQueueFull("Too many pushes waiting for review — try again shortly.")
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.max_jobs:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.status in ("queued", "running"):
+                break  # never forget a job that is still in progress
+            self.jobs.popitem(last=False)
+        self._publish(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[PushJob]:
+        return self.jobs.get(job_id)
+
+    def snapshot(self, job_id: str) -> Optional[dict]:
+        """Status of a job queued by this process or, when shared, by any worker."""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.snapshot()
+        if self.shared_jobs is not None:
+            raw = self.shared_jobs.get(job_id)
+            return json.loads(raw) if raw is not None else None
+        return None
+
+    def _publish(self, job: PushJob):
+        if self.shared_jobs is not None:
+            self._publisher.submit(self.shared_jobs.set, job.id, json.dumps(job.snapshot()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        by_status = {}
+        for job in self.jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {"queued": self._queue.qsize() if self._queue else 0,
+                "running": by_status.get("running", 0),
+                "done": by_status.get("done", 0),
+                "failed": by_status.get("failed", 0)}
+
+    # ─── Workers ───
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._work()))
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                job.status, job.error = "failed", str(e)
+                print(f"❌ Push review {job.id} failed: {e}")
+            finally:
+                job.finished_at = time.time()
+                self._publish(job)
+                self._queue.task_done()
+
+    async def _run(self, job: PushJob):
+        job.status, job.started_at = "running", time.time()
+        self._publish(job)
+        await self.repo.ensure_commit(job.after)
+        blobs = [(path, sha) for path, sha in await self.repo.changed_blobs(job.before, job.after)
+                 if language_for_path(path)]
+        job.files = len(blobs)
+        print(f"📦 Push {job.id} to {job.repo} ({job.ref}): {job.files} reviewable file(s)")
+
+        # Every file runs at once (up to the cap), so a push takes about as
+        # long as its largest file rather than the sum of all of them
+        semaphore = asyncio.Semaphore(self.file_concurrency)
+
+        async def review(path: str, sha: str):
+            async with semaphore:
+                job.results.append(await self._review_blob(job, path, sha))
+
+        await asyncio.gather(*(review(path, sha) for path, sha in blobs))
+
+        scores = [r["quality_score"] for r in job.results if r["status"] in ("reviewed", "skipped")]
+        avg_score = sum(scores) / len(scores) if scores else None
+        log_batch(request_ip="github", batch_id=job.id, api_mode="webhook", items=job.files,
+                  succeeded=job.reviewed + job.skipped, failed=job.failed,
+                  duration_ms=(time.time() - job.started_at) * 1000,
+                  avg_score=avg_score, cache_hits=job.skipped, skipped=job.ignored)
+        job.status = "done"
+
+    async def _review_blob(self, job: PushJob, path: str, sha: str) -> dict:
+        result = {"path": path, "blob_sha": sha}
+        report = await asyncio.to_thread(self.index.get, sha)  # SQLite, off the event loop
+        if report is not None:
+            job.skipped += 1
+            return {**result, "status": "skipped", "quality_score": report.quality_score,
+                    "issues": [issue.model_dump() for issue in report.issues]}
+
+        start = time.time()
+        language = language_for_path(path)
+        trace = ReviewTrace()
+        audit = dict(request_ip="github", language=language, api_mode="webhook",
+                     batch_id=job.id, path=path)
+        try:
+            data = await self.repo.read_blob(sha)
+            if len(data) > self.max_file_bytes or b"\0" in data[:8000]:
+                job.ignored += 1
+                return {**result, "status": "ignored", "reason": "binary or too large"}
+            code = data.decode("utf-8", "replace")
+            report = await run_review(code, language, trace=trace, shed=False)
+        except Exception as e:
+            job.failed += 1
+            log_review(**audit, code_length=0, duration_ms=(time.time() - start) * 1000,
+                       error=str(e), trace=trace.audit_fields())
+            return {**result, "status": "error", "detail": str(e)}
+
+        await asyncio.to_thread(self.index.set, sha, report)
+        job.reviewed += 1
+        log_review(**audit, code_length=len(code), score=report.quality_score,
+                   issues_count=len(report.issues), duration_ms=(time.time() - start) * 1000,
+                   trace=trace.audit_fields())
+        return {**result, "status": "reviewed", "review_id": trace.review_id,
+                "quality_score": report.quality_score,
+                "issues": [issue.model_dump() for issue in report.issues]}
+
+
+push_reviews = PushReviewQueue(
+    repo=GitRepo(config.WEBHOOK_REPO_PATH, config.WEBHOOK_GIT_REMOTE),
+    # No index file is created unless the webhook is configured
+    index=BlobIndex(config.WEBHOOK_INDEX_TTL_SECONDS,
+                    config.WEBHOOK_INDEX_DB_PATH if config.WEBHOOK_REPO_PATH else ""),
+    workers=config.WEBHOOK_JOB_WORKERS,
+    max_queued=config.WEBHOOK_QUEUE_SIZE,
+    max_jobs=config.WEBHOOK_MAX_JOBS,
+    file_concurrency=config.WEBHOOK_FILE_CONCURRENCY,
+    max_file_bytes=config.WEBHOOK_MAX_FILE_BYTES,
+    shared_jobs=(SQLiteTier(config.SHARED_STATE_DB_PATH, "webhook_jobs", 86400)
+                 if config.WORKERS > 1 and config.WEBHOOK_REPO_PATH else None),
+)
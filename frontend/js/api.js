@@ -6,15 +6,21 @@
 
 import { store } from './store.js';
 
+// The browser gives up after this long; the server is asked to stop a little earlier,
+// so a slow review ends with its own 504 instead of work nobody is waiting for.
+const REQUEST_TIMEOUT_MS = 120_000; // 2 min
+const SERVER_TIMEOUT_SECONDS = String((REQUEST_TIMEOUT_MS - 5_000) / 1000);
+
 /**
  * Send code for review.
  * Supports both default server API and custom user API key.
  */
-export async function reviewCode(code) {
+export async function reviewCode(code, language) {
     const { apiMode, customApiKey, serverUrl } = store.state;
 
     const headers = {
         'Content-Type': 'application/json',
+        'X-Request-Timeout': SERVER_TIMEOUT_SECONDS,
     };
 
     // If user provides custom API key, send it via secure header
@@ -23,13 +29,13 @@ export async function reviewCode(code) {
     }
 
     const controller = new AbortController();
-    const timeout = setTimeout(() => controller.abort(), 120_000); // 2 min timeout
+    const timeout = setTimeout(() => controller.abort(), REQUEST_TIMEOUT_MS);
 
     try {
         const response = await fetch(`${serverUrl}/review`, {
             method: 'POST',
             headers,
-            body: JSON.stringify({ code }),
+            body: JSON.stringify({ code, language: language || null }),
             signal: controller.signal,
         });
 
@@ -62,6 +68,133 @@ export async function reviewCode(code) {
     }
 }
 
+/**
+ * Send code for review and stream the result (NDJSON from /review/stream).
+ * `onIssues(issues)` fires with the running list every time a new issue arrives;
+ * resolves with the final merged report (plus its `review_id`).
+ * Pass `priorReviewId` to re-review only what changed since that review.
+ * The result is added to this tab's server-side session (`store.state.sessionId`),
+ * which is started on the first review.
+ */
+export async function reviewCodeStream(code, language, onIssues, priorReviewId = null) {
+    const { apiMode, customApiKey, serverUrl } = store.state;
+    const sessionId = store.state.sessionId || await startSession();
+
+    const headers = {
+        'Content-Type': 'application/json',
+        'X-Request-Timeout': SERVER_TIMEOUT_SECONDS,
+    };
+
+    if (apiMode === 'custom' && customApiKey) {
+        headers['X-Custom-API-Key'] = customApiKey;
+    }
+
+    const controller = new AbortController();
+    const timeout = setTimeout(() => controller.abort(), REQUEST_TIMEOUT_MS);
+
+    try {
+        const response = await fetch(`${serverUrl}/review/stream`, {
+            method: 'POST',
+            headers,
+            body: JSON.stringify({
+                code, language: language || null, prior_review_id: priorReviewId, session_id: sessionId,
+            }),
+            signal: controller.signal,
+        });
+
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({}));
+            throw new Error(errorData.detail || `Server error (${response.status})`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const issues = [];
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const event = JSON.parse(line);
+
+                if (event.event === 'issue') {
+                    issues.push(event.issue);
+                    onIssues?.([...issues]);
+                } else if (event.event === 'done') {
+                    clearTimeout(timeout);
+                    if (event.session_id) {
+                        store.update({ sessionId: event.session_id, session: event.session });
+                    }
+                    return { ...event.report, review_id: event.review_id };
+                } else if (event.event === 'error') {
+                    if (event.status === 429) {
+                        throw new Error('Rate limit reached. Please wait 60 seconds and try again.');
+                    }
+                    throw new Error(event.detail || `Server error (${event.status})`);
+                }
+            }
+        }
+
+        throw new Error('Review stream ended unexpectedly.');
+
+    } catch (err) {
+        clearTimeout(timeout);
+
+        if (err.name === 'AbortError') {
+            throw new Error('Request timed out. The AI might be processing a large file — try again.');
+        }
+
+        if (err.message.includes('Failed to fetch') || err.message.includes('NetworkError')) {
+            throw new Error(`Cannot reach server at ${serverUrl}. Is the backend running?`);
+        }
+
+        throw err;
+    }
+}
+
+/**
+ * Start this tab's server-side session. Reviews only join a session the client asked for;
+ * without one (server unreachable) the review still runs, it just isn't kept for the report.
+ */
+export async function startSession() {
+    const { serverUrl } = store.state;
+    try {
+        const res = await fetch(`${serverUrl}/session`, { method: 'POST' });
+        if (!res.ok) return null;
+        const { session_id, session } = await res.json();
+        store.update({ sessionId: session_id, session });
+        return session_id;
+    } catch {
+        return null;
+    }
+}
+
+/**
+ * Email the session score report. The server already holds the session's reviews.
+ */
+export async function sendSessionReport(email) {
+    const { serverUrl, sessionId } = store.state;
+    const serverBase = serverUrl || 'http://localhost:8000';
+
+    const res = await fetch(`${serverBase}/send-report`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ email, session_id: sessionId }),
+    });
+
+    if (!res.ok) {
+        const err = await res.json().catch(() => ({}));
+        throw new Error(err.detail || 'Failed to send report');
+    }
+    return await res.json();
+}
+
 /**
  * Check if the server is alive.
  */
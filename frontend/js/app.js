@@ -6,7 +6,7 @@
  */
 
 import { store } from './store.js';
-import { reviewCode, checkHealth } from './api.js';
+import { reviewCodeStream, sendSessionReport, checkHealth } from './api.js';
 import { renderScore, renderIssues, renderHistory, showToast, updateLineNumbers } from './components.js';
 
 /* ─── DOM References ─── */
@@ -106,6 +106,9 @@ pasteBtn.addEventListener('click', async () => {
    REVIEW FLOW (with Optimistic UI)
    ═══════════════════════════════════════════════════════ */
 
+// Last review of this tab's code — resubmits only send the changed hunks to the model
+let lastReviewId = null;
+
 reviewBtn.addEventListener('click', async () => {
     const code = codeEditor.value.trim();
 
@@ -118,7 +121,15 @@ reviewBtn.addEventListener('click', async () => {
     store.update({ isLoading: true, error: null, report: null });
 
     try {
-        const report = await reviewCode(code);
+        // Issues render as they stream in; the score lands with the final report
+        const report = await reviewCodeStream(code, store.state.language, (issues) => {
+            resultsSkeleton.classList.add('hidden');
+            resultsContent.classList.remove('hidden');
+            scoreSection.classList.add('hidden');
+            issuesCount.textContent = issues.length;
+            renderIssues(issues, issuesList);
+        }, lastReviewId);
+        lastReviewId = report.review_id || null;
 
         // Save to history
         const historyEntry = {
@@ -179,6 +190,7 @@ store.subscribe('report', (report) => {
     resultsContent.classList.remove('hidden');
 
     // Render score
+    scoreSection.classList.remove('hidden');
     renderScore(report.quality_score, scoreSection);
 
     // Render issues
@@ -307,8 +319,6 @@ copyReportBtn.addEventListener('click', () => {
    GET SCORE REPORT (Session Summary Email)
    ═══════════════════════════════════════════════════════ */
 
-// In-memory session reviews (all reviews done this session)
-let sessionReviews = [];
 
 const reportFooter = $('#reportFooter');
 const reportCount = $('#reportCount');
@@ -320,30 +330,19 @@ const sendReportBtn = $('#sendReportBtn');
 const reportEmail = $('#reportEmail');
 const reportSummary = $('#reportSummary');
 
-// Whenever a new review comes in, push to session array and show the button
-store.subscribe('report', (report) => {
-    if (!report) return;
-
-    // Push current review into session list
-    sessionReviews.push({
-        quality_score: report.quality_score,
-        issues: report.issues.map(i => ({
-            severity: i.severity,
-            description: i.description,
-            suggestion: i.suggestion,
-        })),
-    });
+// The server keeps the session's reviews and running totals; show the button once there is one
+store.subscribe('session', (session) => {
+    if (!session || !session.reviews) return;
 
-    // Show the footer button
     reportFooter.classList.remove('hidden');
-    const n = sessionReviews.length;
+    const n = session.reviews;
     reportCount.textContent = `${n} review${n > 1 ? 's' : ''}`;
 });
 
 // Open report modal
 getReportBtn.addEventListener('click', () => {
-    const n = sessionReviews.length;
-    const avg = (sessionReviews.reduce((s, r) => s + r.quality_score, 0) / n).toFixed(1);
+    const { reviews: n, average_score } = store.state.session;
+    const avg = average_score.toFixed(1);
     const avgNum = parseFloat(avg);
     const color = avgNum >= 8 ? '#22c55e' : avgNum >= 6 ? '#f97316' : avgNum >= 4 ? '#f59e0b' : '#ef4444';
 
@@ -386,21 +385,9 @@ sendReportBtn.addEventListener('click', async () => {
     sendReportBtn.disabled = true;
 
     try {
-        const serverBase = store.state.serverUrl || 'http://localhost:8000';
-        const res = await fetch(`${serverBase}/send-report`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ email, reviews: sessionReviews }),
-        });
-
-        if (!res.ok) {
-            const err = await res.json();
-            throw new Error(err.detail || 'Failed to send report');
-        }
-
-        const data = await res.json();
+        const data = await sendSessionReport(email);
         closeReportModal();
-        showToast(`📧 Report sent to ${data.recipient} — Avg score: ${data.average_score}/10`, 'success', 6000);
+        showToast(`📧 Report on its way to ${data.recipient} — Avg score: ${data.average_score}/10`, 'success', 6000);
 
     } catch (err) {
         showToast(`Failed to send: ${err.message}`, 'error', 6000);
@@ -423,7 +410,7 @@ if (savedMode === 'custom') {
 }
 
 // Restore language
-langSelect.value = store.state.language || 'python';
+langSelect.value = store.state.language || '';
 
 // Health check
 checkHealth().then((alive) => {
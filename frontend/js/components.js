@@ -125,7 +125,7 @@ export function renderHistory(history, container) {
         .map((item, i) => `
             <div class="history-item" data-index="${history.length - 1 - i}">
                 <div class="history-meta">
-                    <span class="h-title">${item.language.charAt(0).toUpperCase() + item.language.slice(1)} Review</span>
+                    <span class="h-title">${item.language ? item.language.charAt(0).toUpperCase() + item.language.slice(1) : 'Code'} Review</span>
                     <span class="h-time">${formatTime(item.timestamp)}</span>
                 </div>
                 <span class="history-score" style="color: ${getScoreColor(item.report.quality_score)}">${item.report.quality_score}/10</span>
@@ -12,7 +12,7 @@ const initialState = {
 
     // Editor
     code: '',
-    language: 'python',
+    language: '',             // '' = auto-detect; only a language the user picked is sent
 
     // Review State
     isLoading: false,
@@ -21,6 +21,10 @@ const initialState = {
 
     // History
     history: [],              // [{ id, code, report, language, timestamp }]
+
+    // Server-side session: the server keeps this tab's reviews for the score report
+    sessionId: null,
+    session: null,            // { reviews, average_score } — maintained by the server
 };
 
 class Store {
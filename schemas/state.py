@@ -1,15 +1,31 @@
-from typing import List, TypedDict
+from typing import List, Optional, TypedDict
 from pydantic import BaseModel, Field
 
 class ReviewIssue(BaseModel):
     severity: str = Field(description="Severity: Low, Medium, or High")
     description: str = Field(description="What is the issue?")
     suggestion: str = Field(description="How to fix it?")
+    line: Optional[int] = Field(default=None, description="Line number the issue is on, if it points at one line")
 
 class ReviewReport(BaseModel):
     issues: List[ReviewIssue] = Field(description="List of all identified issues")
     quality_score: float = Field(description="Overall code quality score from 0.0 to 10.0")
+    confidence: Optional[float] = Field(default=None, description="How confident you are in this review, from 0.0 to 1.0")
 
 class AgentState(TypedDict):
     code_snippet: str
+    language: str
+    chunks: list
+    hunks: list  # incremental re-review: only these regions go to the model
+    carried: ReviewReport  # incremental re-review: prior issues that still apply
+    unchanged_lines: int
+    static_issues: list  # local linter findings, passed to the model as hints
+    static_notes: list  # local context for the prompt only (e.g. a non-conclusive parse failure)
+    static_ms: float
+    prompt_bodies: list  # compacted, line-numbered text per chunk
+    tokens: dict  # estimated prompt tokens: {"original", "compacted"}
+    deadline: float  # time.monotonic() value; model calls give up past it
+    retries: int
+    complexity: int  # local estimate of the worst function's cyclomatic complexity
+    routing: dict  # model tier chosen, escalations, per-tier calls / latency / cost
     report: ReviewReport
\ No newline at end of file
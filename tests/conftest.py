@@ -0,0 +1,24 @@
+"""
+Test setup: the offline fake model, no email, and every file the app
+writes (audit log, SQLite stores) kept in a throwaway directory. Config
+is read at import time, so this runs before any app module is imported.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_TMP = tempfile.mkdtemp(prefix="redglyph-tests-")
+os.environ.update({
+    "LLM_BACKEND": "fake",
+    "FAKE_LLM_LATENCY_MS": "1",
+    "FAKE_LLM_LATENCY_SIGMA": "0",
+    "EMAIL_ADDRESS": "",
+    "EMAIL_APP_PASSWORD": "",
+    "AUDIT_LOG": os.path.join(_TMP, "audit.log"),
+    "AUDIT_DB_PATH": "",
+    "WEBHOOK_INDEX_DB_PATH": "",
+})
@@ -0,0 +1,61 @@
+"""Audit stats and metrics when several worker processes share one audit store."""
+
+from datetime import datetime, timedelta, timezone
+
+from core.audit import AuditWriter, SharedAuditStats
+from core.metrics import Counter, Histogram, Registry
+
+
+def _writer(tmp_path) -> AuditWriter:
+    return AuditWriter(log_path=str(tmp_path / "audit.log"), db_path=str(tmp_path / "audit.db"),
+                       batch_size=10, flush_seconds=0.05, max_bytes=0, rotate_seconds=0,
+                       backup_count=1, queue_size=100)
+
+
+def _review(duration_ms: float, error: str = None, ago: float = 0) -> dict:
+    ts = datetime.now(timezone.utc) - timedelta(seconds=ago)
+    return {"timestamp": ts.isoformat(), "event": "code_review", "api_mode": "server",
+            "duration_ms": duration_ms, "score": 7.5, "error": error}
+
+
+def test_shared_stats_cover_every_workers_events(tmp_path):
+    since = datetime.now(timezone.utc).isoformat()
+    first, second = _writer(tmp_path), _writer(tmp_path)  # two workers
+    first.submit(_review(100, ago=60))  # from before this server started
+    first.submit(_review(100))
+    second.submit(_review(200, error="boom"))
+    first.flush()
+    second.flush()
+
+    stats = SharedAuditStats(str(tmp_path / "audit.db"), since=since)
+    snapshot = stats.snapshot()
+    assert (snapshot["reviews"], snapshot["errors"], snapshot["since"]) == (2, 1, since)
+
+    # Later snapshots fold in only the new rows
+    second.submit(_review(300))
+    second.flush()
+    snapshot = stats.snapshot()
+    assert (snapshot["reviews"], snapshot["errors"]) == (3, 1)
+    assert snapshot["score_distribution"]["7-8"] == 3
+
+
+def test_shared_stats_before_anything_is_written(tmp_path):
+    assert SharedAuditStats(str(tmp_path / "audit.db"), since="").snapshot()["reviews"] == 0
+
+
+def test_constant_labels_mark_every_sample():
+    registry = Registry()
+    counter = registry.register(Counter("t_total", "Test.", ["kind"]))
+    histogram = registry.register(Histogram("t_seconds", "Test.", buckets=(1,)))
+    counter.inc(kind="a")
+    histogram.observe(0.5)
+    registry.set_constant_labels(worker=1234)
+
+    samples = [line for line in registry.render().splitlines() if not line.startswith("#")]
+    assert samples == [
+        't_total{worker="1234",kind="a"} 1',
+        't_seconds_bucket{worker="1234",le="1"} 1',
+        't_seconds_bucket{worker="1234",le="+Inf"} 1',
+        't_seconds_sum{worker="1234"} 0.5',
+        't_seconds_count{worker="1234"} 1',
+    ]
@@ -0,0 +1,67 @@
+"""Graph builds and the startup prewarm never block the event loop."""
+
+import asyncio
+import time
+
+import agents.reviewer_graph as reviewer_graph
+from agents.reviewer_graph import GraphPool, aget_graph
+from core.prewarm import Prewarm
+
+
+def _slow_build(monkeypatch, seconds: float) -> list:
+    builds = []
+
+    def create_graph(api_key=None):
+        time.sleep(seconds)  # stands in for the LangChain imports and compile
+        builds.append(api_key)
+        return object()
+    monkeypatch.setattr(reviewer_graph, "create_graph", create_graph)
+    return builds
+
+
+async def _ticks_while(coro) -> tuple:
+    """Run `coro` next to a 10 ms ticker; the loop was free if the ticker kept going."""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+    task = asyncio.create_task(ticker())
+    try:
+        return await coro, ticks
+    finally:
+        task.cancel()
+
+
+def test_new_key_graph_is_built_off_the_event_loop(monkeypatch):
+    builds = _slow_build(monkeypatch, 0.3)
+    monkeypatch.setattr(reviewer_graph, "graph_pool", GraphPool(max_size=4, idle_seconds=60))
+
+    graph, ticks = asyncio.run(_ticks_while(aget_graph("user-key")))
+    assert ticks >= 10  # ~30 expected; a build on the loop would allow none
+    assert builds == ["user-key"]
+    assert asyncio.run(aget_graph("user-key")) is graph  # pooled: no second build
+    assert builds == ["user-key"]
+
+
+def test_wait_returns_once_the_prewarm_finishes(monkeypatch):
+    warmed = []
+    prewarm = Prewarm()
+    monkeypatch.setattr(prewarm, "_warm", lambda: (time.sleep(0.2), warmed.append(1)))
+
+    async def main():
+        prewarm.start()
+        await asyncio.sleep(0)
+        assert prewarm.state == "warming"
+        await prewarm.wait()
+        return prewarm.state
+
+    state, ticks = asyncio.run(_ticks_while(main()))
+    assert state == "ready" and warmed == [1]
+    assert ticks >= 5
+
+
+def test_wait_does_not_block_without_a_prewarm():
+    asyncio.run(asyncio.wait_for(Prewarm().wait(), timeout=0.1))
@@ -0,0 +1,38 @@
+"""The compiled review graph end to end, on the offline fake model."""
+
+import asyncio
+
+from agents.reviewer_graph import create_graph
+from schemas.state import ReviewReport
+
+
+def _run(state: dict, on_event=None) -> dict:
+    graph = create_graph()
+    run_config = {"configurable": {"on_event": on_event}} if on_event else None
+    return asyncio.run(graph.ainvoke({"deadline": None, **state}, config=run_config))
+
+
+def test_graph_reviews_code_with_the_model():
+    code = "".join(f"def handler_{i}(items):\n    return [x for x in items if x > {i}]\n\n" for i in range(5))
+    result = _run({"code_snippet": code, "language": "python"})
+    assert isinstance(result["report"], ReviewReport)
+    assert result["chunks"]  # prepared for the model
+    assert result["tokens"]["original"] >= result["tokens"]["compacted"] > 0
+    assert result["routing"]["tiers"]["flash"]["calls"] == len(result["chunks"])
+    assert result["static_ms"] is not None
+
+
+def test_graph_short_circuits_on_a_python_syntax_error():
+    result = _run({"code_snippet": "def broken(:\n    pass\n", "language": "python"})
+    assert result.get("chunks") is None  # the model was never asked
+    assert result.get("routing") is None
+    assert any(issue.severity == "High" for issue in result["report"].issues)
+
+
+def test_graph_streams_progress_and_issues():
+    events = []
+    result = _run({"code_snippet": "def add(a, b):\n    return a + b\n", "language": "python"}, events.append)
+    kinds = [e["event"] for e in events]
+    assert "progress" in kinds
+    streamed = [e["issue"] for e in events if e["event"] == "issue"]
+    assert streamed == [issue.model_dump() for issue in result["report"].issues]
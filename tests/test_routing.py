@@ -0,0 +1,113 @@
+"""Model tier routing: tier choice, escalation triggers, and at most one escalation per chunk."""
+
+import asyncio
+
+import pytest
+
+import agents.reviewer_graph as reviewer_graph
+from agents.routing import escalation_reason, route
+from core.config import config
+from schemas.state import ReviewIssue, ReviewReport
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    monkeypatch.setattr(config, "MODEL_ROUTING", True)
+    monkeypatch.setattr(config, "ROUTE_ESCALATE", True)
+    monkeypatch.setattr(config, "ROUTE_LITE_MAX_TOKENS", 1500)
+    monkeypatch.setattr(config, "ROUTE_LITE_MAX_COMPLEXITY", 8)
+    monkeypatch.setattr(config, "ROUTE_LITE_LANGUAGES", ["python"])
+    monkeypatch.setattr(config, "ROUTE_PRO_MIN_TOKENS", 40000)
+    monkeypatch.setattr(config, "ROUTE_PRO_MIN_COMPLEXITY", 30)
+    monkeypatch.setattr(config, "ROUTE_MIN_CONFIDENCE", 0.6)
+
+
+def _report(severity: str = None, confidence: float = 0.9) -> ReviewReport:
+    issues = [ReviewIssue(severity=severity, description="d", suggestion="s", line=1)] if severity else []
+    return ReviewReport(issues=issues, quality_score=7.0, confidence=confidence)
+
+
+# ─── route() ───
+def test_routing_off_uses_default_tier(monkeypatch):
+    monkeypatch.setattr(config, "MODEL_ROUTING", False)
+    decision = route(100_000, "python", 99)
+    assert decision.tier.name == "flash"
+    assert decision.escalate_to is None
+
+
+@pytest.mark.parametrize("tokens, language, complexity, tier", [
+    (200, "python", 3, "lite"),          # small, simple, lite language
+    (1500, "python", 8, "lite"),         # limits are inclusive
+    (1501, "python", 3, "flash"),        # too many tokens for lite
+    (200, "python", 9, "flash"),         # too complex for lite
+    (200, "rust", 3, "flash"),           # not a lite language
+    (200, None, 3, "flash"),             # unlabelled
+    (40000, "python", 3, "pro"),         # token threshold
+    (200, "python", 30, "pro"),          # complexity threshold
+])
+def test_route_picks_tier_by_tokens_and_complexity(routing, tokens, language, complexity, tier):
+    assert route(tokens, language, complexity).tier.name == tier
+
+
+def test_route_escalates_one_tier_up(routing, monkeypatch):
+    assert route(200, "python", 3).escalate_to.name == "flash"
+    assert route(200, "rust", 3).escalate_to.name == "pro"
+    assert route(40000, "python", 3).escalate_to is None  # nothing above pro
+    monkeypatch.setattr(config, "ROUTE_ESCALATE", False)
+    assert route(200, "python", 3).escalate_to is None
+
+
+# ─── escalation_reason() ───
+def test_escalation_on_high_issue(routing):
+    assert escalation_reason(_report("High")) == "high-severity issue"
+    assert escalation_reason(_report(" high ")) == "high-severity issue"
+
+
+def test_escalation_on_low_confidence(routing):
+    assert escalation_reason(_report(confidence=0.3)) == "confidence 0.30"
+
+
+def test_no_escalation_for_confident_answer(routing):
+    assert escalation_reason(_report("Medium", confidence=0.6)) is None
+    assert escalation_reason(_report(confidence=None)) is None
+
+
+# ─── The graph escalates each chunk at most once ───
+class _ScriptedModel:
+    """Stands in for a tier's chat model: every call returns `answer` and is recorded."""
+
+    def __init__(self, tier: str, answer: ReviewReport, calls: list):
+        self.tier, self.answer, self.calls = tier, answer, calls
+
+    def with_structured_output(self, schema):
+        from langchain_core.runnables import RunnableLambda
+
+        async def respond(prompt):
+            self.calls.append(self.tier)
+            return self.answer
+        return RunnableLambda(respond)
+
+
+def _review(monkeypatch, answer: ReviewReport):
+    calls = []
+    monkeypatch.setattr(reviewer_graph, "get_llm",
+                        lambda api_key=None, tier=None: _ScriptedModel(tier.name, answer, calls))
+    graph = reviewer_graph.create_graph()
+    code = "def add(a, b):\n    return a + b\n"
+    result = asyncio.run(graph.ainvoke({"code_snippet": code, "language": "python", "deadline": None}))
+    return result, calls
+
+
+@pytest.mark.parametrize("answer", [_report("High"), _report(confidence=0.1)])
+def test_graph_escalates_at_most_once(routing, monkeypatch, answer):
+    # Every tier keeps giving an answer that would escalate: lite → flash, and no further
+    result, calls = _review(monkeypatch, answer)
+    assert calls == ["lite", "flash"]
+    assert result["routing"]["tier"] == "lite"
+    assert result["routing"]["escalations"] == 1
+
+
+def test_graph_keeps_a_confident_answer(routing, monkeypatch):
+    result, calls = _review(monkeypatch, _report("Low"))
+    assert calls == ["lite"]
+    assert result["routing"]["escalations"] == 0
@@ -0,0 +1,199 @@
+"""Single-flight coalescing and the AIMD token bucket behind every model call."""
+
+import asyncio
+import time
+
+import pytest
+
+from core.rate_limit import SHED, AdaptiveTokenBucket, RateLimited, call_with_retry, is_rate_limit_error
+from core.singleflight import SingleFlight
+
+
+# ─── SingleFlight ───
+def test_concurrent_callers_share_one_call():
+    flights, calls = SingleFlight(), []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "report"
+
+    async def main():
+        return await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [r for r, _ in results] == ["report"] * 5
+    assert [leader for _, leader in results].count(True) == 1
+    assert flights.in_flight() == 0
+
+
+def test_failure_reaches_every_waiter_and_releases_the_key():
+    flights, calls = SingleFlight(), []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("model error")
+
+    async def main():
+        results = await asyncio.gather(*(flights.do("k", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        assert not flights.has("k")
+        return await flights.do("k", lambda: asyncio.sleep(0, "fresh"))
+
+    assert asyncio.run(main()) == ("fresh", True)
+    assert len(calls) == 1
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flights = SingleFlight()
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do("k", lambda: asyncio.sleep(0.05, "done")))
+        follower = asyncio.ensure_future(flights.do("k", lambda: asyncio.sleep(0, "unused")))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == ("done", False)
+
+
+def test_last_waiter_leaving_cancels_the_call():
+    flights, finished = SingleFlight(), []
+
+    async def work():
+        await asyncio.sleep(1)
+        finished.append(1)
+
+    async def main():
+        waiter = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)  # let the done callback release the key
+        assert not flights.has("k")
+
+    asyncio.run(main())
+    assert finished == []
+
+
+# ─── AdaptiveTokenBucket (AIMD) ───
+def _bucket(**overrides) -> AdaptiveTokenBucket:
+    params = dict(rate=4.0, burst=2.0, min_rate=0.5, max_rate=8.0, increase=1.0)
+    params.update(overrides)
+    return AdaptiveTokenBucket(**params)
+
+
+def test_rate_halves_on_429_and_grows_additively():
+    bucket = _bucket()
+
+    async def main():
+        await bucket.on_rate_limited()
+        assert bucket.rate == 2.0
+        assert bucket.tokens <= 0  # the burst is spent: back off right away
+        await bucket.on_success()
+        await bucket.on_success()
+        assert bucket.rate == 4.0
+
+    asyncio.run(main())
+
+
+def test_rate_stays_within_bounds():
+    bucket = _bucket()
+
+    async def main():
+        for _ in range(10):
+            await bucket.on_rate_limited()
+        assert bucket.rate == 0.5
+        for _ in range(20):
+            await bucket.on_success()
+        assert bucket.rate == 8.0
+
+    asyncio.run(main())
+
+
+def test_acquire_sheds_when_the_token_would_arrive_past_the_deadline():
+    bucket = _bucket(rate=1.0, burst=1.0)
+
+    async def main():
+        await bucket.acquire()  # spends the burst
+        with pytest.raises(RateLimited):
+            await bucket.acquire(deadline=time.monotonic() + 0.1)  # next token is ~1 s away
+
+    asyncio.run(main())
+
+
+class _Quota(Exception):
+    code = 429
+
+
+def test_rate_limit_errors_are_recognised_by_status_not_text():
+    from google.api_core.exceptions import ResourceExhausted
+
+    assert is_rate_limit_error(_Quota("quota"))
+    assert is_rate_limit_error(ResourceExhausted("quota exceeded"))
+    try:
+        raise RuntimeError("model call failed") from _Quota("quota")
+    except RuntimeError as wrapped:
+        assert is_rate_limit_error(wrapped)
+    # "429" in a message is just text: a line number, a token count...
+    assert not is_rate_limit_error(ValueError("Unexpected token at line 429"))
+    assert not is_rate_limit_error(ValueError("prompt is 14290 tokens"))
+
+
+def test_call_with_retry_backs_off_on_429_then_succeeds():
+    bucket, attempts, retries = _bucket(rate=100.0, burst=10.0, max_rate=200.0), [], []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _Quota("quota")
+        return "ok"
+
+    result = asyncio.run(call_with_retry(flaky, bucket, max_retries=5, base_delay=0.001, max_delay=0.002,
+                                         on_retry=lambda: retries.append(1)))
+    assert result == "ok"
+    assert len(attempts) == 3 and len(retries) == 2
+    assert bucket.rate == 100.0 / 4 + 1.0  # halved twice, then one additive step
+
+
+def test_call_with_retry_does_not_retry_other_errors():
+    bucket, attempts = _bucket(), []
+
+    async def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(call_with_retry(broken, bucket, max_retries=5, base_delay=0.001))
+    assert len(attempts) == 1
+    assert bucket.rate == 4.0
+
+
+def test_call_with_retry_sheds_near_the_deadline():
+    bucket = _bucket(rate=100.0, burst=10.0)
+
+    async def quota():
+        raise _Quota("quota")
+
+    with pytest.raises(RateLimited):
+        asyncio.run(call_with_retry(quota, bucket, deadline=time.monotonic() + 0.05,
+                                    max_retries=10, base_delay=1.0, max_delay=1.0))
+
+
+def test_call_with_retry_sheds_once_retries_run_out():
+    bucket, attempts = _bucket(rate=100.0, burst=10.0), []
+    shed_before = SHED.value()
+
+    async def quota():
+        attempts.append(1)
+        raise _Quota("quota")
+
+    with pytest.raises(RateLimited) as caught:
+        asyncio.run(call_with_retry(quota, bucket, max_retries=2, base_delay=0.001, max_delay=0.002))
+    assert len(attempts) == 3  # the first call and two retries
+    assert caught.value.retries == 2
+    assert isinstance(caught.value.__cause__, _Quota)
+    assert SHED.value() == shed_before + 1
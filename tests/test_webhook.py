@@ -0,0 +1,101 @@
+"""Push reviews against a throwaway git repository: the diff, SHA checks and the blob index."""
+
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+from core.webhook import _ZERO_SHA, BlobIndex, GitError, GitRepo, PushJob, PushReviewQueue
+
+_GIT_ENV = {**os.environ, "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@example.com",
+            "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@example.com"}
+
+
+def _git(path, *args) -> str:
+    return subprocess.run(["git", "-C", str(path), *args], check=True, capture_output=True,
+                          text=True, env=_GIT_ENV).stdout.strip()
+
+
+def _commit(path, files: dict, remove=()) -> str:
+    for name, content in files.items():
+        mode = "wb" if isinstance(content, bytes) else "w"
+        with open(path / name, mode) as f:
+            f.write(content)
+    for name in remove:
+        _git(path, "rm", "-q", name)
+    _git(path, "add", "-A")
+    _git(path, "commit", "-q", "-m", "change")
+    return _git(path, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def clone(tmp_path):
+    """A repo with two commits: the second modifies, adds, deletes and symlinks files."""
+    _git(tmp_path, "init", "-q")
+    first = _commit(tmp_path, {"app.py": "def f(x):\n    return x\n", "notes.md": "# notes\n",
+                               "old.py": "X = 1\n"})
+    os.symlink("app.py", tmp_path / "link.py")
+    second = _commit(tmp_path, {"app.py": "def f(x):\n    return x + 1\n", "new.py": "Y = 2\n",
+                                "blob.py": b"\0\1\2binary"}, remove=["old.py"])
+    return tmp_path, first, second
+
+
+def _paths(blobs) -> set:
+    return {path for path, _ in blobs}
+
+
+def test_changed_blobs_between_two_commits(clone):
+    path, first, second = clone
+    blobs = asyncio.run(GitRepo(str(path)).changed_blobs(first, second))
+    # Added and modified only: no deletions, and the symlink has no content to review
+    assert _paths(blobs) == {"app.py", "new.py", "blob.py"}
+    assert dict(blobs)["app.py"] == _git(path, "rev-parse", f"{second}:app.py")
+
+
+def test_new_branch_is_diffed_against_the_head_commits_parent(clone):
+    path, first, second = clone
+    repo = GitRepo(str(path))
+    assert _paths(asyncio.run(repo.changed_blobs(_ZERO_SHA, second))) == {"app.py", "new.py", "blob.py"}
+    assert _paths(asyncio.run(repo.changed_blobs(None, first))) == {"app.py", "notes.md", "old.py"}
+
+
+@pytest.mark.parametrize("sha", ["HEAD", "--output=/tmp/x", "abc123", "G" * 40, "A" * 40])
+def test_non_sha_arguments_never_reach_git(clone, sha):
+    path, first, second = clone
+    repo = GitRepo(str(path))
+    with pytest.raises(GitError):
+        asyncio.run(repo.changed_blobs(first, sha))
+    with pytest.raises(GitError):
+        asyncio.run(repo.changed_blobs(sha, second))
+
+
+def _queue(path) -> PushReviewQueue:
+    return PushReviewQueue(GitRepo(str(path)), BlobIndex(ttl_seconds=3600), workers=1, max_queued=4,
+                           max_jobs=10, file_concurrency=4, max_file_bytes=10_000)
+
+
+async def _run_job(queue: PushReviewQueue, before, after) -> dict:
+    job = queue.submit(PushJob(repo="test/repo", ref="refs/heads/main", before=before, after=after))
+    while job.status not in ("done", "failed"):
+        await asyncio.sleep(0.01)
+    return job.snapshot()
+
+
+def test_push_reviews_changed_files_and_reuses_reviewed_blobs(clone):
+    path, first, second = clone
+    queue = _queue(path)
+
+    async def main():
+        try:
+            return await _run_job(queue, first, second), await _run_job(queue, first, second)
+        finally:
+            await queue.stop()
+
+    push, repeat = asyncio.run(main())
+    assert push["status"] == "done", push["error"]
+    assert (push["files"], push["reviewed"], push["skipped"], push["ignored"], push["failed"]) == (3, 2, 0, 1, 0)
+    assert {r["path"]: r["status"] for r in push["results"]} == {
+        "app.py": "reviewed", "new.py": "reviewed", "blob.py": "ignored"}
+    # The same blobs again come from the index, and the binary file is still never reviewed
+    assert (repeat["reviewed"], repeat["skipped"], repeat["ignored"], repeat["pending"]) == (0, 2, 1, 0)